@@ -87,6 +87,9 @@ COOKIES_DESTINO = ["cookies_destino.json", "cookiesdestino.json", "cookies-desti
 
 SAFETY_PAUSE_SECONDS = 5  # pausa entre autenticações distintas
 
+# --force: ignora o ledger de sync e reprocessa todos os produtos
+FORCE_SYNC = "--force" in sys.argv[1:]
+
 # ---------------------------------------------------------------------------
 # Storages
 # ---------------------------------------------------------------------------
@@ -246,6 +249,7 @@ def action_sync(browser: Browser) -> None:
         run_sync(
             ctx, STORAGE_ORIGEM, STORAGE_DESTINO,
             ORIGEM_URL, SOURCE_USER, SOURCE_PASS, COOKIES_ORIGEM,
+            force=FORCE_SYNC,
         )
     finally:
         safe_close(ctx, "DESTINO")
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from service import text_canon
+
+SOURCE_PATH = os.path.join(ROOT, "produtos", "ProdutosOrigem.json.bak")
+NAME_KEYS = {"name", "nome", "type", "value", "title"}
+ROUNDS = 200
+
+
+# ---------------------------------------------------------------------------
+# Implementações antigas (cópia fiel, só para comparação)
+# ---------------------------------------------------------------------------
+def legacy_normalize_name(name: str) -> str:
+    if not name:
+        return ""
+    nfkd = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in nfkd if not unicodedata.combining(c))
+    name = re.sub(r'\s+', ' ', name.lower().strip())
+    name = re.sub(r'\s+f\s+\d+\.?\d*', '', name)
+    name = re.sub(r'\s+colar com nome.*$', '', name)
+    name = re.sub(r'\s+banho de ouro$', '', name)
+    name = re.sub(r'\s+banho de rhodium$', '', name)
+    return name.strip()
+
+
+def legacy_normalize(name: str) -> str:
+    if not name:
+        return ""
+    raw = " ".join(str(name).strip().split()).lower()
+    nfkd = unicodedata.normalize("NFKD", raw)
+    return "".join(c for c in nfkd if not unicodedata.combining(c))
+
+
+def _collect_names(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    names = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in NAME_KEYS and isinstance(value, str) and value.strip():
+                    names.append(value)
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(data)
+    return names
+
+
+def _pick_best_legacy(names: list) -> int:
+    # padrão de _pick_best_name_candidate: normaliza todos os candidatos a cada chamada
+    hits = 0
+    for origem in names:
+        origem_norm = legacy_normalize_name(origem)
+        for cand in names:
+            if legacy_normalize_name(cand) == origem_norm:
+                hits += 1
+    return hits
+
+
+def _pick_best_new(names: list) -> int:
+    hits = 0
+    cand_norms = text_canon.canonical_names(names)
+    for origem in names:
+        origem_norm = text_canon.canonical_name(origem)
+        for cand_norm in cand_norms:
+            if cand_norm == origem_norm:
+                hits += 1
+    return hits
+
+
+def _timeit(label: str, func, *args) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"   {label:<38} {elapsed * 1000:9.1f} ms")
+    return elapsed
+
+
+def run() -> None:
+    names = _collect_names(SOURCE_PATH)
+    print(f"{len(names)} nomes ({len(set(names))} distintos) de {SOURCE_PATH} × {ROUNDS} rodadas")
+
+    for name in names:
+        assert text_canon.canonical_name(name) == legacy_normalize_name(name), name
+        assert text_canon.fold(name) == legacy_normalize(name), name
+
+    text_canon.cache_clear()
+    print("normalize_name (lista inteira):")
+    old = _timeit("antigo (re.sub + NFKD por chamada)", lambda: [legacy_normalize_name(n) for n in names])
+    new = _timeit("text_canon.canonical_names", text_canon.canonical_names, names)
+    print(f"   speedup: {old / new:.1f}x")
+
+    print("domain.normalize (lista inteira):")
+    old = _timeit("antigo", lambda: [legacy_normalize(n) for n in names])
+    new = _timeit("text_canon.fold_many", text_canon.fold_many, names)
+    print(f"   speedup: {old / new:.1f}x")
+
+    print("loop aninhado estilo _pick_best_name_candidate:")
+    old = _timeit("antigo", _pick_best_legacy, names)
+    new = _timeit("text_canon", _pick_best_new, names)
+    print(f"   speedup: {old / new:.1f}x")
+
+    print(text_canon.cache_info())
+
+
+if __name__ == "__main__":
+    run()
@@ -11,6 +11,7 @@ if ROOT not in sys.path:
 from dotenv import load_dotenv
 from patchright.sync_api import sync_playwright
 from service.auth import load_storage_state, _resolve_state_path
+from service.token_manager import get_token_manager
 
 load_dotenv()
 
@@ -54,20 +55,8 @@ def _classify_model(data: Dict[str, Any]) -> str:
 
 
 def _extract_token_from_storage(page) -> Optional[str]:
-    token = None
-    keys = ["token", "access_token", "auth_token", "authorization", "jwt", "bearer", "api_token"]
-    for key in keys:
-        try:
-            value = page.evaluate("(k) => localStorage.getItem(k)", key)
-            if value and isinstance(value, str) and len(value) > 10:
-                token = value
-                break
-        except Exception:
-            pass
-
-    if token and not token.lower().startswith("bearer "):
-        token = f"Bearer {token}"
-    return token
+    # storage_state do contexto / localStorage, com validade pelo exp do JWT
+    return get_token_manager(page.url).get(page) or None
 
 
 def _capture_token_from_edit(page, base: str, product_id: str) -> Optional[str]:
@@ -248,9 +237,10 @@ def run() -> str:
                         item_result = _fetch_product(page, source["base"], product_id, token)
 
                         if item_result.get("http_status") == 401:
+                            get_token_manager(source["base"]).invalidate(token)
                             refreshed = _capture_token_from_edit(page, source["base"], product_id)
                             if refreshed:
-                                token = refreshed
+                                token = get_token_manager(source["base"]).remember(refreshed)
                                 source_report["token_refreshed_on_401"] = True
                                 item_result = _fetch_product(page, source["base"], product_id, token)
 
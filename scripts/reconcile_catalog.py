@@ -0,0 +1,45 @@
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from service.sync_mod.reconcile import reconcile_catalog, save_match_table
+
+ORIGEM_JSON_PATH = os.path.join(ROOT, "produtos", "ProdutosOrigem.json")
+DESTINO_JSON_PATH = os.path.join(ROOT, "produtos", "ProdutosDestino.json")
+OUT_PATH = os.path.join(ROOT, "produtos", "reconciliacao.csv")
+
+
+def _load_list(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    if isinstance(data, dict):
+        data = [data]
+    return data if isinstance(data, list) else []
+
+
+def run(workers: int = 0) -> str:
+    origem = _load_list(ORIGEM_JSON_PATH)
+    destino = _load_list(DESTINO_JSON_PATH)
+
+    started = time.perf_counter()
+    table = reconcile_catalog(origem, destino, workers=workers or None)
+    elapsed = time.perf_counter() - started
+
+    by_rule = {}
+    for row in table:
+        by_rule[row["rule"]] = by_rule.get(row["rule"], 0) + 1
+
+    save_match_table(table, OUT_PATH)
+    print(f"{len(origem)} ORIGEM × {len(destino)} DESTINO em {elapsed:.1f}s")
+    print(f"Regras: {by_rule}")
+    print(OUT_PATH)
+    return OUT_PATH
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
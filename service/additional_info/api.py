@@ -1,45 +1,54 @@
 import time
-import random
 
-from .config import REQUEST_TIMEOUT_MS, FETCH_RETRIES, logger
+from service.page_fetch import fetch_json_many, fetch_paged_json
+
+from .config import REQUEST_TIMEOUT_MS, FETCH_RETRIES, LIST_CONCURRENCY, LIST_PAGE_SIZE, logger
 
 # ---------------------------------------------------------------------------
 # Buscar itens existentes via API
 # ---------------------------------------------------------------------------
+def _list_all_items(page, api_url: str, headers: dict) -> tuple[list, dict]:
+    """
+    Listagem completa: sonda o maior page[size] aceito, páginas em paralelo,
+    repete só as páginas que falharem. Truncamento é avisado, nunca silencioso.
+    """
+    items, info = fetch_paged_json(
+        page, api_url, headers=headers,
+        page_size=LIST_PAGE_SIZE, concurrency=LIST_CONCURRENCY,
+        timeout_ms=REQUEST_TIMEOUT_MS, retries=FETCH_RETRIES,
+    )
+    if not info["complete"]:
+        logger.warning(
+            "Listagem %s TRUNCADA: %d/%d itens (faltam %d; páginas com falha: %s)",
+            api_url, len(items), info["total"], info["missing"], info["failed_pages"],
+        )
+    else:
+        logger.debug("Listagem %s: %d itens em %d páginas de %d", api_url, len(items), info["pages"], info["page_size"])
+    return items, info
+
+
 def _fetch_all_items(page, api_url: str, headers: dict) -> list:
-    all_items = []
-    page_num = 1
-
-    try:
-        url = f"{api_url}?sort=id&page[size]=25&page[number]=1"
-        response = page.request.get(url, headers=headers, timeout=REQUEST_TIMEOUT_MS)
-        if response.status != 200:
-            return []
-        data = response.json()
-        total_records = data.get("paging", {}).get("total", 0)
-        total_pages = (total_records + 24) // 25
-        all_items.extend(data.get("data", []))
-        page_num = 2
-    except Exception as e:
-        logger.error("Erro ao buscar itens: %s", e)
-        return []
-
-    while page_num <= total_pages:
-        try:
-            url = f"{api_url}?sort=id&page[size]=25&page[number]={page_num}"
-            response = page.request.get(url, headers=headers, timeout=REQUEST_TIMEOUT_MS)
-            if response.status != 200:
-                break
-            items = response.json().get("data", [])
-            if not items:
-                break
-            all_items.extend(items)
-            page_num += 1
-            time.sleep(random.uniform(0.3, 0.6))
-        except Exception:
-            break
+    items, _ = _list_all_items(page, api_url, headers)
+    return items
+
 
-    return all_items
+def _normalize_full_item(item_data: dict) -> dict:
+    if "options" in item_data or "values" in item_data:
+        opts = item_data.get("options") or item_data.get("values") or []
+        normalized_opts = []
+        for opt in opts:
+            if isinstance(opt, str):
+                normalized_opts.append({"value": opt, "price": "0.00", "order": 0, "add_total": 1})
+            elif isinstance(opt, dict):
+                price = opt.get("price") or opt.get("additional_price") or opt.get("valor") or "0.00"
+                normalized_opts.append({
+                    "value": opt.get("value") or opt.get("label") or "",
+                    "price": str(price),
+                    "order": opt.get("order", 0),
+                    "add_total": opt.get("add_total", 1)
+                })
+        item_data["options"] = normalized_opts
+    return item_data
 
 
 def _fetch_full_item(page, api_url: str, headers: dict, item_id, timeout_ms: int = REQUEST_TIMEOUT_MS) -> dict | None:
@@ -49,23 +58,7 @@ def _fetch_full_item(page, api_url: str, headers: dict, item_id, timeout_ms: int
             response = page.request.get(url, headers=headers, timeout=timeout_ms)
             if response.status == 200:
                 data = response.json()
-                item_data = data.get("data") or data
-                if "options" in item_data or "values" in item_data:
-                    opts = item_data.get("options") or item_data.get("values") or []
-                    normalized_opts = []
-                    for opt in opts:
-                        if isinstance(opt, str):
-                            normalized_opts.append({"value": opt, "price": "0.00", "order": 0, "add_total": 1})
-                        elif isinstance(opt, dict):
-                            price = opt.get("price") or opt.get("additional_price") or opt.get("valor") or "0.00"
-                            normalized_opts.append({
-                                "value": opt.get("value") or opt.get("label") or "",
-                                "price": str(price),
-                                "order": opt.get("order", 0),
-                                "add_total": opt.get("add_total", 1)
-                            })
-                    item_data["options"] = normalized_opts
-                return item_data
+                return _normalize_full_item(data.get("data") or data)
             else:
                 return None
         except Exception:
@@ -73,6 +66,24 @@ def _fetch_full_item(page, api_url: str, headers: dict, item_id, timeout_ms: int
     return None
 
 
+def _fetch_full_items_many(page, api_url: str, headers: dict, item_ids: list, normalize: bool = True) -> dict:
+    """
+    Vários GET /{id} em paralelo → {id: item normalizado}; falhas ficam de fora.
+    normalize=False devolve o item cru (para checar as opções antes de normalizar).
+    """
+    results = fetch_json_many(
+        page, [f"{api_url}/{item_id}" for item_id in item_ids], headers=headers,
+        concurrency=LIST_CONCURRENCY, timeout_ms=REQUEST_TIMEOUT_MS,
+    )
+    out = {}
+    for item_id, res in zip(item_ids, results):
+        data = res["json"] if res["status"] == 200 and isinstance(res["json"], dict) else None
+        if data is not None:
+            item = data.get("data") or data
+            out[item_id] = _normalize_full_item(item) if normalize else item
+    return out
+
+
 def _build_existing_names(items: list) -> set:
     names = set()
     for item in items:
@@ -0,0 +1,199 @@
+import atexit
+import copy
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from .config import (
+    OPTIONS_CACHE_DIR,
+    OPTIONS_CACHE_DISK_TTL_S,
+    OPTIONS_CACHE_MAX_FIELDS,
+    OPTIONS_CACHE_TTL_S,
+    logger,
+)
+
+
+# ---------------------------------------------------------------------------
+# Cache de opções por campo (LRU + disco)
+# ---------------------------------------------------------------------------
+class OptionsCache:
+    """
+    Opções raspadas por (loja, campo). LRU limitado a `max_entries`, entradas
+    expiram após `ttl_s` e, com `path`, as listas não vazias são salvas ao fim
+    do processo (mescladas com o arquivo, para processos simultâneos não se
+    apagarem). O disco só é lido com load_persisted(), pensado para execuções
+    somente-leitura, e vale por `disk_ttl_s`. Sempre devolve cópias — quem
+    chama pode mutar a lista à vontade.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_s: float, path: str | None = None,
+                 disk_ttl_s: float = OPTIONS_CACHE_DISK_TTL_S):
+        self.name = name
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = ttl_s
+        self.disk_ttl_s = min(disk_ttl_s, ttl_s)
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._entries: OrderedDict = OrderedDict()  # chave → (gravado_em, opções)
+        self._invalidated: set = set()  # chaves alteradas aqui (não voltam do arquivo)
+        self._lock = threading.Lock()
+        self._dirty = False
+        if path:
+            atexit.register(self.save)
+
+    @staticmethod
+    def _key(base_url: str, field_id) -> str:
+        return f"{(base_url or '').rstrip('/')}|{field_id}"
+
+    # ------------------------------------------------------------------ acesso
+    def get(self, base_url: str, field_id) -> list | None:
+        key = self._key(base_url, field_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl_s:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return copy.deepcopy(entry[1])
+
+    def stored_at(self, base_url: str, field_id) -> float | None:
+        """Quando a lista do campo foi raspada (None se não estiver no cache)."""
+        with self._lock:
+            entry = self._entries.get(self._key(base_url, field_id))
+            return entry[0] if entry is not None else None
+
+    def put(self, base_url: str, field_id, options: list) -> None:
+        key = self._key(base_url, field_id)
+        with self._lock:
+            self._invalidated.discard(key)
+            self._entries[key] = (time.time(), copy.deepcopy(list(options or [])))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+            self._dirty = True
+
+    def invalidate(self, base_url: str, field_id) -> None:
+        with self._lock:
+            key = self._key(base_url, field_id)
+            self._invalidated.add(key)
+            self._dirty = True
+            if self._entries.pop(key, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def __contains__(self, key) -> bool:
+        base_url, field_id = key
+        with self._lock:
+            return self._key(base_url, field_id) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------ disco
+    def _read_file(self) -> dict:
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("entries") or {}
+        except (json.JSONDecodeError, OSError, AttributeError) as e:
+            logger.warning(f"Cache de opções '{self.name}' ilegível ({self.path}): {e}")
+            return {}
+
+    def load_persisted(self) -> int:
+        """
+        Carrega do disco as listas gravadas há menos de `disk_ttl_s` (só execuções
+        somente-leitura); campos invalidados neste processo nunca voltam do arquivo.
+        """
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for key, (saved_at, options) in self._read_file().items():
+                # invalidada aqui = alterada por esta execução: a lista do arquivo é a de antes
+                if key in self._entries or key in self._invalidated or not options \
+                        or now - float(saved_at) > self.disk_ttl_s:
+                    continue
+                self._entries[key] = (float(saved_at), options)
+                loaded += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.debug(f"Cache de opções '{self.name}': {loaded} campos carregados do disco")
+        return loaded
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            mine = {k: [t, opts] for k, (t, opts) in self._entries.items() if opts}
+            invalidated = set(self._invalidated)
+            self._dirty = False
+        try:
+            dirpath = os.path.dirname(self.path) or "."
+            os.makedirs(dirpath, exist_ok=True)
+            # mescla com o que outro processo gravou: a entrada mais nova vence,
+            # e o que este processo alterou/invalidou não volta
+            now = time.time()
+            merged = {
+                k: v for k, v in self._read_file().items()
+                if k not in invalidated and v[1] and now - float(v[0]) <= self.disk_ttl_s
+            }
+            for k, v in mine.items():
+                if k not in merged or float(merged[k][0]) <= v[0]:
+                    merged[k] = v
+            fd, tmp = tempfile.mkstemp(prefix="tmp_opts_", dir=dirpath)
+            os.close(fd)
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"entries": merged}, f, ensure_ascii=False)
+                shutil.move(tmp, self.path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        except Exception as e:
+            logger.warning(f"Erro ao salvar cache de opções '{self.name}': {e}")
+
+
+def _cache_path(name: str) -> str | None:
+    return os.path.join(OPTIONS_CACHE_DIR, f"additional_info_{name}.json") if OPTIONS_CACHE_DIR else None
+
+
+# opções normalizadas (value/price/order) e opções com option_id (edição/exclusão)
+options_cache = OptionsCache("options", OPTIONS_CACHE_MAX_FIELDS, OPTIONS_CACHE_TTL_S, _cache_path("options"))
+options_with_ids_cache = OptionsCache("options_ids", OPTIONS_CACHE_MAX_FIELDS, OPTIONS_CACHE_TTL_S, _cache_path("options_ids"))
+
+
+# campos alterados nesta execução, por loja (o relatório só re-raspa estes)
+_TOUCHED: dict = {}
+_TOUCHED_LOCK = threading.Lock()
+
+
+def invalidate_field(base_url: str, field_id) -> None:
+    """Campo alterado (opção criada/editada/excluída) → descarta as duas visões."""
+    options_cache.invalidate(base_url, field_id)
+    options_with_ids_cache.invalidate(base_url, field_id)
+    with _TOUCHED_LOCK:
+        _TOUCHED.setdefault((base_url or "").rstrip("/"), set()).add(str(field_id))
+
+
+def touched_fields(base_url: str) -> set:
+    with _TOUCHED_LOCK:
+        return set(_TOUCHED.get((base_url or "").rstrip("/"), ()))
+
+
+def cache_stats() -> dict:
+    return {"options": dict(options_cache.stats), "options_ids": dict(options_with_ids_cache.stats)}
@@ -2,16 +2,39 @@ import logging
 
 logger = logging.getLogger("additional_info")
 
-# ====================== CACHE GLOBAL TURBO ======================
-_options_cache: dict = {}
-_options_with_ids_cache: dict = {}
+# ====================== CACHE DE OPÇÕES ======================
+# LRU por (loja, campo) em memória; salvo em disco ao fim do processo, mas o
+# disco só é lido por execuções somente-leitura (relatório) — o sync nunca
+# decide criar/pular opção com base em lista de outro processo
+OPTIONS_CACHE_MAX_FIELDS = 2000
+OPTIONS_CACHE_TTL_S = 6 * 3600
+OPTIONS_CACHE_DISK_TTL_S = 15 * 60  # validade das entradas lidas do disco
+OPTIONS_CACHE_DIR = "produtos"  # "" desliga a persistência
+
+# ====================== RELATÓRIO DO DESTINO ======================
+# registros vão para o stream (JSONL) conforme ficam prontos; o JSON final é
+# montado no fim e serve de base para o próximo relatório incremental
+REPORT_FILE = "produtos/destino_report.json"
+REPORT_STREAM_FILE = "produtos/destino_report.jsonl"
+# opções de um registro anterior só são reaproveitadas até esta idade (a partir
+# do scrape original); a API não avisa quando só as opções mudam
+REPORT_REUSE_MAX_AGE_S = OPTIONS_CACHE_TTL_S
 
 # Ajustes operacionais
 REQUEST_TIMEOUT_MS = 10000
 FETCH_RETRIES = 2
 CREATE_RETRIES = 2
+CREATE_BATCH_SIZE = 20  # itens criados sem id resolvidos com UMA releitura do catálogo
 PATCH_TEST_LIMIT = 0
 PATCH_LIMIT = 999
+LIST_PAGE_SIZE = 250  # tamanho sondado nas listagens (o servidor pode recusar/limitar)
+LIST_CONCURRENCY = 4
+CLEANUP_SCAN_CONCURRENCY = 4  # leituras simultâneas das páginas de opções na limpeza
+FORM_CHARSET = "cp1252"  # charset das páginas PHP do admin (o browser envia os forms assim)
+FORM_POST_CONCURRENCY = 4
+# True: só imprime o plano de opções (criar/editar/excluir) e os campos que
+# seriam criados, sem enviar nada (nem campo novo sem as opções)
+OPTIONS_DRY_RUN = False
 
 # ---------------------------------------------------------------------------
 # Headers falsos que o HTML da Tray inclui como linhas da tabela
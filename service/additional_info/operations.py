@@ -1,141 +1,159 @@
-from .config import logger, _options_cache, _options_with_ids_cache
+from .cache import invalidate_field, options_with_ids_cache
+from .config import CLEANUP_SCAN_CONCURRENCY, logger
 from .utils import _normalize_option_key, _is_fake_header
 from .api import _fetch_all_items, _build_existing_names
-from .scraper import _fetch_options_with_ids_from_html, _fetch_options_from_html
-from .php_forms import _delete_option_via_php, _create_option_via_php, _edit_option_via_php, _edit_option_via_ui_form
+from .scraper import _fetch_options_with_ids_from_html, _fetch_options_from_html, _prefetch_options_with_ids
+from .php_forms import _delete_options_via_php_many, _edit_option_via_ui_form, _save_options_via_php_many
 
 
-def _is_option_value_persisted(page, base_url: str, field_id: int, option_id: int, expected_value: str) -> bool:
-    _options_with_ids_cache.pop(field_id, None)
+def _read_field_options(page, base_url: str, field_id) -> dict:
+    """Uma leitura fresca do campo → {option_id: valor} (verificação em lote)."""
+    options_with_ids_cache.invalidate(base_url, field_id)
     fresh = _fetch_options_with_ids_from_html(page, field_id, base_url)
-    for opt in fresh:
-        if str(opt.get("option_id")) == str(option_id):
-            current = (opt.get("value") or "").strip()
-            return current == (expected_value or "").strip()
-    return False
-
-
-def _has_option_value(page, base_url: str, field_id: int, expected_value: str) -> bool:
-    _options_with_ids_cache.pop(field_id, None)
-    fresh = _fetch_options_with_ids_from_html(page, field_id, base_url)
-    target = (expected_value or "").strip()
-    return any((opt.get("value") or "").strip() == target for opt in fresh)
+    return {str(opt.get("option_id")): (opt.get("value") or "").strip() for opt in fresh}
+
+
+def _plan_field_cleanup(raw_options: list) -> tuple[list, list]:
+    """Opções do campo → (ids de duplicatas a excluir, opções mojibake a editar)."""
+    # ---- Passo 1: agrupar por nome normalizado para detectar duplicatas ----
+    by_normalized = {}
+    for opt in raw_options:
+        key = opt["value_fixed"].strip().lower()
+        by_normalized.setdefault(key, []).append(opt)
+
+    to_delete_ids = []
+
+    # Duplicatas: manter a mais correta, deletar o resto
+    for group in by_normalized.values():
+        if len(group) > 1:
+            # Prioriza: value == value_fixed (sem mojibake) → fica; resto → deleta
+            group.sort(key=lambda x: 10 if x["value"] == x["value_fixed"] else 0, reverse=True)
+            for dupe in group[1:]:
+                if dupe.get("option_id"):
+                    to_delete_ids.append(dupe["option_id"])
+
+    # ---- Passo 2: detectar entradas mojibake solitárias ----
+    # São opções onde value != value_fixed e não existe outra com o mesmo value_fixed
+    mojibake_solo = [
+        opt for opt in raw_options
+        if opt["value"] != opt["value_fixed"]
+        and len(by_normalized.get(opt["value_fixed"].strip().lower(), [])) == 1
+        and opt.get("option_id") not in to_delete_ids
+    ]
+    return to_delete_ids, mojibake_solo
+
+
+def _apply_field_plan(page, base_url: str, entry: dict) -> tuple[int, int]:
+    """
+    Executa as ações de UM campo e verifica com uma leitura por rodada
+    (não uma por opção). Rodadas extras só para as edições que não pegaram:
+    formulário da UI e, por último, criar o nome certo + excluir o antigo.
+    Retorna (duplicatas removidas, mojibakes corrigidos).
+    """
+    field_id = entry["field_id"]
+
+    for ok in _delete_options_via_php_many(page, base_url, entry["delete_ids"]):
+        print("✓" if ok else "✗", end="")
+
+    edits = []
+    for opt in entry["mojibake"]:
+        if opt.get("option_id"):
+            edits.append(opt)
+        else:
+            print(f"\n   mojibake '{opt['value']}' → sem id (skip)", end="")
+
+    for opt in edits:
+        print(f"\n   mojibake '{opt['value']}' → '{opt['value_fixed']}'", end=" ")
+    _save_options_via_php_many(page, base_url, field_id, [
+        (opt["option_id"], {"value": opt["value_fixed"], "price": opt.get("price", "0.00")})
+        for opt in edits
+    ])
+
+    current = _read_field_options(page, base_url, field_id)
+    deleted = sum(1 for opt_id in entry["delete_ids"] if str(opt_id) not in current)
+
+    def _not_persisted(opts):
+        return [o for o in opts if current.get(str(o["option_id"])) != o["value_fixed"].strip()]
+
+    pending = _not_persisted(edits)
+    if pending:
+        print(f"\n   ↻ fallback-form ({len(pending)})", end="")
+        for opt in pending:
+            _edit_option_via_ui_form(page, base_url, field_id, opt["option_id"], {
+                "value": opt["value_fixed"],
+                "price": opt.get("price", "0.00"),
+            })
+        current = _read_field_options(page, base_url, field_id)
+        pending = _not_persisted(pending)
+
+    if pending:
+        print(f"\n   ↻ create+delete ({len(pending)})", end="")
+        _save_options_via_php_many(page, base_url, field_id, [
+            (0, {"value": opt["value_fixed"], "price": opt.get("price", "0.00")})
+            for opt in pending
+        ])
+        values = set(_read_field_options(page, base_url, field_id).values())
+        created = [o for o in pending if o["value_fixed"].strip() in values]
+        _delete_options_via_php_many(page, base_url, [opt["option_id"] for opt in created])
+        if created:
+            current = _read_field_options(page, base_url, field_id)
+        pending = [o for o in pending if o not in created or str(o["option_id"]) in current]
+
+    invalidate_field(base_url, field_id)
+    return deleted, len(edits) - len(pending)
 
 
 # ---------------------------------------------------------------------------
 # LIMPEZA TURBO
 # ---------------------------------------------------------------------------
 def cleanup_destination_selects(page, api_url: str, headers: dict, base_url: str):
+    """
+    Duas fases: varredura (todas as opções lidas de uma vez, com concorrência
+    limitada, montando o plano completo) e ações agrupadas por campo, com
+    verificação em lote depois de cada rodada.
+    """
     print("\n🧹 LIMPEZA TURBO INICIADA — vai voar agora!")
     all_items = _fetch_all_items(page, api_url, headers)
     selects = [item for item in all_items if item.get("type") == "select"]
     print(f"{len(selects)} selects para verificar\n")
 
-    total_deleted = 0
-    total_fixed = 0
-
+    # ---- FASE 1: varredura ----
+    _prefetch_options_with_ids(
+        page, [item.get("id") for item in selects if item.get("id")], base_url, CLEANUP_SCAN_CONCURRENCY,
+    )
+    plan = []
     for idx, item in enumerate(selects, 1):
         field_id = item.get("id")
         name = item.get("custom_name") or item.get("name") or "?"
-        print(f"[{idx:03d}/{len(selects)}] {name} → verificando...", end=" ")
-
         raw_options = _fetch_options_with_ids_from_html(page, field_id, base_url)
-
-        if not raw_options:
-            print("OK")
-            continue
-
-        # ---- Passo 1: agrupar por nome normalizado para detectar duplicatas ----
-        by_normalized = {}
-        for opt in raw_options:
-            key = opt["value_fixed"].strip().lower()
-            by_normalized.setdefault(key, []).append(opt)
-
-        to_delete_ids = []
-
-        # Duplicatas: manter a mais correta, deletar o resto
-        for group in by_normalized.values():
-            if len(group) > 1:
-                # Prioriza: value == value_fixed (sem mojibake) → fica; resto → deleta
-                group.sort(key=lambda x: 10 if x["value"] == x["value_fixed"] else 0, reverse=True)
-                for dupe in group[1:]:
-                    if dupe.get("option_id"):
-                        to_delete_ids.append(dupe["option_id"])
-
-        # ---- Passo 2: detectar entradas mojibake solitárias ----
-        # São opções onde value != value_fixed e não existe outra com o mesmo value_fixed
-        mojibake_solo = [
-            opt for opt in raw_options
-            if opt["value"] != opt["value_fixed"]
-            and len(by_normalized.get(opt["value_fixed"].strip().lower(), [])) == 1
-            and opt.get("option_id") not in to_delete_ids
-        ]
-
-        actions = []
-        if to_delete_ids:
-            actions.append(f"{len(to_delete_ids)} duplicatas")
-        if mojibake_solo:
-            actions.append(f"{len(mojibake_solo)} mojibake")
+        to_delete_ids, mojibake_solo = _plan_field_cleanup(raw_options) if raw_options else ([], [])
 
         if not to_delete_ids and not mojibake_solo:
-            print("OK (sem lixo)")
+            print(f"[{idx:03d}/{len(selects)}] {name} → OK")
             continue
-
-        print(f"→ corrigindo: {', '.join(actions)}...")
-
-        # Deletar duplicatas
-        for opt_id in to_delete_ids:
-            if _delete_option_via_php(page, base_url, field_id, opt_id):
-                total_deleted += 1
-                print("✓", end="")
-            else:
-                print("✗", end="")
-
-        # Corrigir mojibake: editar a opção existente com o nome correto (mesmo endpoint, id_opcao real)
-        for opt in mojibake_solo:
-            correct_name = opt["value_fixed"]
-            opt_id = opt.get("option_id")
-            print(f"\n   mojibake '{opt['value']}' → '{correct_name}'", end=" ")
-            if not opt_id:
-                print("✗ sem id (skip)", end="")
-                continue
-            edited = _edit_option_via_php(page, base_url, field_id, opt_id, {
-                "value": correct_name,
-                "price": opt.get("price", "0.00"),
-            })
-            persisted = edited and _is_option_value_persisted(page, base_url, field_id, opt_id, correct_name)
-
-            if not persisted:
-                print("↻ fallback-form", end="")
-                fallback_ok = _edit_option_via_ui_form(page, base_url, field_id, opt_id, {
-                    "value": correct_name,
-                    "price": opt.get("price", "0.00"),
-                })
-                persisted = fallback_ok and _is_option_value_persisted(page, base_url, field_id, opt_id, correct_name)
-
-            if not persisted:
-                print("↻ create+delete", end="")
-                created = _create_option_via_php(page, base_url, field_id, {
-                    "value": correct_name,
-                    "price": opt.get("price", "0.00"),
-                })
-                created_ok = created and _has_option_value(page, base_url, field_id, correct_name)
-                if created_ok:
-                    deleted_old = _delete_option_via_php(page, base_url, field_id, opt_id)
-                    old_gone = not _is_option_value_persisted(page, base_url, field_id, opt_id, opt.get("value", ""))
-                    persisted = deleted_old and old_gone
-
-            if persisted:
-                total_fixed += 1
-                print("✓ editado", end="")
-            else:
-                print("✗ não persistiu", end="")
-
-        # Invalida cache
-        _options_cache.pop(field_id, None)
-        _options_with_ids_cache.pop(field_id, None)
-
-        print("")
+        print(f"[{idx:03d}/{len(selects)}] {name} → {len(to_delete_ids)} duplicatas, {len(mojibake_solo)} mojibake")
+        plan.append({
+            "field_id": field_id,
+            "name": name,
+            "delete_ids": to_delete_ids,
+            "mojibake": mojibake_solo,
+        })
+
+    print(
+        f"\nPlano: {len(plan)} campos | "
+        f"{sum(len(e['delete_ids']) for e in plan)} duplicatas | "
+        f"{sum(len(e['mojibake']) for e in plan)} mojibake\n"
+    )
+
+    # ---- FASE 2: ações agrupadas por campo ----
+    total_deleted = 0
+    total_fixed = 0
+    for idx, entry in enumerate(plan, 1):
+        print(f"[{idx:03d}/{len(plan)}] {entry['name']} → corrigindo...", end=" ")
+        deleted, fixed = _apply_field_plan(page, base_url, entry)
+        total_deleted += deleted
+        total_fixed += fixed
+        print(f"\n   {deleted}/{len(entry['delete_ids'])} duplicatas removidas | {fixed}/{len(entry['mojibake'])} mojibake corrigidos")
 
     print(f"\n✅ LIMPEZA TURBO CONCLUÍDA! {total_deleted} duplicatas removidas | {total_fixed} mojibakes corrigidos")
     return {"dupes_deleted": total_deleted, "mojibake_fixed": total_fixed}
@@ -0,0 +1,149 @@
+import re
+
+from .cache import invalidate_field
+from .config import CLEANUP_SCAN_CONCURRENCY, OPTIONS_DRY_RUN, logger
+from .php_forms import _delete_options_via_php_many, _save_options_via_php_many
+from .scraper import _fetch_options_with_ids_from_html, _prefetch_options_with_ids
+from .utils import _is_fake_header, _normalize_option_key
+
+
+# ---------------------------------------------------------------------------
+# Diff de opções (conjuntos por chave canônica)
+# ---------------------------------------------------------------------------
+def _price(value) -> str:
+    clean = re.sub(r"[^\d.,]", "", str(value or "")).replace(",", ".")
+    try:
+        return f"{float(clean):.2f}"
+    except ValueError:
+        return "0.00"
+
+
+def _dedupe_desired(desired_options: list) -> dict:
+    """Opções desejadas → {chave canônica: {value, price}} (primeira vence)."""
+    out = {}
+    for opt in desired_options or []:
+        key = _normalize_option_key(opt)
+        if not key or _is_fake_header(key) or key in out:
+            continue
+        out[key] = {
+            "value": (opt.get("value") or opt.get("label") or "").strip(),
+            "price": _price(opt.get("price")),
+        }
+    return out
+
+
+def plan_field(field_id, name: str, current: list, desired_options: list, dedupe: bool = False) -> dict:
+    """
+    Plano de UM campo a partir das opções atuais (com option_id) e desejadas:
+      creates — chaves desejadas que o campo não tem
+      edits   — só correções: texto com mojibake ou preço diferente (preço
+                0.00 desejado não sobrescreve preço existente: é o default de
+                fonte sem preço). Diferença só de caixa/espaços fica como está.
+      deletes — cópias extras da mesma chave, só com dedupe=True (limpeza)
+    Opções que só existem no campo ficam como estão.
+    """
+    desired = _dedupe_desired(desired_options)
+
+    by_key = {}
+    for opt in current or []:
+        key = _normalize_option_key({"value": opt.get("value_fixed") or opt.get("value")})
+        if key:
+            by_key.setdefault(key, []).append(opt)
+
+    creates, edits, deletes = [], [], []
+    skipped = 0
+    for key, group in by_key.items():
+        # fica a cópia sem mojibake; o resto sai (se pedido)
+        group.sort(key=lambda o: 0 if o.get("value") == o.get("value_fixed") else 1)
+        if dedupe:
+            deletes.extend(o["option_id"] for o in group[1:] if o.get("option_id"))
+
+    for key, want in desired.items():
+        group = by_key.get(key)
+        if not group:
+            creates.append(want)
+            continue
+        keep = group[0]
+        price = want["price"]
+        if price == "0.00" and _price(keep.get("price")) != "0.00":
+            price = _price(keep.get("price"))
+        mojibake = bool(keep.get("value_fixed")) and keep.get("value") != keep.get("value_fixed")
+        if keep.get("option_id") and (mojibake or _price(keep.get("price")) != price):
+            value = want["value"] if mojibake else keep.get("value")
+            edits.append((keep["option_id"], {"value": value, "price": price}))
+        else:
+            skipped += 1
+
+    return {
+        "field_id": field_id,
+        "name": name,
+        "creates": creates,
+        "edits": edits,
+        "deletes": deletes,
+        "skipped": skipped,
+    }
+
+
+def build_plan(page, base_url: str, targets: list, concurrency: int = CLEANUP_SCAN_CONCURRENCY,
+               dedupe: bool = False) -> list:
+    """
+    targets = [(field_id, nome, opções desejadas)]. Lê as opções atuais de
+    todos os campos de uma vez e devolve só os planos com alguma ação.
+    """
+    targets = [t for t in targets if t[0]]
+    _prefetch_options_with_ids(page, [t[0] for t in targets], base_url, concurrency)
+    plan = []
+    for field_id, name, desired_options in targets:
+        current = _fetch_options_with_ids_from_html(page, field_id, base_url)
+        entry = plan_field(field_id, name, current, desired_options, dedupe)
+        if entry["creates"] or entry["edits"] or entry["deletes"]:
+            plan.append(entry)
+    return plan
+
+
+def summarize_plan(plan: list, title: str = "PLANO DE OPÇÕES") -> dict:
+    totals = {
+        "fields": len(plan),
+        "creates": sum(len(e["creates"]) for e in plan),
+        "edits": sum(len(e["edits"]) for e in plan),
+        "deletes": sum(len(e["deletes"]) for e in plan),
+    }
+    print(f"\n{title}: {totals['fields']} campos | +{totals['creates']} criar | "
+          f"~{totals['edits']} editar | -{totals['deletes']} excluir")
+    for e in plan:
+        print(f"   id={e['field_id']} '{e['name']}': +{len(e['creates'])} ~{len(e['edits'])} -{len(e['deletes'])}")
+    return totals
+
+
+def execute_plan(page, base_url: str, plan: list, dry_run: bool = OPTIONS_DRY_RUN) -> dict:
+    """
+    Executa campo a campo: criações + edições num lote de POSTs concorrentes,
+    depois as exclusões. Retorna {field_id: {created, edited, deleted, errors}}.
+    """
+    results = {}
+    if dry_run:
+        print("   (dry-run: nada foi enviado)")
+        return results
+
+    for e in plan:
+        field_id = e["field_id"]
+        saves = [(0, opt) for opt in e["creates"]] + list(e["edits"])
+        saved = _save_options_via_php_many(page, base_url, field_id, saves)
+        deleted = _delete_options_via_php_many(page, base_url, e["deletes"])
+
+        errors = [
+            {"option": opt, "error": "Falha na criação via PHP" if option_id == 0 else f"Falha na edição da opção {option_id}"}
+            for (option_id, opt), ok in zip(saves, saved) if not ok
+        ]
+        errors.extend({"option_id": oid, "error": "Falha na exclusão via PHP"} for oid, ok in zip(e["deletes"], deleted) if not ok)
+
+        n_creates = len(e["creates"])
+        results[field_id] = {
+            "created": sum(saved[:n_creates]),
+            "edited": sum(saved[n_creates:]),
+            "deleted": sum(deleted),
+            "errors": errors,
+        }
+        invalidate_field(base_url, field_id)
+        logger.debug(f"Opções id={field_id}: {results[field_id]}")
+    return results
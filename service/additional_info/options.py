@@ -1,38 +1,35 @@
-import time
-import random
-
-from .config import _options_cache
-from .utils import _normalize_option_key, _is_fake_header
-from .scraper import _fetch_options_from_html
-from .php_forms import _create_option_via_php
+from .option_diff import build_plan, execute_plan, plan_field, summarize_plan
+from .scraper import _fetch_options_with_ids_from_html
 
 
 def _ensure_options_for_field(page, base_url: str, field_id, desired_options: list) -> tuple[int, int, list]:
-    created_total = 0
-    skipped = 0
-    errors = []
-
-    existing = _fetch_options_from_html(page, field_id, base_url)
-    existing_keys = set(_normalize_option_key(o) for o in existing)
-
-    to_create = []
-    for opt in desired_options:
-        key = _normalize_option_key(opt)
-        if not key or _is_fake_header(key) or key in existing_keys:
-            skipped += 1
-            continue
-        to_create.append(opt)
-
-    for opt in to_create:
-        success = _create_option_via_php(page, base_url, field_id, opt)
-        if success:
-            created_total += 1
-        else:
-            errors.append({"option": opt, "error": "Falha na criação via PHP"})
-        time.sleep(random.uniform(0.25, 0.45))
-
-    if created_total:
-        # Invalida cache para refletir as novas opções criadas
-        _options_cache.pop(field_id, None)
-
-    return created_total, skipped, errors
+    """
+    Um campo pelo motor de diff: cria o que falta e corrige só mojibake/preço
+    das existentes (sem excluir nada). Retorna (criadas, já existentes, erros).
+    """
+    current = _fetch_options_with_ids_from_html(page, field_id, base_url)
+    entry = plan_field(field_id, "", current, desired_options)
+    if not (entry["creates"] or entry["edits"] or entry["deletes"]):
+        return 0, entry["skipped"], []
+
+    result = execute_plan(page, base_url, [entry]).get(field_id) or {"created": 0, "errors": []}
+    return result["created"], entry["skipped"], result["errors"]
+
+
+def _sync_options_for_fields(page, base_url: str, targets: list, title: str) -> dict:
+    """
+    Vários campos de uma vez: plano completo (com resumo/dry-run) e execução.
+    targets = [(field_id, nome, opções desejadas)]. Retorna os totais executados.
+    """
+    plan = build_plan(page, base_url, targets)
+    summarize_plan(plan, title)
+    results = execute_plan(page, base_url, plan)
+
+    totals = {"created": 0, "edited": 0, "deleted": 0, "errors": []}
+    names = {e["field_id"]: e["name"] for e in plan}
+    for field_id, res in results.items():
+        totals["created"] += res["created"]
+        totals["edited"] += res["edited"]
+        totals["deleted"] += res["deleted"]
+        totals["errors"].extend({"name": names.get(field_id), "field_id": field_id, "detail": err} for err in res["errors"])
+    return totals
@@ -1,11 +1,18 @@
 import json
 import time
+import uuid
+from urllib.parse import urlparse
 
-from .config import REQUEST_TIMEOUT_MS, CREATE_RETRIES, logger
+from service.page_fetch import fetch_many
+
+from .cache import options_with_ids_cache
+from .config import REQUEST_TIMEOUT_MS, CREATE_RETRIES, FORM_CHARSET, FORM_POST_CONCURRENCY, logger
+from .scraper import _decode_html, _fetch_options_with_ids_from_html
+from .utils import _normalize_option_key
 
 
 # ---------------------------------------------------------------------------
-# Helper: POST via submit nativo de FORM no browser (preserva charset da página)
+# Fallback: POST via submit nativo de FORM no browser (preserva charset da página)
 # ---------------------------------------------------------------------------
 def _browser_post(page, url: str, form_data: dict, timeout_ms: int = REQUEST_TIMEOUT_MS) -> tuple[int, str]:
     """
@@ -101,6 +108,96 @@ def _browser_post(page, url: str, form_data: dict, timeout_ms: int = REQUEST_TIM
         return 0, str(e)
 
 
+# ---------------------------------------------------------------------------
+# POST direto: multipart montado aqui, no charset da página, via page.request
+# ---------------------------------------------------------------------------
+def _encode_multipart(form_data: dict, charset: str = FORM_CHARSET) -> tuple[bytes, str]:
+    """
+    Mesmo corpo que o submit do browser gera com accept-charset=windows-1252:
+    caracteres fora do charset viram &#NNNN; e `imagem` vai como arquivo vazio.
+    """
+    boundary = f"----TrayFormBoundary{uuid.uuid4().hex}"
+    parts = []
+    for name, value in form_data.items():
+        if name == "imagem":
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="imagem"; filename=""\r\n'
+                f"Content-Type: application/octet-stream\r\n\r\n".encode("ascii") + b"\r\n"
+            )
+            continue
+        header = f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+        text = "" if value is None else str(value)
+        parts.append(
+            header.encode(charset, errors="xmlcharrefreplace")
+            + text.encode(charset, errors="xmlcharrefreplace")
+            + b"\r\n"
+        )
+    body = b"".join(parts) + f"--{boundary}--\r\n".encode("ascii")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _form_headers(url: str, content_type: str) -> dict:
+    parsed = urlparse(url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    return {"Content-Type": content_type, "Origin": origin, "Referer": f"{origin}/admin/"}
+
+
+def _session_lost(status: int, final_url: str, body: str) -> bool:
+    """
+    Redirect para login / 401-403: a sessão do request não valeu → usar o iframe.
+    Status 0 (timeout/erro de rede) NÃO conta: o POST pode ter sido gravado e
+    reenviar uma criação duplicaria a opção — quem chamou confirma relendo.
+    """
+    return status in (401, 403) or "login" in (final_url or "").lower() or 'type="password"' in (body or "")
+
+
+def _request_post(page, url: str, form_data: dict, timeout_ms: int = REQUEST_TIMEOUT_MS) -> tuple[int, str, str]:
+    """(status, trecho do corpo, URL final) — sem tocar no DOM."""
+    body, content_type = _encode_multipart(form_data)
+    try:
+        resp = page.request.post(url, data=body, headers=_form_headers(url, content_type), timeout=timeout_ms)
+        text = _decode_html(resp.body(), resp.headers.get("content-type") or "")
+        return resp.status, text[:2000], resp.url
+    except Exception as e:
+        logger.debug("_request_post %s: %s", url, e)
+        return 0, str(e), url
+
+
+def _post_form(page, url: str, form_data: dict, timeout_ms: int = REQUEST_TIMEOUT_MS) -> tuple[int, str]:
+    """POST direto; o iframe (_browser_post) fica só para sessão inválida."""
+    status, body, final_url = _request_post(page, url, form_data, timeout_ms)
+    if _session_lost(status, final_url, body):
+        logger.debug("POST direto falhou (%s) — usando submit via iframe", status)
+        return _browser_post(page, url, form_data, timeout_ms)
+    return status, body[:300]
+
+
+def _post_forms_many(page, posts: list, concurrency: int = FORM_POST_CONCURRENCY, timeout_ms: int = REQUEST_TIMEOUT_MS) -> list:
+    """
+    Vários POSTs [(url, form_data), ...] ao mesmo tempo (fetch concorrente na
+    página, sem DOM). Retorna [(status, corpo)] na mesma ordem; os que
+    perderem a sessão são refeitos um a um pelo caminho com fallback. Status 0
+    nunca é reenviado (no_retry): volta 0 e quem chamou confere o resultado.
+    """
+    specs = []
+    for url, form_data in posts:
+        body, content_type = _encode_multipart(form_data)
+        specs.append({
+            "url": url, "method": "POST", "headers": _form_headers(url, content_type),
+            "body": body, "binary": True, "no_retry": True,
+        })
+    results = fetch_many(page, specs, concurrency=concurrency, timeout_ms=timeout_ms)
+
+    out = []
+    for (url, form_data), res in zip(posts, results):
+        text = _decode_html(res["body"] or b"", res["content_type"]) if res["body"] else res["error"]
+        if _session_lost(res["status"], res["url"], text):
+            out.append(_post_form(page, url, form_data, timeout_ms))
+        else:
+            out.append((res["status"], text[:300]))
+    return out
+
+
 # ---------------------------------------------------------------------------
 # Criação (API JSON e fallback PHP form)
 # ---------------------------------------------------------------------------
@@ -130,27 +227,67 @@ def _try_php_form(page, base_url: str, item: dict) -> tuple[bool, int, str]:
         "ordem": item.get("order", "0"),
     }
     php_url = f"{base_url}/admin/informacao_produto_executar.php?acao=incluir"
-    status, body = _browser_post(page, php_url, form_data)
+    status, body = _post_form(page, php_url, form_data)
     return status in (200, 201, 302), status, body
 
 
 # ---------------------------------------------------------------------------
 # CREATE OPTION
 # ---------------------------------------------------------------------------
-def _create_option_via_php(page, base_url: str, field_id: int, option_data: dict) -> bool:
+def _option_form(base_url: str, field_id, option_id, option_data: dict) -> tuple[str, dict]:
+    """Form de opção: id_opcao=0 cria, id real edita (mesmo endpoint)."""
     url = (
         f"{base_url}/adm/extras/informacao_produto_index.php"
         f"?id={field_id}&aba=opcoes&acao=adicionar"
     )
     form_data = {
         "id": str(field_id),
-        "id_opcao": "0",
+        "id_opcao": str(option_id),
         "exibicao_novo": "1",
         "opcao": option_data.get("value") or option_data.get("label", ""),
         "valor": option_data.get("price", "0.00"),
         "imagem": "",
     }
-    status, body = _browser_post(page, url, form_data)
+    return url, form_data
+
+
+def _option_present(page, base_url: str, field_id, option_data: dict) -> bool:
+    """Relê o campo (sem cache) e diz se a opção já existe — confirma criação sem resposta."""
+    options_with_ids_cache.invalidate(base_url, field_id)
+    key = _normalize_option_key(option_data)
+    for opt in _fetch_options_with_ids_from_html(page, field_id, base_url):
+        if key in (_normalize_option_key(opt), _normalize_option_key({"value": opt.get("value_fixed")})):
+            return True
+    return False
+
+
+def _confirm_creates(page, base_url: str, field_id, pending: list) -> list[bool]:
+    """
+    Criações que voltaram status 0 (sem resposta): relê o campo e só recria a
+    opção que não aparecer. A recriação também não é reenviada em status 0.
+    """
+    confirmed = []
+    for option_data in pending:
+        if _option_present(page, base_url, field_id, option_data):
+            logger.info("Criação sem resposta confirmada na releitura: campo %s, opção %r", field_id, option_data.get("value"))
+            confirmed.append(True)
+            continue
+        url, form_data = _option_form(base_url, field_id, 0, option_data)
+        status, body = _post_form(page, url, form_data)
+        if status == 0 and _option_present(page, base_url, field_id, option_data):
+            status = 200
+        options_with_ids_cache.invalidate(base_url, field_id)
+        if status not in (200, 201, 302):
+            logger.error("Falha ao recriar opção %r do campo %s. Status: %s, Body: %s", option_data.get("value"), field_id, status, body)
+        confirmed.append(status in (200, 201, 302))
+    return confirmed
+
+
+def _create_option_via_php(page, base_url: str, field_id: int, option_data: dict) -> bool:
+    url, form_data = _option_form(base_url, field_id, 0, option_data)
+    status, body = _post_form(page, url, form_data)
+    if status == 0:
+        return _confirm_creates(page, base_url, field_id, [option_data])[0]
     success = status in (200, 201, 302)
     if not success:
         logger.error("Falha ao criar opção. Status: %s, Body: %s", status, body)
@@ -162,19 +299,8 @@ def _create_option_via_php(page, base_url: str, field_id: int, option_data: dict
 # Mesmo endpoint do adicionar, mas com id_opcao = id real (não 0)
 # ---------------------------------------------------------------------------
 def _edit_option_via_php(page, base_url: str, field_id: int, option_id: int, option_data: dict) -> bool:
-    url = (
-        f"{base_url}/adm/extras/informacao_produto_index.php"
-        f"?id={field_id}&aba=opcoes&acao=adicionar"
-    )
-    form_data = {
-        "id": str(field_id),
-        "id_opcao": str(option_id),
-        "exibicao_novo": "1",
-        "opcao": option_data.get("value") or option_data.get("label", ""),
-        "valor": option_data.get("price", "0.00"),
-        "imagem": "",
-    }
-    status, body = _browser_post(page, url, form_data)
+    url, form_data = _option_form(base_url, field_id, option_id, option_data)
+    status, body = _post_form(page, url, form_data)
     success = status in (200, 201, 302)
     if not success:
         logger.error("Falha ao editar opção %s. Status: %s, Body: %s", option_id, status, body)
@@ -253,14 +379,44 @@ def _delete_option_via_php(page, base_url: str, field_id: int, option_id: int) -
     POST para /adm/js/informacoes_adicionais.php via fetch() no browser.
     Cookies da sessão enviados automaticamente.
     """
-    url = f"{base_url}/adm/js/informacoes_adicionais.php"
-    form_data = {
-        "acao": "excluir_opcao",
-        "id_opcao": str(option_id),
-        "imagem": "",
-    }
-    status, body = _browser_post(page, url, form_data)
+    url, form_data = _delete_form(base_url, option_id)
+    status, body = _post_form(page, url, form_data)
     success = status in (200, 201, 302)
     if not success:
         logger.error("Falha ao deletar opção %s. Status: %s, Body: %s", option_id, status, body)
     return success
+
+
+def _delete_form(base_url: str, option_id) -> tuple[str, dict]:
+    url = f"{base_url}/adm/js/informacoes_adicionais.php"
+    return url, {"acao": "excluir_opcao", "id_opcao": str(option_id), "imagem": ""}
+
+
+# ---------------------------------------------------------------------------
+# Em lote (POSTs concorrentes, sem DOM)
+# ---------------------------------------------------------------------------
+def _save_options_via_php_many(page, base_url: str, field_id, items: list) -> list[bool]:
+    """items = [(option_id, option_data)]; option_id 0 cria, id real edita."""
+    posts = [_option_form(base_url, field_id, option_id, data) for option_id, data in items]
+    results = _post_forms_many(page, posts)
+    saved = [status in (200, 201, 302) for status, _ in results]
+
+    # criação sem resposta: confere relendo o campo antes de mandar de novo
+    unanswered = [i for i, ((option_id, _), (status, _)) in enumerate(zip(items, results))
+                  if status == 0 and str(option_id) == "0"]
+    if unanswered:
+        for i, ok in zip(unanswered, _confirm_creates(page, base_url, field_id, [items[i][1] for i in unanswered])):
+            saved[i] = ok
+
+    for i, ((option_id, _), (status, body)) in enumerate(zip(items, results)):
+        if not saved[i] and i not in unanswered:
+            logger.error("Falha ao salvar opção %s do campo %s. Status: %s, Body: %s", option_id, field_id, status, body)
+    return saved
+
+
+def _delete_options_via_php_many(page, base_url: str, option_ids: list) -> list[bool]:
+    results = _post_forms_many(page, [_delete_form(base_url, option_id) for option_id in option_ids])
+    for option_id, (status, body) in zip(option_ids, results):
+        if status not in (200, 201, 302):
+            logger.error("Falha ao deletar opção %s. Status: %s, Body: %s", option_id, status, body)
+    return [status in (200, 201, 302) for status, _ in results]
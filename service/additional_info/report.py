@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from .api import _fetch_all_items
+from .cache import options_cache, touched_fields
+from .config import LIST_CONCURRENCY, REPORT_FILE, REPORT_REUSE_MAX_AGE_S, REPORT_STREAM_FILE, logger
+from .scraper import _fetch_options_from_html, _prefetch_options
+
+# campos do item que, se mudarem, invalidam o registro do relatório anterior
+_FINGERPRINT_FIELDS = (
+    "custom_name", "name", "type", "active", "required", "value",
+    "display_value", "add_total", "order", "max_length", "modified",
+)
+
+
+def _item_fingerprint(item: dict) -> str:
+    projection = {k: item.get(k) for k in _FINGERPRINT_FIELDS}
+    raw = json.dumps(projection, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_previous_records() -> dict:
+    """Registros do relatório anterior por id (só os que têm fingerprint)."""
+    if not os.path.isfile(REPORT_FILE):
+        return {}
+    try:
+        with open(REPORT_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Relatório anterior ilegível ({REPORT_FILE}): {e}")
+        return {}
+    return {
+        str(rec.get("id")): rec
+        for rec in data.get("items") or []
+        if isinstance(rec, dict) and rec.get("fingerprint")
+    }
+
+
+def _write_final_report(stream_path: str, header: dict) -> None:
+    """Junta o cabeçalho (stats) com os registros do stream num JSON único, atômico."""
+    dirpath = os.path.dirname(REPORT_FILE) or "."
+    fd, tmp = tempfile.mkstemp(prefix="tmp_report_", dir=dirpath)
+    os.close(fd)
+    try:
+        with open(tmp, "w", encoding="utf-8") as out, open(stream_path, "r", encoding="utf-8") as src:
+            out.write(json.dumps(header, indent=2, ensure_ascii=False)[:-2])  # sem o "}" final
+            out.write(',\n  "items": [\n')
+            first = True
+            for line in src:
+                line = line.strip()
+                if not line:
+                    continue
+                out.write(("" if first else ",\n") + "    " + line)
+                first = False
+            out.write("\n  ]\n}\n")
+        shutil.move(tmp, REPORT_FILE)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ---------------------------------------------------------------------------
+# Relatório final completo do destino (incremental)
+# ---------------------------------------------------------------------------
+def _generate_destination_report(page, base_url: str, api_url: str, headers: dict, standalone: bool = False):
+    """
+    Relatório incremental: opções vêm do relatório anterior quando o item não
+    mudou, não foi tocado nesta execução e o registro foi raspado há menos de
+    REPORT_REUSE_MAX_AGE_S (scraped_at), senão do cache de opções (o que o
+    sync acabou de raspar) e, só no que faltar, de um scrape em paralelo.
+    Cada registro vai para o stream em disco assim que fica pronto; as
+    estatísticas são calculadas no fim. standalone=True (relatório rodado
+    sozinho, sem sync antes) também aproveita o cache de opções em disco.
+    """
+    print("\n" + "=" * 70)
+    print("RELATÓRIO FINAL DO DESTINO — TODAS AS INFORMAÇÕES ADICIONAIS")
+    print("=" * 70)
+
+    all_items = _fetch_all_items(page, api_url, headers)
+    if not all_items:
+        print("Nenhum item encontrado no destino.")
+        return
+
+    print(f"Total de informações adicionais no destino: {len(all_items)}\n")
+
+    # só rodando sozinho o relatório é somente-leitura: depois de um sync o
+    # arquivo pode ter a lista de antes das alterações desta execução
+    if standalone:
+        options_cache.load_persisted()
+    previous = _load_previous_records()
+    touched = touched_fields(base_url)
+
+    now = time.time()
+
+    def _reusable(item) -> bool:
+        rec = previous.get(str(item.get("id")))
+        if not rec or str(item.get("id")) in touched or rec["fingerprint"] != _item_fingerprint(item):
+            return False
+        # as opções mudam sem mexer no item: registro antigo demais é raspado de novo
+        try:
+            return now - float(rec.get("scraped_at") or 0) <= REPORT_REUSE_MAX_AGE_S
+        except (TypeError, ValueError):
+            return False
+
+    # só o que não dá para reaproveitar nem está no cache vai para a rede
+    to_scrape = [
+        item.get("id") for item in all_items
+        if item.get("type") == "select" and not _reusable(item)
+        and (base_url, item.get("id")) not in options_cache
+    ]
+    if to_scrape:
+        _prefetch_options(page, to_scrape, base_url, LIST_CONCURRENCY)
+
+    by_type = {}
+    active_count = 0
+    required_count = 0
+    selects_com_opcoes = 0
+    selects_sem_opcoes = 0
+    total_opcoes = 0
+    reused = 0
+    report_data = []
+
+    os.makedirs(os.path.dirname(REPORT_STREAM_FILE) or ".", exist_ok=True)
+    with open(REPORT_STREAM_FILE, "w", encoding="utf-8") as stream:
+        for idx, item in enumerate(all_items, 1):
+            item_id = item.get("id")
+            name = item.get("custom_name") or item.get("name") or "?"
+            tipo = item.get("type", "?")
+            active = "Sim" if str(item.get("active", "0")) == "1" else "Não"
+            required = "Sim" if str(item.get("required", "0")) == "1" else "Não"
+            value = item.get("value", "")
+            display_value = item.get("display_value", "0")
+            add_total = item.get("add_total", "1")
+            order = item.get("order", "0")
+            max_length = item.get("max_length", "0")
+
+            by_type[tipo] = by_type.get(tipo, 0) + 1
+            if active == "Sim":
+                active_count += 1
+            if required == "Sim":
+                required_count += 1
+
+            print(f"\n[{idx:03d}] {name}")
+            print(f"      ID: {item_id} | Tipo: {tipo} | Ativo: {active} | Obrigatório: {required}")
+            print(f"      DADOS GERAIS -> value={value} | display_value={display_value} | "
+                  f"add_total={add_total} | order={order} | max_length={max_length}")
+
+            options_info = []
+            scraped_at = now
+            if tipo == "select":
+                if _reusable(item):
+                    options_info = previous[str(item_id)].get("options") or []
+                    scraped_at = float(previous[str(item_id)]["scraped_at"])  # mantém a idade original
+                    reused += 1
+                else:
+                    options_info = [
+                        {"value": opt.get("value", "?"), "price": opt.get("price", "0.00")}
+                        for opt in _fetch_options_from_html(page, item_id, base_url)
+                    ]
+                    # idade real da lista (pode ter vindo do cache, raspada antes)
+                    scraped_at = options_cache.stored_at(base_url, item_id) or now
+                if options_info:
+                    selects_com_opcoes += 1
+                    total_opcoes += len(options_info)
+                    print(f"      VALORES ({len(options_info)} opções):")
+                    for oi, opt in enumerate(options_info, 1):
+                        print(f"         {oi}. {opt['value']} -> R$ {opt['price']}")
+                else:
+                    selects_sem_opcoes += 1
+                    print(f"      VALORES: NENHUMA OPÇÃO (vazio!)")
+            else:
+                print(f"      VALORES: (tipo {tipo} — não usa opções)")
+
+            record = {
+                "id": item_id, "name": name, "type": tipo, "active": active,
+                "required": required, "value": value, "display_value": display_value,
+                "add_total": add_total, "order": order, "max_length": max_length,
+                "options": options_info, "options_count": len(options_info),
+                "fingerprint": _item_fingerprint(item), "scraped_at": scraped_at,
+            }
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            stream.flush()
+            report_data.append(record)
+
+    print("\n" + "=" * 70)
+    print("RESUMO FINAL DO DESTINO:")
+    print(f"   Total informações adicionais: {len(all_items)}")
+    print(f"   Ativos / obrigatórios:         {active_count} / {required_count}")
+    print(f"   Por tipo:                      " + ", ".join(
+        f"{t}={n}" for t, n in sorted(by_type.items(), key=lambda x: -x[1])))
+    print(f"   Selects COM opções:           {selects_com_opcoes}")
+    print(f"   Selects SEM opções (vazios!):  {selects_sem_opcoes}")
+    print(f"   Total de opções somadas:       {total_opcoes}")
+    print(f"   Outros tipos (text/textarea):  {len(all_items) - selects_com_opcoes - selects_sem_opcoes}")
+    stats = options_cache.stats
+    print(f"   Cache de opções:               {stats['hits']} hits / {stats['misses']} misses")
+    print(f"   Reaproveitados do relatório:   {reused} | raspados agora: {len(to_scrape)}")
+    print("=" * 70)
+
+    try:
+        _write_final_report(REPORT_STREAM_FILE, {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "total_items": len(all_items),
+            "stats": {
+                "by_type": by_type, "active": active_count, "required": required_count,
+                "selects_com_opcoes": selects_com_opcoes, "selects_sem_opcoes": selects_sem_opcoes,
+                "total_opcoes": total_opcoes,
+            },
+        })
+        print(f"Relatório salvo em: {REPORT_FILE}")
+    except Exception as e:
+        print(f"Erro ao salvar relatório: {e}")
+
+    return report_data
@@ -1,6 +1,10 @@
 import re
+from html.parser import HTMLParser
 
-from .config import _options_cache, _options_with_ids_cache, logger
+from service.page_fetch import fetch_many
+
+from .cache import options_cache, options_with_ids_cache
+from .config import REQUEST_TIMEOUT_MS, logger
 from .utils import _fix_mojibake, _is_fake_header
 
 
@@ -52,14 +56,171 @@ _JS_EXTRACT_OPTIONS = """
 """
 
 
+# ---------------------------------------------------------------------------
+# Mesma extração em Python, sobre o HTML baixado via HTTP (sem renderizar)
+# ---------------------------------------------------------------------------
+_RE_HREF_OPTION_ID = re.compile(r"id_opcao=(\d+)")
+_RE_ONCLICK_EXCLUIR = re.compile(r"excluir\w*\((\d+)")
+_RE_ONCLICK_OPTION_ID = re.compile(r"id_opcao[\s\"':=]+(\d+)")
+_RE_META_CHARSET = re.compile(rb"<meta[^>]+charset=[\"']?\s*([\w-]+)", re.I)
+_ONCLICK_TAGS = {"a", "button", "span", "i", "img"}
+
+
+class _OptionsTableParser(HTMLParser):
+    """
+    Linhas de `table tbody tr` → [{value, price, option_id}] (igual ao _JS_EXTRACT_OPTIONS).
+    Sem <tbody> explícito o browser insere um, então todo <tr> de tabela fora
+    de thead/tfoot conta como linha do corpo.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.saw_table = False
+        self.login = False
+        self.data_rows = 0  # <tr> do corpo com células <td> (parseadas ou não)
+        self._table = 0
+        self._head = 0  # dentro de thead/tfoot
+        self._row = None  # {"cells": [[texto...]], "href_id", "onclick_id"}
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        attr = {k.lower(): (v or "") for k, v in attrs}
+        if tag == "table":
+            self.saw_table = True
+            self._table += 1
+        elif tag == "input" and attr.get("type", "").lower() == "password":
+            self.login = True
+        elif tag in ("thead", "tfoot"):
+            self._head += 1
+        elif tag == "tr" and self._table and not self._head:
+            if self._row is not None:
+                self._finish_row()  # </tr> omitido
+            self._row = {"cells": [], "href_id": None, "onclick_id": None}
+        elif self._row is not None:
+            if tag == "td":
+                self._cell = []
+                self._row["cells"].append(self._cell)
+            elif tag == "br" and self._cell is not None:
+                self._cell.append("\n")
+            if tag == "a" and self._row["href_id"] is None:
+                m = _RE_HREF_OPTION_ID.search(attr.get("href", ""))
+                if m:
+                    self._row["href_id"] = int(m.group(1))
+            if tag in _ONCLICK_TAGS and self._row["onclick_id"] is None:
+                onclick = attr.get("onclick", "")
+                m = _RE_ONCLICK_EXCLUIR.search(onclick) or _RE_ONCLICK_OPTION_ID.search(onclick)
+                if m:
+                    self._row["onclick_id"] = int(m.group(1))
+
+    def handle_endtag(self, tag):
+        if tag == "td":
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self._finish_row()
+        elif tag in ("thead", "tfoot") and self._head:
+            self._head -= 1
+        elif tag == "table" and self._table:
+            if self._row is not None:
+                self._finish_row()
+            self._table -= 1
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def _finish_row(self):
+        row, self._row, self._cell = self._row, None, None
+        cells = [" ".join("".join(c).split()) for c in row["cells"]]
+        if cells:
+            self.data_rows += 1
+        if len(cells) < 2:
+            return
+        name, price = cells[0], cells[1]
+        if not name or name.lower() in ("sem imagem", "nenhuma"):
+            return
+        self.rows.append({
+            "value": name,
+            "price": price,
+            "option_id": row["href_id"] or row["onclick_id"],
+        })
+
+
+def _decode_html(body: bytes, content_type: str) -> str:
+    """Charset do header/meta; sem declaração tenta UTF-8 e cai para windows-1252."""
+    declared = ""
+    m = re.search(r"charset=([\w-]+)", content_type or "", re.I)
+    if m:
+        declared = m.group(1)
+    else:
+        m = _RE_META_CHARSET.search(body[:4096])
+        if m:
+            declared = m.group(1).decode("ascii", "ignore")
+    declared = declared.lower()
+    if declared in ("iso-8859-1", "latin1", "latin-1", "us-ascii"):
+        declared = "cp1252"  # mesmo mapeamento que o browser usa
+
+    for encoding in [e for e in (declared, "utf-8") if e]:
+        try:
+            return body.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return body.decode("cp1252", errors="replace")
+
+
+def _options_page_url(field_id, base_url: str) -> str:
+    return f"{base_url}/adm/extras/informacao_produto_index.php?id={field_id}&aba=opcoes"
+
+
+def _parse_options_rows(field_id, body: bytes, content_type: str):
+    """Bytes da página de opções → linhas, ou None se não for a tabela (login/layout)."""
+    parser = _OptionsTableParser()
+    try:
+        parser.feed(_decode_html(body or b"", content_type))
+        parser.close()
+    except Exception as e:
+        logger.debug(f"Opções id={field_id}: HTML malformado ({e})")
+        return None
+    if parser.login or not parser.saw_table:
+        return None
+    if parser.data_rows and not parser.rows:
+        # há linhas mas nenhuma virou opção: layout desconhecido, não "campo vazio"
+        logger.debug(f"Opções id={field_id}: {parser.data_rows} linhas sem opção reconhecida — renderizando")
+        return None
+    return parser.rows
+
+
+def _fetch_options_rows_http(page, field_id: int, base_url: str):
+    """
+    GET direto de informacao_produto_index.php (cookies do contexto) + parser.
+    Retorna None quando o HTML não serve (login, sem tabela) → usar navegação.
+    """
+    try:
+        resp = page.request.get(_options_page_url(field_id, base_url), timeout=REQUEST_TIMEOUT_MS)
+        if resp.status != 200:
+            logger.debug(f"Opções id={field_id} via HTTP: status {resp.status}")
+            return None
+        return _parse_options_rows(field_id, resp.body(), resp.headers.get("content-type") or "")
+    except Exception as e:
+        logger.debug(f"Opções id={field_id} via HTTP falhou: {e}")
+        return None
+
+
+def _read_options_rows(page, field_id: int, base_url: str) -> list:
+    """Linhas cruas da tabela de opções: HTTP primeiro, navegação só como fallback."""
+    rows = _fetch_options_rows_http(page, field_id, base_url)
+    if rows is not None:
+        return rows
+    logger.debug(f"Opções id={field_id}: HTML via HTTP sem tabela — navegando")
+    frame = _navigate_to_options_page(page, field_id, base_url)
+    return frame.evaluate(_JS_EXTRACT_OPTIONS) or []
+
+
 # ---------------------------------------------------------------------------
 # NAVEGAÇÃO TURBO (sem FrameLocator error + cache)
 # ---------------------------------------------------------------------------
 def _navigate_to_options_page(page, field_id: int, base_url: str):
-    """Versão ultra-rápida + cache implícito"""
-    if field_id in _options_cache:
-        return None, True  # sinaliza que usa cache
-
+    """Fallback renderizado: iframe `centro` do admin ou a URL PHP direta."""
     admin_url = f"{base_url}/admin/#/adm/extras/informacao_produto_index.php?aba=opcoes&id={field_id}"
     page.goto(admin_url, wait_until="domcontentloaded", timeout=18000)
     page.wait_for_timeout(900)
@@ -68,115 +229,154 @@ def _navigate_to_options_page(page, field_id: int, base_url: str):
     if frame:
         try:
             frame.wait_for_selector("table tbody tr", timeout=7000)
-            return frame, True
+            return frame
         except Exception:
             pass
 
     direct_url = f"{base_url}/adm/extras/informacao_produto_index.php?id={field_id}&aba=opcoes"
     page.goto(direct_url, wait_until="domcontentloaded", timeout=18000)
     page.wait_for_timeout(800)
-    return page, False
+    return page
 
 
 # ---------------------------------------------------------------------------
 # FETCH COM CACHE (rápido)
 # ---------------------------------------------------------------------------
 def _fetch_options_from_html(page, field_id: int, base_url: str) -> list:
-    if field_id in _options_cache:
-        return _options_cache[field_id].copy()
+    cached = options_cache.get(base_url, field_id)
+    if cached is not None:
+        return cached
 
     try:
-        frame, _ = _navigate_to_options_page(page, field_id, base_url)
-        if frame is None:
-            return _options_cache[field_id]
-
-        raw_js_results = frame.evaluate(_JS_EXTRACT_OPTIONS)
+        raw_js_results = _read_options_rows(page, field_id, base_url)
 
         if not raw_js_results:
-            _options_cache[field_id] = []
+            options_cache.put(base_url, field_id, [])
             return []
 
-        raw_options = []
-        for item in raw_js_results:
-            nome_raw = item.get("value", "").strip()
-            if not nome_raw:
-                continue
-
-            nome = _fix_mojibake(nome_raw)
-
-            price_text = item.get("price", "0.00")
-            price = "0.00"
-            if price_text:
-                clean = re.sub(r'[^\d.,]', '', price_text).replace(',', '.').strip()
-                try:
-                    price = f"{float(clean):.2f}"
-                except ValueError:
-                    pass
-
-            raw_options.append({
-                "value": nome,
-                "price": price,
-                "order": len(raw_options),
-            })
-
-        seen = set()
-        deduped = []
-        for opt in raw_options:
-            key = opt["value"].strip().lower()
-            if key not in seen and not _is_fake_header(key):
-                seen.add(key)
-                deduped.append(opt)
-
-        _options_cache[field_id] = deduped
+        deduped = _options_from_rows(raw_js_results)
+        options_cache.put(base_url, field_id, deduped)
         logger.info(f"Raspadas {len(deduped)} opções reais para id={field_id}")
         return deduped
 
     except Exception as e:
         logger.error(f"Erro scraping opções id={field_id}: {e}")
-        _options_cache[field_id] = []
         return []
 
 
+def _options_from_rows(rows: list) -> list:
+    """Linhas cruas → opções {value, price, order} corrigidas e sem duplicatas/headers."""
+    raw_options = []
+    for item in rows:
+        nome_raw = item.get("value", "").strip()
+        if not nome_raw:
+            continue
+
+        nome = _fix_mojibake(nome_raw)
+
+        price_text = item.get("price", "0.00")
+        price = "0.00"
+        if price_text:
+            clean = re.sub(r'[^\d.,]', '', price_text).replace(',', '.').strip()
+            try:
+                price = f"{float(clean):.2f}"
+            except ValueError:
+                pass
+
+        raw_options.append({
+            "value": nome,
+            "price": price,
+            "order": len(raw_options),
+        })
+
+    seen = set()
+    deduped = []
+    for opt in raw_options:
+        key = opt["value"].strip().lower()
+        if key not in seen and not _is_fake_header(key):
+            seen.add(key)
+            deduped.append(opt)
+    return deduped
+
+
+def _prefetch_options_pages(page, field_ids: list, base_url: str, concurrency: int, cache, build) -> int:
+    """
+    Lê várias páginas de opções de uma vez (fetch concorrente na página) e
+    preenche `cache` com build(linhas). Campos cujo HTML não serviu ficam de
+    fora e caem no caminho individual (com navegação). Retorna quantos entraram.
+    """
+    missing = [fid for fid in field_ids if (base_url, fid) not in cache]
+    if not missing:
+        return 0
+    specs = [{"url": _options_page_url(fid, base_url), "method": "GET", "binary": True} for fid in missing]
+    results = fetch_many(page, specs, concurrency=concurrency, timeout_ms=REQUEST_TIMEOUT_MS)
+
+    loaded = 0
+    for fid, res in zip(missing, results):
+        if res["status"] != 200:
+            continue
+        rows = _parse_options_rows(fid, res["body"], res["content_type"])
+        if rows is None:
+            continue
+        cache.put(base_url, fid, build(rows))
+        loaded += 1
+    logger.info(f"Pré-leitura de opções: {loaded}/{len(missing)} campos via HTTP")
+    return loaded
+
+
+def _prefetch_options(page, field_ids: list, base_url: str, concurrency: int) -> int:
+    """Como _fetch_options_from_html para vários campos em paralelo (só preenche o cache)."""
+    return _prefetch_options_pages(page, field_ids, base_url, concurrency, options_cache, _options_from_rows)
+
+
 def _fetch_options_with_ids_from_html(page, field_id: int, base_url: str) -> list:
-    if field_id in _options_with_ids_cache:
-        return _options_with_ids_cache[field_id].copy()
+    cached = options_with_ids_cache.get(base_url, field_id)
+    if cached is not None:
+        return cached
 
     try:
-        frame, _ = _navigate_to_options_page(page, field_id, base_url)
-        if frame is None:
-            return _options_with_ids_cache[field_id]
-
-        raw_js_results = frame.evaluate(_JS_EXTRACT_OPTIONS)
+        raw_js_results = _read_options_rows(page, field_id, base_url)
 
         if not raw_js_results:
             return []
 
-        options = []
-        for i, item in enumerate(raw_js_results):
-            nome_raw = item.get("value", "").strip()
-            if not nome_raw:
-                continue
-
-            price_text = item.get("price", "0.00")
-            price = "0.00"
-            if price_text:
-                clean = re.sub(r'[^\d.,]', '', price_text).replace(',', '.').strip()
-                try:
-                    price = f"{float(clean):.2f}"
-                except ValueError:
-                    pass
-
-            options.append({
-                "value": nome_raw,
-                "value_fixed": _fix_mojibake(nome_raw),
-                "price": price,
-                "order": i,
-                "option_id": item.get("option_id"),
-            })
-
-        _options_with_ids_cache[field_id] = options
+        options = _options_with_ids_from_rows(raw_js_results)
+        options_with_ids_cache.put(base_url, field_id, options)
         return options
 
     except Exception as e:
         logger.error(f"Erro scraping opções com IDs id={field_id}: {e}")
         return []
+
+
+def _options_with_ids_from_rows(rows: list) -> list:
+    options = []
+    for i, item in enumerate(rows):
+        nome_raw = item.get("value", "").strip()
+        if not nome_raw:
+            continue
+
+        price_text = item.get("price", "0.00")
+        price = "0.00"
+        if price_text:
+            clean = re.sub(r'[^\d.,]', '', price_text).replace(',', '.').strip()
+            try:
+                price = f"{float(clean):.2f}"
+            except ValueError:
+                pass
+
+        options.append({
+            "value": nome_raw,
+            "value_fixed": _fix_mojibake(nome_raw),
+            "price": price,
+            "order": i,
+            "option_id": item.get("option_id"),
+        })
+    return options
+
+
+def _prefetch_options_with_ids(page, field_ids: list, base_url: str, concurrency: int) -> int:
+    """Como _fetch_options_with_ids_from_html para vários campos em paralelo (só preenche o cache)."""
+    return _prefetch_options_pages(
+        page, field_ids, base_url, concurrency, options_with_ids_cache, _options_with_ids_from_rows,
+    )
@@ -1,3 +1,5 @@
+from service.token_manager import get_token_manager
+
 from .config import logger
 
 
@@ -9,6 +11,14 @@ def _ensure_bearer(token: str) -> str:
 
 
 def _extract_token(page, base_domain: str, timeout_ms: int = 15000) -> str | None:
+    """Token da loja pelo gerenciador compartilhado; o scrape (com reload) só roda se ele não tiver um válido."""
+    url = getattr(page, "url", "") or ""
+    store = url if base_domain in url else f"https://www.{base_domain}"
+    token = get_token_manager(store).get(page, refresh=lambda p: _scrape_token(p, timeout_ms))
+    return token or None
+
+
+def _scrape_token(page, timeout_ms: int = 15000) -> str | None:
     token = None
 
     try:
@@ -1,5 +1,4 @@
-import re
-import logging
+from service.text_canon import fix_mojibake, option_key
 
 from .config import FAKE_HEADER_VALUES, logger
 
@@ -11,33 +10,55 @@ def _is_fake_header(value: str) -> bool:
 
 
 def _fix_mojibake(text: str) -> str:
-    if not text:
-        return text
-
-    mojibake_patterns = [
-        "Ã§", "Ã£", "Ã¡", "Ã©", "Ã­", "Ã³", "Ãº",
-        "Ã¢", "Ãª", "Ã´", "Ã¼", "Ã", "Ã"
-    ]
-
-    has_mojibake = any(p in text for p in mojibake_patterns)
-    if not has_mojibake:
-        return text
-
-    try:
-        fixed = text.encode('latin-1').decode('utf-8')
+    fixed = fix_mojibake(text)
+    if fixed != text:
         logger.debug(f"Mojibake fix: '{text}' -> '{fixed}'")
-        return fixed
-    except (UnicodeDecodeError, UnicodeEncodeError):
-        try:
-            fixed = text.encode('cp1252').decode('utf-8')
-            return fixed
-        except (UnicodeDecodeError, UnicodeEncodeError):
-            return text
+    return fixed
 
 
 def _normalize_option_key(opt: dict) -> str:
     if not opt:
         return ""
     v = opt.get("value") or opt.get("label") or ""
-    v = _fix_mojibake(str(v))
-    return v.strip().lower()
+    return option_key(v)
+
+
+def _raw_option_price(opt: dict):
+    """Preço da opção como a API mandou (None = ausente/nulo), antes de normalizar."""
+    for key in ("price", "additional_price", "valor"):
+        price = opt.get(key)
+        if price is not None and str(price).strip() != "":
+            return price
+    return None
+
+
+def _options_suspect_reason(options: list) -> str:
+    """
+    Motivo para NÃO confiar nas opções CRUAS da API ("" = confiáveis):
+    vazias, sem nome, preço ausente/nulo/ilegível, mojibake, header falso ou
+    duplicadas. Tem que rodar antes de _normalize_full_item, que troca preço
+    ausente por "0.00".
+    """
+    if not options:
+        return "sem opções"
+    seen = set()
+    for opt in options:
+        if not isinstance(opt, dict):
+            return f"opção sem preço '{opt}'" if isinstance(opt, str) and opt.strip() else "opção sem nome"
+        value = (opt.get("value") or opt.get("label") or "").strip()
+        if not value:
+            return "opção sem nome"
+        price = _raw_option_price(opt)
+        if price is None:
+            return f"preço ausente em '{value}'"
+        try:
+            float(str(price).replace(",", "."))
+        except ValueError:
+            return f"preço ilegível em '{value}'"
+        if fix_mojibake(value) != value:
+            return f"mojibake em '{value}'"
+        key = option_key(value)
+        if _is_fake_header(value) or key in seen:
+            return f"header/duplicata '{value}'"
+        seen.add(key)
+    return ""
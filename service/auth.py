@@ -12,6 +12,8 @@ from typing import Any, List, Optional
 
 from patchright.sync_api import Page
 
+from service.token_manager import get_token_manager
+
 logger = logging.getLogger("auth")
 
 # ---------------------------------------------------------------------------
@@ -301,6 +303,8 @@ def authenticate(
     Retorna Page autenticada ou None.
     """
     state_path = _resolve_state_path(cookie_files)
+    # token da loja persiste ao lado do storage_state (service/token_manager.py)
+    get_token_manager(url, state_path)
 
     # Extrair domínio para filtrar cookies corretamente
     from urllib.parse import urlparse
@@ -0,0 +1,499 @@
+# service/page_fetch.py
+# Pool de requisições concorrentes executado DENTRO da página (fetch do browser).
+#
+# A API sync do Patchright não pode ser usada de várias threads, então a
+# concorrência acontece no próprio browser: um único page.evaluate dispara N
+# workers JS que consomem a fila de requisições com fetch(credentials:'include').
+# Cookies/sessão vão automaticamente. Quando a URL não é da mesma origem da
+# página (CORS) ou o evaluate falha, cai para page.request sequencial.
+
+import base64
+import itertools
+import json
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger("page_fetch")
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT_MS = 20000
+RETRY_BACKOFF_S = 1.0  # espera antes da 1ª repetição; dobra a cada rodada
+RETRY_BACKOFF_MAX_S = 30.0  # teto (inclusive para Retry-After de 429)
+
+_JS_FETCH_POOL = """
+async ({specs, concurrency, timeout}) => {
+    const results = new Array(specs.length);
+    let next = 0;
+
+    const runOne = async (spec) => {
+        const ctrl = new AbortController();
+        const timer = setTimeout(() => ctrl.abort(), timeout);
+        try {
+            const init = {
+                method: spec.method || 'GET',
+                headers: spec.headers || {},
+                credentials: 'include',
+                redirect: 'follow',
+                signal: ctrl.signal,
+            };
+            if (spec.bodyB64) {
+                init.body = Uint8Array.from(atob(spec.bodyB64), c => c.charCodeAt(0));
+            } else if (spec.body !== null && spec.body !== undefined) {
+                init.body = spec.body;
+            }
+            const resp = await fetch(spec.url, init);
+            let text = '';
+            let bodyB64 = null;
+            if (spec.binary) {
+                // bytes crus (base64): o Python decodifica com o charset certo
+                const bytes = new Uint8Array(await resp.arrayBuffer());
+                let bin = '';
+                for (let i = 0; i < bytes.length; i += 0x8000) {
+                    bin += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+                }
+                bodyB64 = btoa(bin);
+            } else {
+                text = await resp.text();
+            }
+            return {
+                status: resp.status,
+                ok: resp.ok,
+                url: resp.url,
+                contentType: resp.headers.get('content-type') || '',
+                retryAfter: resp.headers.get('retry-after'),
+                text: text,
+                bodyB64: bodyB64,
+            };
+        } catch (err) {
+            return {status: 0, ok: false, error: String(err && err.message || err)};
+        } finally {
+            clearTimeout(timer);
+        }
+    };
+
+    const worker = async () => {
+        while (true) {
+            const i = next++;
+            if (i >= specs.length) return;
+            results[i] = await runOne(specs[i]);
+        }
+    };
+
+    const n = Math.max(1, Math.min(concurrency, specs.length));
+    await Promise.all(Array.from({length: n}, worker));
+    return results;
+}
+"""
+
+
+# Versão "disparar agora, coletar depois": a promise fica em window até o
+# collect. Só sobrevive enquanto a página não navegar.
+_JS_START_FETCH = """
+({key, spec, timeout}) => {
+    const pending = window.__pageFetchPending = window.__pageFetchPending || {};
+    pending[key] = (async () => {
+        const ctrl = new AbortController();
+        const timer = setTimeout(() => ctrl.abort(), timeout);
+        try {
+            const init = {
+                method: spec.method || 'GET',
+                headers: spec.headers || {},
+                credentials: 'include',
+                redirect: 'follow',
+                signal: ctrl.signal,
+            };
+            if (spec.bodyB64) {
+                init.body = Uint8Array.from(atob(spec.bodyB64), c => c.charCodeAt(0));
+            } else if (spec.body !== null && spec.body !== undefined) {
+                init.body = spec.body;
+            }
+            const resp = await fetch(spec.url, init);
+            let text = '';
+            let bodyB64 = null;
+            if (spec.binary) {
+                // bytes crus (base64): o Python decodifica com o charset certo
+                const bytes = new Uint8Array(await resp.arrayBuffer());
+                let bin = '';
+                for (let i = 0; i < bytes.length; i += 0x8000) {
+                    bin += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+                }
+                bodyB64 = btoa(bin);
+            } else {
+                text = await resp.text();
+            }
+            return {
+                status: resp.status,
+                ok: resp.ok,
+                url: resp.url,
+                contentType: resp.headers.get('content-type') || '',
+                retryAfter: resp.headers.get('retry-after'),
+                text: text,
+                bodyB64: bodyB64,
+            };
+        } catch (err) {
+            return {status: 0, ok: false, error: String(err && err.message || err)};
+        } finally {
+            clearTimeout(timer);
+        }
+    })();
+    return true;
+}
+"""
+
+_JS_COLLECT_FETCH = """
+async (key) => {
+    const pending = window.__pageFetchPending || {};
+    const promise = pending[key];
+    delete pending[key];
+    return promise ? await promise : null;
+}
+"""
+
+_pending_keys = itertools.count(1)
+
+
+def _origin_of(url: str) -> str:
+    parsed = urlparse(url or "")
+    if not parsed.scheme or not parsed.netloc:
+        return ""
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+def _same_origin(page, url: str) -> bool:
+    try:
+        page_origin = _origin_of(page.url)
+    except Exception:
+        return False
+    return bool(page_origin) and page_origin == _origin_of(url)
+
+
+def _needs_request(spec: dict) -> bool:
+    """
+    Spec que não pode ir pelo fetch da página: via_request=True explícito ou
+    header Cookie (proibido no fetch — o browser descarta em silêncio e a
+    requisição sairia com o cookie jar errado).
+    """
+    if spec.get("via_request"):
+        return True
+    return any(str(k).lower() == "cookie" for k in (spec.get("headers") or {}))
+
+
+def _js_body(body) -> Dict[str, Any]:
+    """Corpo em bytes vai em base64 (o evaluate só transporta JSON)."""
+    if isinstance(body, (bytes, bytearray)):
+        return {"body": None, "bodyB64": base64.b64encode(bytes(body)).decode("ascii")}
+    return {"body": body, "bodyB64": None}
+
+
+def _parse_result(raw: Optional[dict]) -> Dict[str, Any]:
+    raw = raw or {}
+    text = raw.get("text") or ""
+    body_bytes = raw.get("bodyBytes")
+    if body_bytes is None and raw.get("bodyB64"):
+        body_bytes = base64.b64decode(raw["bodyB64"])
+    content_type = raw.get("contentType") or ""
+    body = None
+    if text and "json" in content_type.lower():
+        try:
+            body = json.loads(text)
+        except ValueError:
+            body = None
+    return {
+        "status": int(raw.get("status") or 0),
+        "ok": bool(raw.get("ok")),
+        "url": raw.get("url") or "",
+        "content_type": content_type,
+        "text": text,
+        "json": body,
+        "body": body_bytes,
+        "error": raw.get("error") or "",
+        "retry_after": raw.get("retryAfter"),
+    }
+
+
+def _fetch_via_request(page, spec: dict, timeout_ms: int) -> Dict[str, Any]:
+    """Fallback sequencial via APIRequestContext da página (sem DOM)."""
+    method = (spec.get("method") or "GET").upper()
+    kwargs = {"headers": spec.get("headers") or {}, "timeout": timeout_ms}
+    if spec.get("body") is not None:
+        kwargs["data"] = spec["body"]
+    try:
+        resp = page.request.fetch(spec["url"], method=method, **kwargs)
+        text, body_bytes = "", None
+        try:
+            if spec.get("binary"):
+                body_bytes = resp.body()
+            else:
+                text = resp.text()
+        except Exception:
+            pass
+        return _parse_result({
+            "status": resp.status,
+            "ok": resp.ok,
+            "url": resp.url,
+            "contentType": resp.headers.get("content-type") or "",
+            "retryAfter": resp.headers.get("retry-after"),
+            "text": text,
+            "bodyBytes": body_bytes,
+        })
+    except Exception as exc:
+        return _parse_result({"status": 0, "ok": False, "error": str(exc)})
+
+
+def fetch_many(
+    page,
+    specs: List[dict],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout_ms: int = DEFAULT_TIMEOUT_MS,
+) -> List[Dict[str, Any]]:
+    """
+    Executa várias requisições com no máximo `concurrency` simultâneas.
+
+    specs: [{"url": ..., "method": "GET", "headers": {...}, "body": str|bytes|None, "binary": bool,
+             "via_request": bool, "no_retry": bool}, ...]
+    Specs com via_request=True ou header Cookie vão sempre por page.request.
+    Specs com no_retry=True (POST que cria algo) nunca são reenviadas: status 0
+    volta como está, porque a requisição pode ter chegado ao servidor.
+    Retorna uma lista na MESMA ordem de `specs`, cada item com
+    status / ok / url / content_type / text / json / body / error / retry_after
+    (body = bytes crus, só com binary=True; retry_after = header Retry-After).
+    """
+    if not specs:
+        return []
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(specs)
+    in_page_idx = [
+        i for i, s in enumerate(specs)
+        if concurrency > 1 and not _needs_request(s) and _same_origin(page, s["url"])
+    ]
+
+    if in_page_idx:
+        payload = [
+            {
+                "url": specs[i]["url"],
+                "method": (specs[i].get("method") or "GET").upper(),
+                "headers": specs[i].get("headers") or {},
+                **_js_body(specs[i].get("body")),
+                "binary": bool(specs[i].get("binary")),
+            }
+            for i in in_page_idx
+        ]
+        try:
+            raw_list = page.evaluate(
+                _JS_FETCH_POOL,
+                {"specs": payload, "concurrency": int(concurrency), "timeout": int(timeout_ms)},
+            )
+            for i, raw in zip(in_page_idx, raw_list or []):
+                parsed = _parse_result(raw)
+                # status 0 = erro de rede/CORS/abort → deixa para o fallback
+                if parsed["status"] or specs[i].get("no_retry"):
+                    results[i] = parsed
+        except Exception as exc:
+            logger.debug("fetch_many: evaluate falhou (%s) — usando page.request", exc)
+            for i in in_page_idx:
+                if specs[i].get("no_retry"):
+                    results[i] = _parse_result({"status": 0, "ok": False, "error": f"evaluate falhou: {exc}"})
+
+    for i, spec in enumerate(specs):
+        if results[i] is None:
+            results[i] = _fetch_via_request(page, spec, timeout_ms)
+
+    return results  # type: ignore[return-value]
+
+
+class PendingFetch:
+    """Requisição disparada na página; result() espera e devolve o mesmo dict de fetch_many."""
+
+    def __init__(self, page, spec: dict, timeout_ms: int, key: Optional[str] = None, done: Optional[Dict[str, Any]] = None):
+        self.page = page
+        self.spec = spec
+        self.timeout_ms = timeout_ms
+        self.key = key
+        self._result = done
+
+    @property
+    def started_in_page(self) -> bool:
+        return self.key is not None
+
+    def result(self) -> Dict[str, Any]:
+        if self._result is None:
+            raw = None
+            try:
+                raw = self.page.evaluate(_JS_COLLECT_FETCH, self.key)
+            except Exception as exc:
+                logger.debug("PendingFetch: collect falhou (%s)", exc)
+            parsed = _parse_result(raw) if raw else None
+            # promise perdida (navegação) ou erro de rede → refaz via page.request
+            # (exceto no_retry: a requisição pode ter chegado ao servidor)
+            if self.spec.get("no_retry"):
+                parsed = parsed or _parse_result({"status": 0, "ok": False, "error": "resultado perdido"})
+            elif not parsed or not parsed["status"]:
+                parsed = _fetch_via_request(self.page, self.spec, self.timeout_ms)
+            self._result = parsed
+        return self._result
+
+
+def start_fetch(page, spec: dict, timeout_ms: int = DEFAULT_TIMEOUT_MS) -> PendingFetch:
+    """
+    Dispara uma requisição dentro da página e retorna sem esperar a resposta.
+    Fora da mesma origem (ou se o evaluate falhar) executa na hora via page.request.
+    """
+    spec = {
+        "url": spec["url"],
+        "method": (spec.get("method") or "GET").upper(),
+        "headers": spec.get("headers") or {},
+        "body": spec.get("body"),
+        "binary": bool(spec.get("binary")),
+        "via_request": bool(spec.get("via_request")),
+    }
+    if _same_origin(page, spec["url"]) and not _needs_request(spec):
+        key = f"pf{next(_pending_keys)}"
+        js_spec = {**spec, **_js_body(spec["body"])}
+        try:
+            page.evaluate(_JS_START_FETCH, {"key": key, "spec": js_spec, "timeout": int(timeout_ms)})
+            return PendingFetch(page, spec, timeout_ms, key=key)
+        except Exception as exc:
+            logger.debug("start_fetch: evaluate falhou (%s) — usando page.request", exc)
+    return PendingFetch(page, spec, timeout_ms, done=_fetch_via_request(page, spec, timeout_ms))
+
+
+def fetch_json_many(
+    page,
+    urls: List[str],
+    headers: Optional[dict] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout_ms: int = DEFAULT_TIMEOUT_MS,
+    via_request: bool = False,
+) -> List[Dict[str, Any]]:
+    """Atalho para vários GETs JSON com os mesmos headers."""
+    specs = [{"url": u, "method": "GET", "headers": dict(headers or {}), "via_request": via_request} for u in urls]
+    return fetch_many(page, specs, concurrency=concurrency, timeout_ms=timeout_ms)
+
+
+def _retry_after_s(res: Dict[str, Any]) -> Optional[float]:
+    """Retry-After (segundos) de uma resposta 429, se o servidor informou."""
+    if res.get("status") != 429:
+        return None
+    value = res.get("retry_after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:  # formato HTTP-date
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int, results: List[Dict[str, Any]]) -> None:
+    """Pausa entre rodadas de repetição: exponencial, ou o maior Retry-After dos 429."""
+    delay = RETRY_BACKOFF_S * (2 ** attempt)
+    hinted = [s for s in (_retry_after_s(r) for r in results) if s is not None]
+    if hinted:
+        delay = max(hinted)
+    elif any(r.get("status") == 429 for r in results):
+        delay *= 2
+    time.sleep(min(max(0.0, delay), RETRY_BACKOFF_MAX_S))
+
+
+def fetch_paged_json(
+    page,
+    base_url: str,
+    headers: Optional[dict] = None,
+    page_size: int = 100,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout_ms: int = DEFAULT_TIMEOUT_MS,
+    sort: str = "id",
+    retries: int = 2,
+    fallback_sizes: Tuple[int, ...] = (100, 50, 25),
+) -> Tuple[List[dict], Dict[str, Any]]:
+    """
+    Lista paginada no formato {data: [...], paging: {total}}.
+
+    A 1ª página sonda o tamanho: tenta `page_size` e, se o servidor recusar,
+    os menores de `fallback_sizes`; se ele aceitar mas limitar, o tamanho
+    efetivo é o que veio. As demais páginas são buscadas em paralelo e cada
+    página que falhar é repetida até `retries` vezes (sem abortar a lista),
+    com backoff entre as rodadas (Retry-After respeitado nos 429).
+    Retorna (itens, info) com info = {total, pages, page_size, failed_pages,
+    missing, complete}; missing > 0 indica listagem truncada.
+    """
+    sep = "&" if "?" in base_url else "?"
+    prefix = f"{base_url}{sep}sort={sort}&" if sort else f"{base_url}{sep}"
+
+    def _url(number: int, size: int) -> str:
+        return f"{prefix}page[size]={size}&page[number]={number}"
+
+    def _body(res: Dict[str, Any]) -> Optional[dict]:
+        return res["json"] if res["status"] == 200 and isinstance(res["json"], dict) else None
+
+    info: Dict[str, Any] = {
+        "total": 0, "pages": 0, "page_size": page_size,
+        "failed_pages": [], "missing": 0, "complete": False,
+    }
+
+    body = None
+    size = page_size
+    for size in [page_size] + [s for s in fallback_sizes if s < page_size]:
+        for attempt in range(retries + 1):
+            if attempt:
+                _backoff(attempt - 1, [first])
+            first = fetch_json_many(page, [_url(1, size)], headers=headers, concurrency=1, timeout_ms=timeout_ms)[0]
+            body = _body(first)
+            # 4xx (exceto 429) = tamanho recusado → próximo tamanho, sem repetir
+            if body is not None or (400 <= first["status"] < 500 and first["status"] != 429):
+                break
+        if body is not None:
+            break
+    if body is None:
+        info["failed_pages"] = [1]
+        return [], info
+
+    items = [i for i in (body.get("data") or []) if isinstance(i, dict)]
+    total = int((body.get("paging") or {}).get("total") or len(items))
+    if items and len(items) < size and total > len(items):
+        size = len(items)  # servidor limitou o page[size]
+    pages = max(1, -(-total // max(1, size)))
+    info.update({"total": total, "pages": pages, "page_size": size})
+
+    pending = list(range(2, pages + 1))
+    failed_results: List[Dict[str, Any]] = []
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            _backoff(attempt - 1, failed_results)
+        results = fetch_json_many(
+            page, [_url(n, size) for n in pending], headers=headers,
+            concurrency=concurrency, timeout_ms=timeout_ms,
+        )
+        failed = []
+        failed_results = []
+        for number, res in zip(pending, results):
+            data = _body(res)
+            if data is None:
+                failed.append(number)
+                failed_results.append(res)
+                continue
+            items.extend(i for i in (data.get("data") or []) if isinstance(i, dict))
+        pending = failed
+    info["failed_pages"] = pending
+
+    # páginas podem se sobrepor se o catálogo mudar durante a leitura
+    seen = set()
+    unique = []
+    for item in items:
+        key = item.get("id")
+        if key is not None and key in seen:
+            continue
+        seen.add(key)
+        unique.append(item)
+
+    info["missing"] = max(0, total - len(unique))
+    info["complete"] = not info["failed_pages"] and not info["missing"]
+    return unique, info
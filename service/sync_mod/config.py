@@ -46,3 +46,62 @@ ORIGEM_TRAY_TO_SYNC_MAP = {
 MODO_TESTE_APENAS_COM_INFOS = False
 LOG_FILE = "produtos/sync_log.json"
 SKIP_DESTINO_PRODUCT_IDS = {"47"}
+
+# Busca por nome dos produtos que não casaram pelo cache (ETAPA 2):
+# - "api": chama /admin/api/products com filtro de nome via page.request (padrão)
+# - "ui":  digita na caixa "Buscar por nome, código," da listagem (modo antigo)
+MATCH_SEARCH_MODE = "api"
+MATCH_SEARCH_PARAM = "filter[name]"
+MATCH_SEARCH_CONCURRENCY = 4
+MATCH_SEARCH_PAGE_SIZE = 25
+
+# Antes do PUT do produto, compara com o JSON atual do DESTINO e envia só os
+# campos alterados (ou nenhum PUT, status "unchanged" no log).
+PUT_ONLY_CHANGED_FIELDS = True
+
+# Ledger de produtos já sincronizados: produtos cuja projeção da ORIGEM não
+# mudou desde o último sync bem-sucedido são pulados (SYNC_FORCE ou --force
+# no main.py desliga o pulo).
+SYNC_LEDGER_FILE = "produtos/sync_ledger.json"
+SYNC_FORCE = False
+
+# ETAPA 3 em paralelo: K workers (cada um com seu browser, autenticado com o
+# storage_state da sessão DESTINO) consumindo a fila de matches. 1 = sequencial.
+SYNC_WORKERS = 1
+SYNC_HOST_MIN_INTERVAL_S = 1.0  # espaçamento mínimo entre passos no mesmo host (todos os workers)
+SYNC_WORKER_HEADLESS = True
+
+# Detalhe do produto no DESTINO: "api" = GET direto com o token em cache
+# (navega para /edit só se o token for recusado); "page" = sempre navega.
+PRODUCT_FETCH_MODE = "api"
+
+# Listagem /admin/api/additional-info (catálogo carregado uma vez por execução)
+ADDITIONAL_INFO_PAGE_SIZE = 100  # o servidor pode limitar; o tamanho efetivo vem da 1ª página
+ADDITIONAL_INFO_CONCURRENCY = 4
+
+# Verificação pós-POST das infos adicionais: polling com backoff exponencial
+INFOS_VERIFY_TIMEOUT_S = 15.0
+INFOS_VERIFY_INITIAL_S = 0.5
+INFOS_VERIFY_MAX_INTERVAL_S = 4.0
+
+# Verificação das infos adicionais em lote após a passada principal (em vez de
+# polling por produto); só os divergentes recebem um novo POST.
+DEFER_INFOS_VERIFICATION = True
+INFOS_VERIFY_CONCURRENCY = 4
+INFOS_VERIFY_RETRIES = 1
+
+# Índice PropertyValue id → (propriedade, valor) da ORIGEM, salvo em disco
+ORIGEM_PROPERTY_INDEX_FILE = "produtos/origem_property_index.json"
+ORIGEM_PROPERTY_INDEX_TTL_S = 6 * 3600
+ORIGEM_PROPERTY_FETCH_CONCURRENCY = 6
+
+# Variações da ORIGEM: cache por produto (id + fingerprint) e páginas em paralelo
+ORIGEM_VARIANTS_CACHE_FILE = "produtos/origem_variants_cache.json"
+# o fingerprint não pega SKU/preço/valor alterado só na variação (o produto
+# não traz "modified"), então a entrada também expira por idade
+ORIGEM_VARIANTS_CACHE_TTL_S = 30 * 60
+ORIGEM_VARIANTS_CONCURRENCY = 4
+
+# Variações do DESTINO: listagem paginada e exclusões concorrentes
+DESTINO_VARIANTS_PAGE_SIZE = 50
+DESTINO_VARIANTS_CONCURRENCY = 6
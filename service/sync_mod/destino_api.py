@@ -1,7 +1,6 @@
 # ========================== destino_api.py ==========================
 import json
 import logging
-import random
 import re
 import time
 from typing import Dict, List, Optional, Set, Tuple
@@ -9,8 +8,23 @@ from urllib.parse import urlencode
 
 from patchright.sync_api import Page
 
-from .config import DESTINO_BASE
+from service.page_fetch import fetch_many, fetch_paged_json
+from service.token_manager import get_token_manager
+
+from .config import (
+    ADDITIONAL_INFO_CONCURRENCY,
+    ADDITIONAL_INFO_PAGE_SIZE,
+    DESTINO_BASE,
+    DESTINO_VARIANTS_CONCURRENCY,
+    DESTINO_VARIANTS_PAGE_SIZE,
+    INFOS_VERIFY_INITIAL_S,
+    INFOS_VERIFY_MAX_INTERVAL_S,
+    INFOS_VERIFY_TIMEOUT_S,
+)
 from .domain import api_headers, normalize
+from .edit_form import edit_form_url, get_edit_form, post_form
+from .origin_variants import build_cookie_header, get_origin_variant_client
+from .property_index import get_property_index
 
 _logger = logging.getLogger("sync")
 
@@ -27,22 +41,7 @@ def _build_cookie_header(cookies_origem) -> str:
       - Lista de strings: ["name=value", ...]
       - String única: "name=value; name2=value2"
     """
-    if not cookies_origem:
-        return ""
-    if isinstance(cookies_origem, str):
-        return cookies_origem
-
-    parts = []
-    for c in cookies_origem:
-        if isinstance(c, dict):
-            name  = c.get("name") or ""
-            value = c.get("value") or ""
-            if name:
-                parts.append(f"{name}={value}")
-        elif isinstance(c, str):
-            parts.append(c)
-
-    return "; ".join(parts)
+    return build_cookie_header(cookies_origem)
 
 
 def extract_property_value_ids_from_variant(variant: dict) -> Set[str]:
@@ -143,7 +142,7 @@ def collect_property_value_ids_from_variants(variants: List[dict]) -> List[str]:
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# [PATCH-A] fetch_origin_variants_full — NOVO (aceita token fallback)
+# Variações da ORIGEM (via OriginVariantClient: cache + páginas em paralelo)
 # ══════════════════════════════════════════════════════════════════════════════
 
 def fetch_origin_variants_full(
@@ -153,128 +152,21 @@ def fetch_origin_variants_full(
     cookies_origem,
     logger,
     token: str = "",
+    fingerprint: str = "",
 ) -> list:
     """
-    [PATCH-A] Busca as variações COMPLETAS da origem via API REST.
+    Busca as variações COMPLETAS da origem via API REST.
 
     AUTENTICAÇÃO:
       Tenta Cookie primeiro (sessão do browser), depois tenta Authorization
       se cookie ausente ou retornar 401/403. Aceita ambos os formatos de cookies_origem.
+    Com fingerprint, reaproveita o cache do cliente enquanto o produto não mudar.
     """
-    cookie_str = _build_cookie_header(cookies_origem)
-    all_variants = []
-    page_num = 1
-    used_auth_method = "none"
-
-    while True:
-        url = (
-            f"{origin_base}/admin/api/products/{product_id}/variants"
-            f"?sort=order&page[size]=50&page[number]={page_num}"
-        )
-
-        headers = {
-            "Accept": "application/json",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": f"{origin_base}/admin/products/product/{product_id}",
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/145.0.0.0 Safari/537.36"
-            ),
-        }
-
-        if cookie_str:
-            headers["Cookie"] = cookie_str
-            used_auth_method = "cookie"
-        elif token:
-            headers["Authorization"] = token
-            used_auth_method = "token"
-
-        try:
-            resp = page.request.get(url, headers=headers, timeout=20_000)
-
-            if resp.status in (401, 403) and used_auth_method == "cookie" and token:
-                # tentar com token se cookie negado
-                headers.pop("Cookie", None)
-                headers["Authorization"] = token
-                used_auth_method = "token"
-                resp = page.request.get(url, headers=headers, timeout=20_000)
-
-            if resp.status == 401:
-                logger.warning(
-                    "⚠️ [PATCH-A] 401 Unauthorized — autenticação falhou (produto %s)", product_id
-                )
-                break
-
-            if resp.status == 403:
-                logger.warning(
-                    "⚠️ [PATCH-A] 403 Forbidden — sem permissão para variants (produto %s)", product_id
-                )
-                break
-
-            if resp.status != 200:
-                logger.warning(
-                    "⚠️ [PATCH-A] fetch_origin_variants_full produto %s pág %d: status %d",
-                    product_id, page_num, resp.status,
-                )
-                break
-
-            # Verificar se caiu na página de login (redirect HTML)
-            content_type = resp.headers.get("content-type") or ""
-            if "application/json" not in content_type:
-                logger.warning(
-                    "⚠️ [PATCH-A] Resposta não-JSON (content-type: %s) — possível redirect para login (produto %s)",
-                    content_type, product_id,
-                )
-                break
-
-            data = resp.json()
-            items = data.get("data") or []
-            if not items:
-                break
-
-            all_variants.extend(items)
-
-            # Paginação
-            paging = data.get("paging") or {}
-            total = int(paging.get("total") or 0)
-            total_pages = max(1, (total + 49) // 50)
-
-            if page_num >= total_pages:
-                break
-
-            page_num += 1
-            time.sleep(random.uniform(0.25, 0.6))
-
-        except Exception as exc:
-            logger.warning(
-                "⚠️ [PATCH-A] Erro fetch_origin_variants_full produto %s pág %d: %s",
-                product_id, page_num, exc,
-            )
-            break
-
-    if all_variants:
-        # Log resumido: quantas têm SKU / PropertyValue data útil
-        try:
-            from .domain import _extract_sku_items_from_variant
-        except Exception:
-            _extract_sku_items_from_variant = lambda v: []
-        with_sku = sum(1 for v in all_variants if _extract_sku_items_from_variant(v))
-        # contar quantas têm PropertyValue ids detectáveis
-        with_pv = sum(1 for v in all_variants if extract_property_value_ids_from_variant(v))
-        logger.info(
-            "📦 [PATCH-A] Origem produto %s: %d variações carregadas (%d com SKU, %d com PV ids, %d só IDs)",
-            product_id,
-            len(all_variants),
-            with_sku,
-            with_pv,
-            len(all_variants) - with_pv,
-        )
-    else:
-        logger.warning("⚠️ [PATCH-A] Nenhuma variação retornada para produto %s", product_id)
-
-    logger.info("🔐 [PATCH-A] método autenticação usado para variants: %s", used_auth_method)
-    return all_variants
+    client = get_origin_variant_client(origin_base, cookies_origem, token)
+    variants = client.get_variants(page, product_id, fingerprint=fingerprint, logger=logger)
+    if not variants:
+        logger.warning("⚠️ Nenhuma variação retornada para produto %s", product_id)
+    return variants
 
 
 def fetch_origin_variant_details(
@@ -288,70 +180,13 @@ def fetch_origin_variant_details(
 ) -> dict:
     """
     Busca detalhes completos de UMA variação da origem (com type/value).
-    Tenta endpoint provável: /admin/api/products/{product_id}/variants/{variant_id}
-    Se retornar 404, tenta /admin/api/variants/{variant_id} como fallback.
-    Retorna o objeto variant (ou {} em erro).
+    Tenta /admin/api/products/{product_id}/variants/{variant_id} e, se 404,
+    /admin/api/variants/{variant_id}. Retorna o objeto variant (ou {} em erro).
+    Para várias variações use OriginVariantClient.fetch_details (em lote).
     """
-    cookie_str = _build_cookie_header(cookies_origem)
-    headers = {
-        "Accept": "application/json",
-        "X-Requested-With": "XMLHttpRequest",
-        "Referer": f"{origin_base}/admin/products/{product_id}/edit",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-    }
-    if cookie_str:
-        headers["Cookie"] = cookie_str
-    if token:
-        headers["Authorization"] = token
-
-    urls = [
-        f"{origin_base}/admin/api/products/{product_id}/variants/{variant_id}",
-        f"{origin_base}/admin/api/variants/{variant_id}",
-    ]
-
-    for url in urls:
-        try:
-            resp = page.request.get(url, headers=headers, timeout=15_000)
-            if resp.status == 404:
-                logger.debug("GET variant %s returned 404 for url %s", variant_id, url)
-                continue
-            if resp.status != 200:
-                logger.warning("GET variant %s falhou (url=%s): %d", variant_id, url, resp.status)
-                continue
-
-            content_type = resp.headers.get("content-type") or ""
-            if "application/json" not in content_type:
-                logger.warning("GET variant %s resposta não-JSON (url=%s): %s", variant_id, url, content_type)
-                return {}
-
-            data = resp.json()
-            variant_data = data.get("data") or data
-
-            # Tentar extrair sku/property values
-            sku = variant_data.get("Sku") or variant_data.get("sku") or []
-            if sku:
-                logger.info("   → Variant %s: sku encontrado com %d itens", variant_id, len(sku))
-                return {"sku": sku}
-
-            pv = variant_data.get("PropertyValue") or variant_data.get("PropertyValues") or []
-            if pv:
-                logger.info("   → Variant %s: PropertyValues encontrado com %d itens", variant_id, len(pv))
-                return {"PropertyValue": pv}
-
-            # Se não encontrarmos os formatos esperados, retornar raw
-            logger.warning("   → Variant %s: sem sku nem PropertyValue (url=%s)", variant_id, url)
-            return variant_data
-
-        except Exception as e:
-            logger.error("Erro fetch variant %s (url=%s): %s", variant_id, url, e)
-            continue
+    client = get_origin_variant_client(origin_base, cookies_origem, token)
+    return client.fetch_details(page, product_id, [variant_id], logger).get(str(variant_id), {})
 
-    return {}
-
-
-# ══════════════════════════════════════════════════════════════════════════════
-# [PATCH-B] fetch_origin_auth_token — NOVO (melhorado: tenta múltiplas URLs)
-# ══════════════════════════════════════════════════════════════════════════════
 
 def fetch_origin_auth_token(
     page: Page,
@@ -361,7 +196,17 @@ def fetch_origin_auth_token(
     logger,
 ) -> str:
     """
-    [PATCH-B] Intercepta o Bearer token que a página de edição da ORIGEM usa.
+    [PATCH-B] Bearer token da ORIGEM pelo gerenciador de tokens da loja; só
+    navega para interceptar (_capture_origin_token) se não houver um válido.
+    """
+    return get_token_manager(origin_base).get(
+        page, refresh=lambda p: _capture_origin_token(p, origin_base, product_id, logger),
+    )
+
+
+def _capture_origin_token(page: Page, origin_base: str, product_id: str, logger) -> str:
+    """
+    Intercepta o Bearer token que a página de edição da ORIGEM usa.
     Tenta navegar para vários caminhos comuns da área administrativa.
     """
     found_token: list = []
@@ -473,48 +318,158 @@ def put_product(
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# Additional Info Catalog (sem alterações)
+# Variações do DESTINO (listagem paginada + exclusão concorrente)
 # ══════════════════════════════════════════════════════════════════════════════
 
-def fetch_all_additional_infos(
-    page: Page, token: str, logger
-) -> Dict[str, str]:
-    info_map: Dict[str, str] = {}
-    page_num = 1
-
-    while True:
-        url = (
-            f"{DESTINO_BASE}/admin/api/additional-info"
-            f"?sort=id&page[size]=25&page[number]={page_num}"
+def get_destino_variants(
+    page: Page, product_id: str, token: str, logger
+) -> Tuple[List[dict], dict]:
+    """
+    Todas as variações do produto no DESTINO.
+    Retorna (variações, info da paginação: total/pages/failed_pages/complete).
+    """
+    url = f"{DESTINO_BASE}/admin/api/products/{product_id}/variants"
+    variants, info = fetch_paged_json(
+        page, url, headers=api_headers(token),
+        page_size=DESTINO_VARIANTS_PAGE_SIZE, concurrency=DESTINO_VARIANTS_CONCURRENCY,
+        sort="order",
+    )
+    if not info["complete"]:
+        logger.warning(
+            "Listagem de variações do produto %s incompleta: %d/%d (páginas com falha: %s)",
+            product_id, len(variants), info["total"], info["failed_pages"],
         )
-        try:
-            resp = page.request.get(url, headers=api_headers(token))
-            if resp.status != 200:
-                logger.warning(
-                    "Falha GET additional-info pág %d: status %d",
-                    page_num, resp.status,
+    return variants, info
+
+
+def _variant_delete_url(variant_id: str) -> str:
+    return f"{DESTINO_BASE}/admin/api/products-variants/{variant_id}"
+
+
+def delete_variants(
+    page: Page, variant_ids: List[str], token: str, logger, product_id: Optional[str] = None
+) -> Dict[str, object]:
+    """
+    Exclui várias variações com concorrência limitada. 404/410 vão para
+    "already_gone" (separado de "deleted"): com product_id, a listagem é relida
+    e os ids que continuam lá entram em "failed" — um 404 de endpoint errado
+    não passa por sucesso. Retorna um resultado agregado:
+      {"total", "deleted", "already_gone", "failed": [{"id", "status", "error"}],
+       "confirmed", "elapsed_s"}
+    confirmed = True só se a releitura mostrou todos os ids fora do produto.
+    """
+    ids = list(dict.fromkeys(str(v) for v in variant_ids if str(v or "").strip()))
+    result: Dict[str, object] = {
+        "total": len(ids), "deleted": 0, "already_gone": 0, "failed": [], "confirmed": False, "elapsed_s": 0.0,
+    }
+    if not ids:
+        result["confirmed"] = True
+        return result
+
+    started = time.monotonic()
+    specs = [
+        {"url": _variant_delete_url(vid), "method": "DELETE", "headers": api_headers(token)}
+        for vid in ids
+    ]
+    responses = fetch_many(page, specs, concurrency=DESTINO_VARIANTS_CONCURRENCY)
+
+    removed: List[str] = []
+    for vid, res in zip(ids, responses):
+        status = res["status"]
+        if status in (200, 202, 204):
+            result["deleted"] += 1
+            removed.append(vid)
+        elif status in (404, 410):
+            result["already_gone"] += 1
+            removed.append(vid)
+        else:
+            result["failed"].append({"id": vid, "status": status, "error": res["error"] or res["text"][:200]})
+
+    if product_id and removed:
+        remaining, info = get_destino_variants(page, product_id, token, logger)
+        if info["complete"]:
+            still = {str(v.get("id") or v.get("variant_id") or "") for v in remaining} & set(removed)
+            for vid in removed:
+                if vid in still:
+                    result["failed"].append({"id": vid, "status": "ainda_presente", "error": "variação continua listada"})
+            if still:
+                logger.error(
+                    "❌ %d variações ainda listadas após DELETE aceito/404 (produto %s) — endpoint de exclusão?",
+                    len(still), product_id,
                 )
-                break
-            data  = resp.json()
-            items = data.get("data", [])
-            if not items:
-                break
+            result["confirmed"] = not result["failed"]
 
-            for item in items:
-                name    = (item.get("custom_name") or item.get("name") or "").strip()
-                info_id = item.get("id")
-                if name and info_id:
-                    info_map[normalize(name)] = str(info_id)
+    result["elapsed_s"] = round(time.monotonic() - started, 2)
+    logger.info(
+        "🗑️ Variações: %d excluídas, %d já removidas (404/410), %d falhas%s (%.1fs)",
+        result["deleted"], result["already_gone"], len(result["failed"]),
+        " — confirmado pela listagem" if result["confirmed"] else "",
+        result["elapsed_s"],
+    )
+    for fail in result["failed"]:
+        logger.warning("    Falha excluindo variação %s: status=%s %s", fail["id"], fail["status"], fail["error"])
+    return result
 
-            total       = data.get("paging", {}).get("total", 0)
-            total_pages = max(1, (total + 24) // 25)
-            if page_num >= total_pages:
-                break
-            page_num += 1
-            time.sleep(random.uniform(0.3, 0.6))
-        except Exception as exc:
-            logger.warning("Erro additional-info pág %d: %s", page_num, exc)
-            break
+
+def delete_variant(page: Page, variant_id: str, token: str, logger) -> bool:
+    """Exclui uma variação (True também se ela já não existia)."""
+    return not delete_variants(page, [variant_id], token, logger)["failed"]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Additional Info Catalog
+# ══════════════════════════════════════════════════════════════════════════════
+
+ADDITIONAL_INFO_API = f"{DESTINO_BASE}/admin/api/additional-info"
+
+
+def list_additional_info_items(page: Page, token: str, logger) -> List[dict]:
+    """Itens crus de /admin/api/additional-info (páginas grandes, em paralelo)."""
+    items, info = fetch_paged_json(
+        page,
+        ADDITIONAL_INFO_API,
+        headers=api_headers(token),
+        page_size=ADDITIONAL_INFO_PAGE_SIZE,
+        concurrency=ADDITIONAL_INFO_CONCURRENCY,
+    )
+    if not info["complete"]:
+        logger.warning(
+            "Listagem additional-info incompleta: %d/%d itens (páginas com falha: %s)",
+            len(items), info["total"], info["failed_pages"],
+        )
+    return items
+
+
+def additional_info_entry(item: dict) -> Optional[dict]:
+    """Item da API → {"id", "name", "option_map"} (chaves normalizadas)."""
+    name    = (item.get("custom_name") or item.get("name") or "").strip()
+    item_id = item.get("id")
+    if not name or not item_id:
+        return None
+
+    option_map: Dict[str, str] = {}
+    options = item.get("options")
+    if isinstance(options, dict):
+        options = list(options.values())
+    for option in options if isinstance(options, list) else []:
+        if not isinstance(option, dict):
+            continue
+        option_name = (option.get("name") or "").strip()
+        option_id   = option.get("id")
+        if option_name and option_id:
+            option_map[normalize(option_name)] = str(option_id)
+
+    return {"id": str(item_id), "name": name, "option_map": option_map}
+
+
+def fetch_all_additional_infos(
+    page: Page, token: str, logger
+) -> Dict[str, str]:
+    info_map: Dict[str, str] = {}
+    for item in list_additional_info_items(page, token, logger):
+        entry = additional_info_entry(item)
+        if entry:
+            info_map[normalize(entry["name"])] = entry["id"]
 
     logger.info(
         "📋 Catálogo de infos adicionais DESTINO: %d entradas", len(info_map)
@@ -526,70 +481,10 @@ def fetch_all_additional_infos_catalog(
     page: Page, token: str, logger
 ) -> Dict[str, dict]:
     catalog: Dict[str, dict] = {}
-    page_num = 1
-
-    while True:
-        url = (
-            f"{DESTINO_BASE}/admin/api/additional-info"
-            f"?sort=id&page[size]=25&page[number]={page_num}"
-        )
-        try:
-            resp = page.request.get(url, headers=api_headers(token))
-            if resp.status != 200:
-                logger.warning(
-                    "Falha GET additional-info catálogo pág %d: status %d",
-                    page_num, resp.status,
-                )
-                break
-
-            data  = resp.json()
-            items = data.get("data", [])
-            if not items:
-                break
-
-            for item in items:
-                name    = (item.get("custom_name") or item.get("name") or "").strip()
-                item_id = item.get("id")
-                if not name or not item_id:
-                    continue
-
-                option_map: Dict[str, str] = {}
-                options = item.get("options")
-
-                if isinstance(options, list):
-                    for option in options:
-                        if not isinstance(option, dict):
-                            continue
-                        option_name = (option.get("name") or "").strip()
-                        option_id   = option.get("id")
-                        if option_name and option_id:
-                            option_map[normalize(option_name)] = str(option_id)
-                elif isinstance(options, dict):
-                    for option in options.values():
-                        if not isinstance(option, dict):
-                            continue
-                        option_name = (option.get("name") or "").strip()
-                        option_id   = option.get("id")
-                        if option_name and option_id:
-                            option_map[normalize(option_name)] = str(option_id)
-
-                catalog[normalize(name)] = {
-                    "id":         str(item_id),
-                    "name":       name,
-                    "option_map": option_map,
-                }
-
-            total       = data.get("paging", {}).get("total", 0)
-            total_pages = max(1, (total + 24) // 25)
-            if page_num >= total_pages:
-                break
-            page_num += 1
-            time.sleep(random.uniform(0.3, 0.6))
-        except Exception as exc:
-            logger.warning(
-                "Erro additional-info catálogo pág %d: %s", page_num, exc
-            )
-            break
+    for item in list_additional_info_items(page, token, logger):
+        entry = additional_info_entry(item)
+        if entry:
+            catalog[normalize(entry["name"])] = entry
 
     logger.info(
         "📋 Catálogo rico de infos adicionais DESTINO: %d entradas", len(catalog)
@@ -623,27 +518,55 @@ def _extract_origin_token(page: Page) -> str:
     return token
 
 
-def get_origin_product_details(page: Page, origin_base: str, product_id: str, cookies_origem, logger) -> Optional[dict]:
-    """Tenta obter o JSON do produto na ORIGEM via API (usa token extraído do localStorage)."""
-    try:
+def _origin_token(page: Page, origin_base: str, product_id: str) -> str:
+    """Token da ORIGEM; a tela de edição só é aberta quando nenhuma fonte sem navegação serve."""
+    def _refresh(p: Page) -> str:
         try:
-            page.goto(f"{origin_base}/admin/products/{product_id}/edit", wait_until="domcontentloaded", timeout=12000)
+            p.goto(f"{origin_base}/admin/products/{product_id}/edit", wait_until="domcontentloaded", timeout=12000)
         except Exception:
             try:
-                page.goto(f"{origin_base}/admin/products/{product_id}/edit", wait_until="networkidle", timeout=20000)
+                p.goto(f"{origin_base}/admin/products/{product_id}/edit", wait_until="networkidle", timeout=20000)
             except Exception:
                 pass
+        return _extract_origin_token(p)
+
+    return get_token_manager(origin_base).get(page, refresh=_refresh)
+
+
+def _origin_api_call(page: Page, origin_base: str, product_id: str, headers: dict, send):
+    """
+    Chama `send(headers)` com o token da ORIGEM. Em 401/403 invalida o token,
+    pede outro (o recusado fica de fora, então o refresh navega) e tenta UMA
+    vez mais. Devolve a resposta da última tentativa.
+    """
+    token = _origin_token(page, origin_base, product_id)
+    for attempt in (1, 2):
+        call_headers = dict(headers)
+        if token:
+            call_headers["Authorization"] = token
+        resp = send(call_headers)
+        if resp.status not in (401, 403) or not token:
+            return resp
+        get_token_manager(origin_base).invalidate(token)
+        if attempt == 2:
+            return resp
+        fresh = _origin_token(page, origin_base, product_id)
+        if not fresh or fresh == token:
+            return resp
+        _logger.info("🔑 ORIGEM recusou o token (%d) — repetindo com token renovado", resp.status)
+        token = fresh
+    return resp
+
 
-        token = _extract_origin_token(page)
+def get_origin_product_details(page: Page, origin_base: str, product_id: str, cookies_origem, logger) -> Optional[dict]:
+    """Tenta obter o JSON do produto na ORIGEM via API (usa token extraído do localStorage)."""
+    try:
         headers = {
             "Accept": "application/json",
             "X-Requested-With": "XMLHttpRequest",
         }
-        if token:
-            headers["Authorization"] = token
-
         url = f"{origin_base}/admin/api/products/{product_id}"
-        resp = page.request.get(url, headers=headers)
+        resp = _origin_api_call(page, origin_base, product_id, headers, lambda h: page.request.get(url, headers=h))
         if resp.status != 200:
             logger.warning("GET ORIGEM product %s falhou: status %d", product_id, resp.status)
             return None
@@ -658,22 +581,13 @@ def get_origin_product_details(page: Page, origin_base: str, product_id: str, co
 def put_origin_additional_infos(page: Page, origin_base: str, product_id: str, additional_infos: list, cookies_origem, logger) -> Tuple[bool, int, str]:
     """Atualiza o produto na ORIGEM definindo o campo AdditionalInfos (PUT /admin/api/products/{id})."""
     try:
-        try:
-            page.goto(f"{origin_base}/admin/products/{product_id}/edit", wait_until="domcontentloaded", timeout=12000)
-        except Exception:
-            try:
-                page.goto(f"{origin_base}/admin/products/{product_id}/edit", wait_until="networkidle", timeout=20000)
-            except Exception:
-                pass
-
-        token = _extract_origin_token(page)
         headers = {"Accept": "application/json", "Content-Type": "application/json", "X-Requested-With": "XMLHttpRequest"}
-        if token:
-            headers["Authorization"] = token
-
         url = f"{origin_base}/admin/api/products/{product_id}"
         payload = {"data": {"AdditionalInfos": additional_infos}}
-        resp = page.request.put(url=url, data=json.dumps(payload), headers=headers)
+        resp = _origin_api_call(
+            page, origin_base, product_id, headers,
+            lambda h: page.request.put(url=url, data=json.dumps(payload), headers=h),
+        )
         body = ""
         try:
             body = resp.text()[:500]
@@ -691,74 +605,22 @@ def map_origin_variant_ids_to_properties(
     cookies_origem,
     logger,
 ) -> Dict[str, list]:
-    """Dado um conjunto de Variant/PropertyValue ids da ORIGEM, tenta mapear cada id
-    para a propriedade e nome do valor correspondente consultando
-    /admin/api/properties e /admin/api/properties/{id}.
+    """Dado um conjunto de Variant/PropertyValue ids da ORIGEM, mapeia cada id
+    para a propriedade e nome do valor correspondente pelo índice persistente
+    (property_index), montado a partir de /admin/api/properties e /admin/api/properties/{id}.
 
     Nota: variant_ids aqui pode ser uma lista de PropertyValue IDs (recomendado).
     Retorna: { normalized_property_name: [value_name, ...], ... }
     """
-    mapping: Dict[str, list] = {}
     if not variant_ids:
-        return mapping
-
+        return {}
     try:
-        # navegar para extrair token (opcional)
-        try:
-            page.goto(f"{origin_base}/admin/products/1/edit", wait_until="domcontentloaded", timeout=8000)
-        except Exception:
-            pass
-
-        token = _extract_origin_token(page)
-        headers = {"Accept": "application/json", "X-Requested-With": "XMLHttpRequest"}
-        if token:
-            headers["Authorization"] = token
-
-        # obter propriedades (page[size] grande para trazer todas)
-        props_url = f"{origin_base}/admin/api/properties?sort=name&page[size]=9999"
-        try:
-            resp = page.request.get(props_url, headers=headers, timeout=45000)
-            if resp.status != 200:
-                logger.warning("Falha GET origin properties: status %d", resp.status)
-                return mapping
-            data = resp.json()
-            properties = data.get("data", [])
-        except Exception as exc:
-            logger.warning("Erro GET origin properties: %s", exc)
-            return mapping
-
-        # Preparar set para buscas rápidas
-        id_set = {str(i) for i in variant_ids}
-
-        # Para cada property, obter seus valores e verificar ids
-        for prop in properties:
-            prop_id = str(prop.get("id") or "")
-            prop_name = prop.get("name") or ""
-            if not prop_id:
-                continue
-            try:
-                purl = f"{origin_base}/admin/api/properties/{prop_id}"
-                presp = page.request.get(purl, headers=headers, timeout=30000)
-                if presp.status != 200:
-                    continue
-                pbody = presp.json()
-                pv_list = (pbody.get("data") or {}).get("PropertyValues") or []
-                for pv in pv_list:
-                    vid = str(pv.get("id") or "")
-                    vname = pv.get("name") or ""
-                    if vid and vid in id_set:
-                        norm = normalize(prop_name)
-                        mapping.setdefault(norm, [])
-                        if vname and vname not in mapping[norm]:
-                            mapping[norm].append(vname)
-            except Exception:
-                continue
-
-        logger.info("🔎 Mapeamento VariantIDs→properties: %d campos encontrados", len(mapping))
-        return mapping
+        mapping = get_property_index(origin_base).resolve(page, variant_ids, logger)
     except Exception as exc:
         logger.warning("Erro mapeando variant ids na origem: %s", exc)
-        return mapping
+        return {}
+    logger.info("🔎 Mapeamento VariantIDs→properties: %d campos encontrados", len(mapping))
+    return mapping
 
 
 def _post_form_urlencoded(
@@ -883,56 +745,69 @@ def ensure_additional_info_with_options(
     option_names: List[str],
     logger,
     field_type: str = "S",
+    catalog=None,
 ) -> Optional[dict]:
     """
     Garante que exista um campo AdditionalInfo com as opções desejadas no DESTINO.
     field_type: "S"=select, "T"=textarea/text, "I"=input
+    catalog: AdditionalInfoCatalog da execução (carregado uma vez e atualizado
+    localmente); sem ele, um catálogo temporário é carregado.
     Retorna o dict { "id": "...", "name": "...", "option_map": {...} } do catálogo final,
     ou None se falhar.
     """
+    if catalog is None:
+        from .info_catalog import AdditionalInfoCatalog
+        catalog = AdditionalInfoCatalog(logger=logger)
+
     try:
-        catalog = fetch_all_additional_infos_catalog(page, token, logger=logger)
-        normalized_name = normalize(info_name)
-        info = catalog.get(normalized_name)
-
-        if info:
-            # verificar opções faltantes e criar se necessário (pular se textual)
-            missing = []
-            for opt in option_names:
-                if normalize(opt) not in info.get("option_map", {}):
-                    missing.append(opt)
-            if missing and field_type != "T":
+        catalog.ensure_loaded(page, token)
+        # check-e-cria serializado por campo: workers com o mesmo campo/opção novos
+        # não criam em dobro, e o lock só é liberado com o catálogo já atualizado
+        with catalog.name_lock(info_name):
+            info = catalog.get(info_name)
+
+            if not info and catalog.is_field_pending(info_name):
+                # criado antes nesta execução, mas o id ainda não tinha aparecido
+                info = catalog.find_new_field(page, token, info_name)
+                if not info:
+                    logger.warning("Campo '%s' já criado nesta execução e ainda fora do catálogo — não recriando", info_name)
+                    return None
+
+            if not info:
+                # se não existe, criar campo (respeitando field_type) e descobrir só o novo id
+                created_field = _create_additional_info_field(page, info_name, logger, field_type=field_type)
+                if not created_field:
+                    logger.warning("Não foi possível criar campo additional info '%s' (tipo=%s)", info_name, field_type)
+                    return None
+                catalog.mark_field_pending(info_name)
+                info = catalog.find_new_field(page, token, info_name)
+                if not info:
+                    logger.warning("Campo criado mas não encontrado no catálogo após criação: %s", info_name)
+                    return None
+
+            if field_type == "T":
+                return info
+
+            pending = catalog.pending_options(info["id"])
+            if pending:
+                # opções criadas antes sem id lido: relê antes de decidir o que falta
+                info = catalog.refresh_field(page, token, info["id"]) or info
+                pending = catalog.pending_options(info["id"])
+
+            # criar opções ausentes
+            option_map = info.get("option_map", {})
+            missing = [
+                opt for opt in dict.fromkeys(option_names)
+                if normalize(opt) not in option_map and normalize(opt) not in pending
+            ]
+            if missing:
                 logger.info("Opções faltando para '%s': %s", info_name, missing)
-                for opt in missing:
-                    created = _create_additional_info_option(page, info["id"], opt, logger)
-                    if created:
-                        # atualizar o catálogo localmente
-                        info["option_map"][normalize(opt)] = "unknown"
-                # Não garantimos IDs das opções criadas aqui; usuário pode reconsultar catálogo
-            return info
-
-        # se não existe, criar campo + opções (respeitando field_type)
-        created_field = _create_additional_info_field(page, info_name, logger, field_type=field_type)
-        if not created_field:
-            logger.warning("Não foi possível criar campo additional info '%s' (tipo=%s)", info_name, field_type)
-            return None
-
-        # após criar, recarregar catálogo e tentar mapear opções
-        catalog = fetch_all_additional_infos_catalog(page, token, logger=logger)
-        info = catalog.get(normalized_name)
-        if not info:
-            logger.warning("Campo criado mas não encontrado no catálogo após criação: %s", info_name)
-            return None
-
-        # criar opções ausentes explicitamente (pular criação de opções quando textual)
-        if field_type != "T":
-            for opt in option_names:
-                if normalize(opt) not in info.get("option_map", {}):
-                    _create_additional_info_option(page, info["id"], opt, logger)
-
-        # recarregar final
-        catalog = fetch_all_additional_infos_catalog(page, token, logger=logger)
-        return catalog.get(normalized_name)
+                created = [opt for opt in missing if _create_additional_info_option(page, info["id"], opt, logger)]
+                if created:
+                    # ids das opções novas: relê só este campo; até lá ficam pendentes
+                    catalog.mark_options_pending(info["id"], created)
+                    info = catalog.refresh_field(page, token, info["id"]) or catalog.get(info_name)
+        return info
     except Exception as exc:
         logger.warning("Erro ensure_additional_info_with_options para %s: %s", info_name, exc)
         return None
@@ -940,16 +815,42 @@ def ensure_additional_info_with_options(
 
 # ====================== UTILITÁRIOS DE LEITURA DO PRODUTO ATUAL ======================
 
+def linked_info_ids(product_json) -> List[str]:
+    """Ids de Additional Info vinculados, a partir do JSON de /admin/api/products/{id}."""
+    results: List[str] = []
+    if not isinstance(product_json, dict):
+        return results
+    p = product_json.get("data") or product_json
+    if not isinstance(p, dict):
+        return results
+    # possíveis lugares onde os AdditionalInfos aparecem
+    candidates = [
+        p.get("AdditionalInfos"),
+        p.get("additional_infos"),
+        p.get("AdditionalProductInfo"),
+        (p.get("data") or {}).get("AdditionalInfos") if isinstance(p.get("data"), dict) else None,
+    ]
+    for cand in candidates:
+        if isinstance(cand, list):
+            for it in cand:
+                if isinstance(it, dict) and it.get("id"):
+                    results.append(str(it.get("id")))
+                elif isinstance(it, (str, int)):
+                    results.append(str(it))
+    return results
+
+
 def get_product_current_infos(
     page: Page,
     product_id: str,
-    logger
+    logger,
+    allow_dom_fallback: bool = True,
 ) -> List[str]:
     """
     Tenta recuperar os Additional Info IDs atualmente vinculados ao produto no DESTINO.
     Estratégia:
       1) Tenta chamada API GET /admin/api/products/{product_id} sem token (usa sessão do page)
-      2) Se falhar, carrega a página de edição e tenta extrair inputs selected_items via DOM
+      2) Se falhar (e allow_dom_fallback), lê selected_items do formulário de edição
     Retorna lista de ids (strings).
     """
     results: List[str] = []
@@ -958,58 +859,19 @@ def get_product_current_infos(
         try:
             resp = page.request.get(url, headers={"Accept": "application/json", "X-Requested-With": "XMLHttpRequest"}, timeout=15000)
             if resp.status == 200:
-                data = resp.json()
-                p = data.get("data") or data
-                # possíveis lugares onde os AdditionalInfos aparecem
-                candidates = [
-                    p.get("AdditionalInfos"),
-                    p.get("additional_infos"),
-                    p.get("AdditionalProductInfo"),
-                    (p.get("data") or {}).get("AdditionalInfos") if isinstance(p.get("data"), dict) else None,
-                ]
-                for cand in candidates:
-                    if isinstance(cand, list):
-                        for it in cand:
-                            if isinstance(it, dict) and it.get("id"):
-                                results.append(str(it.get("id")))
-                            elif isinstance(it, (str, int)):
-                                results.append(str(it))
+                results = linked_info_ids(resp.json())
                 if results:
                     return results
         except Exception as e:
             logger.debug("get_product_current_infos: API GET falhou: %s", e)
 
-        # fallback: tentar extrair via DOM na página de edição
-        try:
-            edit_url = f"{DESTINO_BASE}/mvc/adm/additional_product_info/additional_product_info/edit/{product_id}"
-            page.goto(edit_url, wait_until="domcontentloaded", timeout=15000)
-        except Exception:
-            try:
-                page.goto(f"{DESTINO_BASE}/admin/products/{product_id}/edit", wait_until="domcontentloaded", timeout=15000)
-            except Exception:
-                pass
+        if not allow_dom_fallback:
+            return results
 
-        # avaliar inputs selected_items ou campos hidden que indiquem selecionados
-        try:
-            vals = page.evaluate(
-                """() => {
-                    const out = [];
-                    // inputs com name starting selected_items
-                    document.querySelectorAll('input[name^="selected_items"]').forEach(n => {
-                        if (n.value) out.push(n.value);
-                    });
-                    // selects / checkboxes com classe ou data attribute comum
-                    document.querySelectorAll('select, input[type="checkbox"]').forEach(n => {
-                        const name = n.getAttribute && n.getAttribute('name');
-                        if (name && name.startsWith('selected_items') && n.value) out.push(n.value);
-                    });
-                    return out;
-                }"""
-            )
-            if isinstance(vals, list) and vals:
-                return [str(v) for v in vals if v]
-        except Exception as e:
-            logger.debug("get_product_current_infos: DOM extraction failed: %s", e)
+        # fallback: selected_items do formulário de edição (HTML via HTTP; render se preciso)
+        form = get_edit_form(page, product_id, logger)
+        if form and form.get("ids"):
+            return [str(v) for v in form["ids"] if v]
 
     except Exception as exc:
         logger.warning("Erro get_product_current_infos: %s", exc)
@@ -1019,6 +881,82 @@ def get_product_current_infos(
 
 # ====================== POST / EDIT: post_additional_infos (VERSÃO ROBUSTA) ======================
 
+def _post_cleanup_form(
+    page: Page,
+    edit_url: str,
+    product_id: str,
+    info_ids_to_link: List[str],
+    sort_entries: Optional[List[str]],
+    csrf_token: Optional[str],
+) -> None:
+    """POST de limpeza: mesmos campos, nenhuma opção marcada."""
+    clean_payload = {
+        "_method": "POST",
+        "id_produto": str(product_id),
+        "data[AdditionalProductInfo][herda_prazo]": "0",
+        "data[AdditionalProductInfo][prazo]": "0",
+        "commit": "Salvar",
+        "action": "edit",
+    }
+    for i, sid in enumerate(info_ids_to_link):
+        clean_payload[f"selected_items[{i}]"] = str(sid)
+    for i, s in enumerate(sort_entries or []):
+        clean_payload[f"sort[{i}]"] = s
+    if csrf_token:
+        clean_payload["_token"] = csrf_token
+
+    clean_body = urlencode(clean_payload, doseq=True, encoding='utf-8', errors='replace')
+
+    try:
+        clean_result = post_form(page, edit_url, clean_body)
+        if clean_result.get("error"):
+            _logger.warning("Erro durante POST de limpeza: %s", clean_result["error"])
+        else:
+            _logger.info(
+                "Resultado limpeza: status=%s ok=%s snippet_len=%d",
+                clean_result.get("status", 0), clean_result.get("ok"), len(clean_result.get("snippet") or ""),
+            )
+    except Exception as e:
+        _logger.warning("Erro durante POST de limpeza: %s", e)
+
+
+def wait_for_linked_infos(
+    page: Page,
+    product_id: str,
+    expected_ids: List[str],
+    logger=None,
+    timeout_s: float = INFOS_VERIFY_TIMEOUT_S,
+    initial_interval_s: float = INFOS_VERIFY_INITIAL_S,
+    max_interval_s: float = INFOS_VERIFY_MAX_INTERVAL_S,
+) -> Tuple[bool, List[str]]:
+    """
+    Consulta os campos vinculados (API, sem navegação) com backoff exponencial
+    até bater com expected_ids ou estourar timeout_s. Se não bater, faz uma
+    última leitura com fallback de DOM. Retorna (confere, ids_observados).
+    """
+    logger = logger or _logger
+    expected = {str(x) for x in expected_ids or []}
+    deadline = time.monotonic() + max(0.0, timeout_s)
+    interval = max(0.05, initial_interval_s)
+    attempt = 0
+
+    while True:
+        attempt += 1
+        atuais = get_product_current_infos(page, product_id, logger, allow_dom_fallback=False)
+        if {str(x) for x in atuais} == expected:
+            logger.info("Vínculos confirmados na tentativa %d", attempt)
+            return True, atuais
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval_s)
+
+    # a API pode não expor os vínculos → última leitura permitindo DOM
+    atuais = get_product_current_infos(page, product_id, logger, allow_dom_fallback=True)
+    return {str(x) for x in atuais} == expected, atuais
+
+
 def post_additional_infos(
     page: Page,
     product_id: str,
@@ -1026,121 +964,53 @@ def post_additional_infos(
     short_delay,
     sort_entries: Optional[List[str]] = None,
     option_info_entries: Optional[List[str]] = None,
+    verify: bool = True,
 ) -> Tuple[bool, str]:
     """
     Envia POST para vincular Additional Infos no DESTINO (Tray).
-    - Extrai CSRF token da página de edição
+    verify=False devolve logo após o POST aceito ("VERIFICACAO_ADIADA") —
+    a conferência fica para a etapa em lote (InfosVerifier).
+    - Extrai CSRF token do HTML da página de edição (renderiza só em fallback)
     - Monta payload idêntico ao form real
-    - Usa evaluate/fetch para simular envio do navegador
-    - Valida pós-envio com reload e reconsulta
+    - Usa fetch na página (mesma origem) ou page.request para simular envio do navegador
+    - Pula a limpeza quando não há opção marcada a desmarcar
+    - Valida pós-envio com polling (backoff exponencial, com teto)
     """
-    edit_url = (
-        f"{DESTINO_BASE}/mvc/adm/additional_product_info/"
-        f"additional_product_info/edit/{product_id}"
-    )
-
-    _logger.info("Acessando página de edição para extrair CSRF e contexto: %s", edit_url)
+    edit_url = edit_form_url(product_id)
 
     try:
-        # 1. Carrega a página de edição (necessário para CSRF e sessão)
-        response = page.goto(edit_url, wait_until="networkidle", timeout=45000)
-        short_delay()  # espera JS carregar
-
-        if not response or (hasattr(response, "status") and response.status != 200):
-            _logger.error(
-                "Falha ao carregar página de edição: status %s",
-                response.status if response and hasattr(response, "status") else "sem response",
-            )
+        # 1. Contexto do formulário (CSRF + estado atual): HTML via HTTP, render só em fallback
+        form = get_edit_form(page, product_id, _logger, short_delay=short_delay)
+        if form is None:
             return False, "Falha carregando página de edição"
 
-        # 2. Extrai CSRF token (os dois nomes mais comuns no Tray/Laravel)
-        csrf_token = None
-        for selector in [
-            'input[name="_token"]',
-            'input[name="__RequestVerificationToken"]',
-            'meta[name="csrf-token"]',
-        ]:
-            try:
-                elem = page.locator(selector).first
-                if elem.count() > 0:
-                    if selector.startswith('meta'):
-                        csrf_token = elem.get_attribute("content")
-                    else:
-                        csrf_token = elem.get_attribute("value")
-                    if csrf_token:
-                        _logger.info("🔒 CSRF token encontrado (%s): %s...", selector, str(csrf_token)[:20])
-                        break
-            except Exception:
-                continue
-
-        if not csrf_token:
-            _logger.warning("⚠️ Nenhum CSRF token encontrado na página — enviando sem (pode falhar)")
-
-        # 3. Monta payload de LIMPEZA (desmarcar todas as opções)
-        _logger.info("Enviando POST de limpeza para desmarcar opções existentes...")
-        clean_payload = {
-            "_method": "POST",
-            "id_produto": str(product_id),
-            "data[AdditionalProductInfo][herda_prazo]": "0",
-            "data[AdditionalProductInfo][prazo]": "0",
-            "commit": "Salvar",
-            "action": "edit",
-        }
-        for i, sid in enumerate(info_ids_to_link):
-            clean_payload[f"selected_items[{i}]"] = str(sid)
-        for i, s in enumerate(sort_entries or []):
-            clean_payload[f"sort[{i}]"] = s
+        csrf_token = form.get("csrf_token")
         if csrf_token:
-            clean_payload["_token"] = csrf_token
-
-        clean_body = urlencode(clean_payload, doseq=True, encoding='utf-8', errors='replace')
-
-        # enviar via fetch usando headers com charset
-        try:
-            clean_result = page.evaluate(
-                """
-                async ([url, body, origin]) => {
-                    try {
-                        const response = await fetch(url, {
-                            method: 'POST',
-                            headers: {
-                                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                                'X-Requested-With': 'XMLHttpRequest',
-                                'Referer': url,
-                                'Origin': origin
-                            },
-                            body: body,
-                            credentials: 'include',
-                            redirect: 'follow'
-                        });
-                        const text = await response.text();
-                        return {
-                            ok: response.ok,
-                            status: response.status,
-                            redirected: response.redirected,
-                            finalUrl: response.url,
-                            snippet: text.substring(0, 400)
-                        };
-                    } catch (err) {
-                        return { error: err.message };
-                    }
-                }
-                """,
-                [edit_url, clean_body, DESTINO_BASE.rstrip("/")],
-            )
-
-            if isinstance(clean_result, dict):
-                c_status = clean_result.get("status", 0)
-                _logger.info("Resultado limpeza: status=%s ok=%s snippet_len=%d", c_status, clean_result.get("ok"), len(clean_result.get("snippet") or ""))
-            else:
-                _logger.warning("Resultado inesperado na limpeza: %r", clean_result)
-        except Exception as e:
-            _logger.warning("Erro durante POST de limpeza: %s", e)
+            _logger.info("🔒 CSRF token encontrado (%s): %s...", form.get("source"), str(csrf_token)[:20])
+        else:
+            _logger.warning("⚠️ Nenhum CSRF token encontrado na página — enviando sem (pode falhar)")
 
-        # esperar propagation após limpeza (4-5s recomendado)
-        time.sleep(5)
+        # 2. Estado atual do formulário: a limpeza só é necessária se houver
+        #    opção marcada fora do desejado
+        desired_ids = [str(x) for x in info_ids_to_link or []]
+        desired_options = {str(x) for x in option_info_entries or []}
+        current_options = set(form.get("options") or [])
+        state_known = bool(form.get("has_state"))
+        # estado desconhecido (nenhum selected_items/option_info lido) → limpeza forçada
+        needs_cleanup = not state_known or bool(current_options - desired_options)
+        if not state_known:
+            _logger.warning("⚠️ Estado do formulário desconhecido — limpeza forçada")
+        elif current_options == desired_options and list(form.get("ids") or []) == desired_ids:
+            _logger.info("✅ Formulário já está no estado desejado — nenhum POST necessário")
+            return True, "status=200, ok=True, sem_alteracoes | VALIDADO_OK"
+
+        if needs_cleanup:
+            _logger.info("Enviando POST de limpeza para desmarcar opções existentes...")
+            _post_cleanup_form(page, edit_url, product_id, info_ids_to_link, sort_entries, csrf_token)
+        else:
+            _logger.info("⏭️ Nenhuma opção a desmarcar — POST de limpeza dispensado")
 
-        # 4. Monta payload PRINCIPAL (agora com opções corretas)
+        # 3. Monta payload PRINCIPAL (agora com opções corretas)
         payload = {
             "_method": "POST",
             "id_produto": str(product_id),
@@ -1175,49 +1045,11 @@ def post_additional_infos(
             len(option_info_entries or []),
         )
 
-        # Headers com charset explícito (usado dentro do evaluate abaixo)
-        headers_in_fetch = {
-            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-            'X-Requested-With': 'XMLHttpRequest',
-            'Referer': edit_url,
-            'Origin': DESTINO_BASE.rstrip("/")
-        }
-
-        # 5. Envia via fetch no evaluate (mantém cookies/sessão do Playwright)
-        result = page.evaluate(
-            """
-            async ([url, body, origin]) => {
-                try {
-                    const response = await fetch(url, {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
-                            'X-Requested-With': 'XMLHttpRequest',
-                            'Referer': url,
-                            'Origin': origin
-                        },
-                        body: body,
-                        credentials: 'include',
-                        redirect: 'follow'
-                    });
-                    const text = await response.text();
-                    return {
-                        ok: response.ok,
-                        status: response.status,
-                        redirected: response.redirected,
-                        finalUrl: response.url,
-                        snippet: text.substring(0, 400)
-                    };
-                } catch (err) {
-                    return { error: err.message };
-                }
-            }
-            """,
-            [edit_url, body_str, DESTINO_BASE.rstrip("/")],
-        )
+        # 4. Envia com a sessão do browser (fetch na página ou page.request)
+        result = post_form(page, edit_url, body_str)
 
-        if not isinstance(result, dict):
-            _logger.error("Resultado inesperado do evaluate/fetch: %r", result)
+        if not isinstance(result, dict) or result.get("error"):
+            _logger.error("Resultado inesperado do POST: %r", result)
             return False, "Resultado inesperado do fetch"
 
         status = result.get("status", 0)
@@ -1234,19 +1066,15 @@ def post_additional_infos(
 
         _logger.info("POST additional_infos → %s", detail)
 
-        # 6. Validação pós-envio (delay + reload + reconsulta)
-        if ok:
-            _logger.info("POST aparentemente aceito → aguardando propagação no Tray...")
-            time.sleep(6)  # Tray pode demorar para refletir no banco
-            try:
-                page.reload(wait_until="networkidle", timeout=20000)
-                time.sleep(3)
-            except Exception as e:
-                _logger.warning("Reload falhou: %s", str(e))
+        if ok and not verify:
+            return True, detail + " | VERIFICACAO_ADIADA"
 
+        # 5. Validação pós-envio (polling até refletir, com teto)
+        if ok:
+            _logger.info("POST aparentemente aceito → verificando propagação no Tray...")
             # Retorna True só se realmente salvou (evita falso-positivo)
             try:
-                atuais = get_product_current_infos(page, product_id, _logger)
+                confere, atuais = wait_for_linked_infos(page, product_id, info_ids_to_link, _logger)
             except Exception as e:
                 _logger.warning("Falha ao consultar infos atuais após POST: %s", e)
                 return False, detail + " | VALIDACAO_IMPOSSIVEL"
@@ -1255,7 +1083,7 @@ def post_additional_infos(
             atuais_set = {str(x) for x in (atuais or [])}
             esperado_set = {str(x) for x in (info_ids_to_link or [])}
 
-            if atuais_set == esperado_set:
+            if confere:
                 _logger.info("✅ Validação pós-POST: campos salvos corretamente (%d)", len(atuais_set))
                 return True, detail + " | VALIDADO_OK"
             else:
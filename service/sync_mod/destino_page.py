@@ -1,11 +1,17 @@
 # ========================== destino_page.py (VERSÃO V5 - MATCHING BATCH) ==========================
+import hashlib
 import os
-import re
-import unicodedata
+import threading
 from difflib import SequenceMatcher
 from typing import List, Optional, Tuple, Dict, Any
+from urllib.parse import quote
 from patchright.sync_api import Page
 
+from service.page_fetch import fetch_json_many
+from service.text_canon import canonical_name, canonical_names
+from service.token_manager import get_token_manager
+
+from . import config
 from .config import DESTINO_BASE
 
 ENCONTRADOS_PATH = os.path.join("produtos", "EncontradoseNãosincronizados.txt")
@@ -13,12 +19,16 @@ NAO_ENCONTRADOS_PATH = os.path.join("produtos", "NaoEncontrados.txt")
 ENCONTRADOS_SINCRONIZADOS_PATH = os.path.join("produtos", "EncontradoseSincronizados.txt")
 
 
+_LIVE_RESULT_LOCK = threading.Lock()
+
+
 def _append_live_result(file_path: str, nome: str) -> None:
     try:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, "a", encoding="utf-8") as f:
-            f.write(f"{nome.strip()}\n")
-            f.flush()
+        with _LIVE_RESULT_LOCK:
+            with open(file_path, "a", encoding="utf-8") as f:
+                f.write(f"{nome.strip()}\n")
+                f.flush()
     except Exception:
         pass
 
@@ -28,24 +38,19 @@ def append_encontrado_sincronizado(nome: str) -> None:
 
 
 def normalize_name(name: str) -> str:
-    if not name:
-        return ""
-    nfkd = unicodedata.normalize('NFKD', name)
-    name = ''.join(c for c in nfkd if not unicodedata.combining(c))
-    name = re.sub(r'\s+', ' ', name.lower().strip())
-    name = re.sub(r'\s+f\s+\d+\.?\d*', '', name)
-    name = re.sub(r'\s+colar com nome.*$', '', name)
-    name = re.sub(r'\s+banho de ouro$', '', name)
-    name = re.sub(r'\s+banho de rhodium$', '', name)
-    return name.strip()
+    return canonical_name(name)
+
+
+NAME_CONTAINS_MIN_LEN = 10  # nome normalizado maior que isso casa por "contém"
+NAME_FUZZY_THRESHOLD = 0.87  # ratio do difflib acima disso casa por semelhança
 
 
 def names_match(name1: str, name2: str) -> bool:
     n1 = normalize_name(name1)
     n2 = normalize_name(name2)
-    if n1 == n2 or (len(n1) > 10 and (n1 in n2 or n2 in n1)):
+    if n1 == n2 or (len(n1) > NAME_CONTAINS_MIN_LEN and (n1 in n2 or n2 in n1)):
         return True
-    return SequenceMatcher(None, n1, n2).ratio() > 0.87
+    return SequenceMatcher(None, n1, n2).ratio() > NAME_FUZZY_THRESHOLD
 
 
 def _pick_best_name_candidate(origem_nome: str, candidates: List[dict]) -> Optional[dict]:
@@ -53,17 +58,16 @@ def _pick_best_name_candidate(origem_nome: str, candidates: List[dict]) -> Optio
         return None
 
     origem_norm = normalize_name(origem_nome)
+    candidate_norms = canonical_names((item.get("name") or "").strip() for item in candidates)
 
-    for item in candidates:
-        item_name = (item.get("name") or "").strip()
-        if normalize_name(item_name) == origem_norm:
+    for item, item_norm in zip(candidates, candidate_norms):
+        if item_norm == origem_norm:
             return item
 
     best = None
     best_score = 0.0
-    for item in candidates:
-        item_name = (item.get("name") or "").strip()
-        score = SequenceMatcher(None, origem_norm, normalize_name(item_name)).ratio()
+    for item, item_norm in zip(candidates, candidate_norms):
+        score = SequenceMatcher(None, origem_norm, item_norm).ratio()
         if score > best_score:
             best_score = score
             best = item
@@ -73,7 +77,7 @@ def _pick_best_name_candidate(origem_nome: str, candidates: List[dict]) -> Optio
     return None
 
 
-# ====================== FUNÇÃO AUXILIAR (mesma do run_sync) ======================
+# ====================== CHAVE DO PRODUTO DA ORIGEM (run_sync, ledger, reconcile) ======================
 def _origem_product_key(produto: dict) -> str:
     if not isinstance(produto, dict) or not produto:
         return "invalid:none"
@@ -86,7 +90,8 @@ def _origem_product_key(produto: dict) -> str:
     nome = str(produto.get("nome") or "").strip()
     if nome:
         nome_lower = nome.lower()[:80]
-        nome_hash = str(abs(hash(nome_lower)))[:10]
+        # sha1 (e não hash()): estável entre execuções, senão o ledger nunca bate
+        nome_hash = hashlib.sha1(nome_lower.encode("utf-8")).hexdigest()[:10]
         return f"nome:{nome_lower}|{nome_hash}"
     return f"hash:{id(produto)}"
 
@@ -133,12 +138,98 @@ def match_products_inteligente(
 
     logger.info(f"✅ {len(matches)} produtos encontrados via CACHE")
 
-    # Camada 3: Browser só nos que sobraram (raro)
+    # Camada 3: Busca por nome só nos que sobraram (raro)
     if origem_by_key:
-        logger.info(f"⚠️ {len(origem_by_key)} produtos indo para busca no browser...")
-        browser_matches = _browser_search_batch(page, list(origem_by_key.values()), logger, short_delay)
-        matches.extend(browser_matches)
+        pending = list(origem_by_key.values())
+        mode = str(getattr(config, "MATCH_SEARCH_MODE", "api") or "api").strip().lower()
+        token = get_destino_token(page) if mode == "api" else ""
+        if mode == "api" and token:
+            logger.info(f"⚠️ {len(pending)} produtos indo para busca via API...")
+            matches.extend(_api_search_batch(page, pending, token, logger))
+        else:
+            if mode == "api":
+                logger.warning("⚠️ Token DESTINO indisponível — usando busca pela UI")
+            logger.info(f"⚠️ {len(pending)} produtos indo para busca no browser...")
+            browser_matches = _browser_search_batch(page, pending, logger, short_delay)
+            matches.extend(browser_matches)
+
+    return matches
+
+
+def _search_url(nome: str) -> str:
+    param = getattr(config, "MATCH_SEARCH_PARAM", "filter[name]") or "filter[name]"
+    page_size = int(getattr(config, "MATCH_SEARCH_PAGE_SIZE", 25) or 25)
+    return (
+        f"{DESTINO_BASE}/admin/api/products"
+        f"?sort=name&page[size]={page_size}&page[number]=1"
+        f"&{param}={quote(nome[:60])}"
+    )
 
+
+def _api_search_batch(page: Page, pending: List[dict], token: str, logger) -> List[dict]:
+    """Busca em lote direto na API de produtos (sem digitar na UI).
+
+    Nomes idênticos (após normalize_name) geram UMA única requisição; as
+    consultas rodam com concorrência limitada (MATCH_SEARCH_CONCURRENCY).
+    """
+    matches = []
+
+    # Deduplicação: uma consulta por nome normalizado
+    queries: Dict[str, str] = {}
+    for produto in pending:
+        nome = (produto.get("nome") or "").strip()
+        norm = normalize_name(nome)
+        if nome and norm and norm not in queries:
+            queries[norm] = nome
+
+    headers = {
+        "Accept": "application/json",
+        "Authorization": token,
+        "X-Requested-With": "XMLHttpRequest",
+    }
+    norms = list(queries.keys())
+    concurrency = int(getattr(config, "MATCH_SEARCH_CONCURRENCY", 4) or 1)
+    try:
+        responses = fetch_json_many(
+            page,
+            [_search_url(queries[n]) for n in norms],
+            headers=headers,
+            concurrency=concurrency,
+            timeout_ms=15000,
+        )
+    except Exception as e:
+        logger.error(f"Erro no batch search via API: {e}")
+        responses = []
+
+    results_by_norm: Dict[str, List[dict]] = {}
+    for norm, resp in zip(norms, responses):
+        body = resp.get("json")
+        if resp.get("status") != 200 or not isinstance(body, dict):
+            logger.warning("Busca API falhou para '%s': status %s", queries[norm][:60], resp.get("status"))
+            continue
+        results_by_norm[norm] = [i for i in (body.get("data") or []) if isinstance(i, dict)]
+
+    logger.info(
+        "🔎 Busca API: %d produtos → %d consultas únicas (%d respondidas)",
+        len(pending), len(norms), len(results_by_norm),
+    )
+
+    for produto in pending:
+        nome = (produto.get("nome") or "").strip()
+        if not nome:
+            continue
+        for item in results_by_norm.get(normalize_name(nome), []):
+            item_name = (item.get("name") or "").strip()
+            if names_match(nome, item_name):
+                matches.append({
+                    "destino_id": str(item.get("id")),
+                    "destino_name": item_name,
+                    "origem_product": produto
+                })
+                logger.info(f"✅ API MATCH: {nome[:60]}")
+                break
+        else:
+            _append_live_result(NAO_ENCONTRADOS_PATH, nome)
     return matches
 
 
@@ -158,7 +249,11 @@ def _browser_search_batch(page: Page, pending: List[dict], logger, short_delay)
                 search_box.clear()
                 search_box.fill(nome[:60])
                 with page.expect_response(
-                    lambda r: r.status == 200 and "application/json" in (r.headers.get("content-type") or ""),
+                    lambda r: (
+                        r.status == 200
+                        and "application/json" in (r.headers.get("content-type") or "")
+                        and "/api/products" in r.url
+                    ),
                     timeout=10000,
                 ) as resp_info:
                     page.keyboard.press("Enter")
@@ -292,4 +387,60 @@ def fetch_product_and_token(page: Page, product_id: str, logger) -> Tuple[Option
         except Exception as exc:
             logger.warning("Erro GET API %s: %s", product_id, exc)
 
-    return detail_json, auth_token
\ No newline at end of file
+    return detail_json, auth_token
+
+
+# ---------------------------------------------------------------------------
+# Caminho rápido: token obtido uma vez e reaproveitado (sem render por produto)
+# ---------------------------------------------------------------------------
+def _destino_tokens():
+    return get_token_manager(DESTINO_BASE)
+
+
+def remember_destino_token(page: Page, token: Optional[str]) -> None:
+    _destino_tokens().remember(token)
+
+
+def forget_destino_token(page: Page, token: Optional[str] = None) -> None:
+    _destino_tokens().invalidate(token)
+
+
+def get_destino_token(page: Page) -> str:
+    """Token do gerenciador da loja (válido pelo exp do JWT); só lê a página se preciso."""
+    return _destino_tokens().get(page, refresh=_extract_destino_token)
+
+
+def fetch_product_fast(page: Page, product_id: str, logger) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    GET único em /admin/api/products/{id} com o token em cache.
+    Só navega para a tela de edição (fetch_product_and_token) se não houver
+    token, se ele for recusado (401/403) ou se a resposta vier sem dados.
+    """
+    token = get_destino_token(page) if getattr(config, "PRODUCT_FETCH_MODE", "api") == "api" else ""
+    if token:
+        try:
+            resp = page.request.get(
+                f"{DESTINO_BASE}/admin/api/products/{product_id}",
+                headers={
+                    "Accept": "application/json",
+                    "Authorization": token,
+                    "X-Requested-With": "XMLHttpRequest",
+                    "Referer": f"{DESTINO_BASE}/admin/products/list",
+                },
+            )
+            if resp.status == 200:
+                payload = resp.json()
+                if isinstance(payload, dict) and isinstance(payload.get("data"), dict):
+                    return payload["data"], token
+                logger.warning("Resposta sem dados para produto %s — tentando pela tela de edição", product_id)
+            elif resp.status in (401, 403):
+                logger.info("🔑 Token DESTINO recusado (%s) — renovando pela tela de edição", resp.status)
+                forget_destino_token(page, token)
+            else:
+                logger.warning("GET API produto %s: status %s — tentando pela tela de edição", product_id, resp.status)
+        except Exception as exc:
+            logger.warning("Erro GET API %s: %s — tentando pela tela de edição", product_id, exc)
+
+    detail_json, token = fetch_product_and_token(page, product_id, logger)
+    remember_destino_token(page, token)
+    return detail_json, token
@@ -1,8 +1,11 @@
 # domain.py
 # domain.py
+import html
 import logging
-import unicodedata
-from typing import Dict, List
+import re
+from typing import Any, Dict, List, Optional
+
+from service.text_canon import fold
 
 logger = logging.getLogger("sync")
 
@@ -31,11 +34,7 @@ def fix_opcao_banho_list(infos: list) -> list:
 
 
 def normalize(name: str) -> str:
-    if not name:
-        return ""
-    raw = " ".join(str(name).strip().split()).lower()
-    nfkd = unicodedata.normalize("NFKD", raw)
-    return "".join(c for c in nfkd if not unicodedata.combining(c))
+    return fold(name)
 
 
 def canonical_info_name(nome: str) -> str:
@@ -264,6 +263,98 @@ def build_product_payload(origem: dict, destino_json: dict) -> dict:
     return payload
 
 
+# ====================== DIFF PAYLOAD × DESTINO ======================
+_NUMERIC_FIELDS = {"price", "stock", "minimum_stock", "weight", "height", "width", "length"}
+_FLAG_FIELDS = {"active", "visible", "minimum_stock_alert"}
+_HTML_WS = re.compile(r"\s+")
+_HTML_BETWEEN_TAGS = re.compile(r">\s+<")
+
+
+def _normalize_html(value: Any) -> str:
+    text = html.unescape(str(value or ""))
+    text = text.replace("\u00a0", " ")
+    text = _HTML_WS.sub(" ", text)
+    text = _HTML_BETWEEN_TAGS.sub("><", text)
+    return text.strip()
+
+
+def _normalize_number(value: Any):
+    try:
+        return round(float(str(value).replace(",", ".")), 3)
+    except (ValueError, TypeError):
+        return str(value or "").strip()
+
+
+def _normalize_flag(value: Any) -> bool:
+    """"1"/"0", 1/0, true/false, "sim"/"não" → bool (o DESTINO devolve formatos variados)."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "sim", "yes", "s", "y")
+    return bool(value)
+
+
+def _image_urls(images: Any) -> List[str]:
+    urls = []
+    for img in images or []:
+        if isinstance(img, dict) and img.get("https"):
+            urls.append(str(img["https"]).strip())
+    return urls
+
+
+def _metatag_pairs(tags: Any) -> set:
+    pairs = set()
+    for tag in tags or []:
+        if isinstance(tag, dict) and tag.get("type"):
+            pairs.add((str(tag["type"]).strip().lower(), " ".join(str(tag.get("content") or "").split())))
+    return pairs
+
+
+def _field_unchanged(key: str, desired: Any, current: Any, sent_images: Optional[List[str]] = None) -> bool:
+    if key in _NUMERIC_FIELDS:
+        return _normalize_number(desired) == _normalize_number(current)
+    if key in _FLAG_FIELDS:
+        return _normalize_flag(desired) == _normalize_flag(current)
+    if key == "description":
+        return _normalize_html(desired) == _normalize_html(current)
+    if key == "metatag":
+        return _metatag_pairs(desired) <= _metatag_pairs(current)
+    if key == "ProductImage":
+        wanted, existing = set(_image_urls(desired)), set(_image_urls(current))
+        if wanted <= existing:
+            return True
+        # o DESTINO re-hospeda a imagem com outra URL: vale a última URL da
+        # ORIGEM enviada com sucesso (ledger), desde que o produto ainda tenha imagem
+        return bool(existing) and bool(sent_images) and wanted <= set(sent_images)
+    if key == "url":
+        desired_link = desired.get("https") if isinstance(desired, dict) else desired
+        current_link = current.get("https") if isinstance(current, dict) else current
+        return str(desired_link or "").strip() == str(current_link or "").strip()
+    return str(desired if desired is not None else "").strip() == str(current if current is not None else "").strip()
+
+
+def diff_product_payload(payload: dict, destino_json: dict, sent_images: Optional[List[str]] = None) -> dict:
+    """
+    Compara o payload montado por build_product_payload com o JSON atual do
+    DESTINO e devolve só os campos que mudaram ({} = nada a enviar).
+    Preço/medidas comparados como número, flags como booleano, descrição com
+    HTML normalizado, metatags como subconjunto do que já existe no DESTINO.
+    Imagens: como o DESTINO troca a URL ao re-hospedar, `sent_images` (URLs da
+    ORIGEM do último PUT aceito, guardadas no ledger) também conta como igual.
+    """
+    destino_json = destino_json or {}
+    changed = {}
+    for key, desired in (payload or {}).items():
+        if key == "url":
+            continue
+        if not _field_unchanged(key, desired, destino_json.get(key), sent_images):
+            changed[key] = desired
+    # link SEO sempre acompanha um PUT parcial (preservação, ver build_product_payload)
+    if changed and "url" in payload:
+        changed["url"] = payload["url"]
+    if changed:
+        logger.info("✏️ Campos alterados: %s", sorted(k for k in changed if k != "url"))
+    return changed
+
+
 def variant_sku_key(sku_list: list) -> str:
     if not sku_list:
         return ""
@@ -308,6 +399,18 @@ def extract_checked_options_from_variants(
         return result
 
     variacoes = _get_variacoes_from_product(origem_product)
+    if variacoes and page is not None and origin_base and not any(
+        _extract_sku_items_from_variant(v) for v in variacoes
+    ):
+        # variações embutidas sem SKU → API da ORIGEM (cache por produto + fingerprint)
+        from .origin_variants import get_origin_variant_client, variants_fingerprint
+        try:
+            client = get_origin_variant_client(origin_base, cookies_origem)
+            variacoes = client.get_variants(
+                page, product_id, fingerprint=variants_fingerprint(origem_product), logger=logger,
+            ) or variacoes
+        except Exception as exc:
+            logger.warning("Falha buscando variações na ORIGEM (%s): %s", product_id, exc)
     if not variacoes:
         return result
 
@@ -0,0 +1,271 @@
+# ========================== edit_form.py ==========================
+# Contexto do formulário PHP de infos adicionais SEM renderizar a página.
+#
+# /mvc/adm/additional_product_info/additional_product_info/edit/{id} é HTML
+# servidor: o _token (CSRF) e os selected_items/option_info já vêm no markup.
+# Um page.request.get (mesmos cookies do contexto) + html.parser resolve; a
+# renderização no browser fica só como fallback quando o HTML não traz o
+# formulário (sessão expirada, layout diferente).
+import logging
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+from patchright.sync_api import Page
+
+from service.page_fetch import _same_origin
+
+from .config import DESTINO_BASE
+
+_logger = logging.getLogger("sync")
+
+CSRF_INPUT_NAMES = ("_token", "__RequestVerificationToken")
+
+_JS_EDIT_FORM_STATE = """() => {
+    const ids = [];
+    document.querySelectorAll('input[name^="selected_items"]').forEach(n => {
+        if (n.value && (n.type !== 'checkbox' || n.checked)) ids.push(n.value);
+    });
+    const options = [];
+    document.querySelectorAll('input[name^="option_info"]').forEach(n => {
+        if (n.value && (n.type !== 'checkbox' || n.checked)) options.push(n.value);
+    });
+    document.querySelectorAll('select[name^="selected_items"] option:checked').forEach(o => {
+        if (o.value) ids.push(o.value);
+    });
+    document.querySelectorAll('select[name^="option_info"] option:checked').forEach(o => {
+        if (o.value) options.push(o.value);
+    });
+    const hasState = !!document.querySelector(
+        '[name^="selected_items"], [name^="option_info"]'
+    );
+    let csrf = null;
+    for (const sel of ['input[name="_token"]', 'input[name="__RequestVerificationToken"]']) {
+        const el = document.querySelector(sel);
+        if (el && el.value) { csrf = el.value; break; }
+    }
+    if (!csrf) {
+        const meta = document.querySelector('meta[name="csrf-token"]');
+        if (meta) csrf = meta.getAttribute('content');
+    }
+    const hasForm = !!document.querySelector('form');
+    const login = !!document.querySelector('input[type="password"]');
+    return {ids, options, csrf, hasForm, hasState, login};
+}"""
+
+_JS_POST_FORM = """
+async ([url, body, origin]) => {
+    try {
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+                'X-Requested-With': 'XMLHttpRequest',
+                'Referer': url,
+                'Origin': origin
+            },
+            body: body,
+            credentials: 'include',
+            redirect: 'follow'
+        });
+        const text = await response.text();
+        return {
+            ok: response.ok,
+            status: response.status,
+            redirected: response.redirected,
+            finalUrl: response.url,
+            snippet: text.substring(0, 400)
+        };
+    } catch (err) {
+        return { error: err.message };
+    }
+}
+"""
+
+
+def edit_form_url(product_id: str) -> str:
+    return (
+        f"{DESTINO_BASE}/mvc/adm/additional_product_info/"
+        f"additional_product_info/edit/{product_id}"
+    )
+
+
+class _EditFormParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.csrf_token: Optional[str] = None
+        self.ids: List[str] = []
+        self.options: List[str] = []
+        self.has_form = False
+        self.has_state = False  # algum selected_items/option_info no markup
+        self.login = False
+        self._select: Optional[str] = None  # name do <select> de estado aberto
+
+    def _collect(self, name: str, value: str) -> None:
+        if name.startswith("selected_items"):
+            self.ids.append(value)
+        elif name.startswith("option_info"):
+            self.options.append(value)
+
+    def handle_starttag(self, tag, attrs):
+        attr = {k.lower(): (v or "") for k, v in attrs}
+        if tag == "form":
+            self.has_form = True
+        elif tag == "meta":
+            if attr.get("name", "").lower() == "csrf-token" and not self.csrf_token:
+                self.csrf_token = attr.get("content") or None
+        elif tag == "select":
+            name = attr.get("name", "")
+            if name.startswith(("selected_items", "option_info")):
+                self.has_state = True
+                self._select = name
+        elif tag == "option" and self._select:
+            # <select> de estado: conta a opção selecionada
+            if "selected" in attr and attr.get("value"):
+                self._collect(self._select, attr["value"])
+        elif tag == "input":
+            name = attr.get("name", "")
+            value = attr.get("value", "")
+            input_type = attr.get("type", "text").lower()
+            if input_type == "password":
+                self.login = True
+            if name in CSRF_INPUT_NAMES and value and not self.csrf_token:
+                self.csrf_token = value
+            if name.startswith(("selected_items", "option_info")):
+                self.has_state = True
+            # checkbox só conta se marcado; hidden/text sempre
+            active = input_type != "checkbox" or "checked" in attr
+            if not value or not active:
+                return
+            self._collect(name, value)
+
+    def handle_endtag(self, tag):
+        if tag == "select":
+            self._select = None
+
+    handle_startendtag = handle_starttag
+
+
+def parse_edit_form(html: str) -> Dict[str, object]:
+    """HTML da tela de edição → {csrf_token, ids, options, has_form, has_state, login}."""
+    parser = _EditFormParser()
+    try:
+        parser.feed(html or "")
+        parser.close()
+    except Exception as exc:
+        _logger.debug("parse_edit_form: HTML malformado (%s)", exc)
+    return {
+        "csrf_token": parser.csrf_token,
+        "ids": parser.ids,
+        "options": parser.options,
+        "has_form": parser.has_form,
+        "has_state": parser.has_state,
+        "login": parser.login,
+    }
+
+
+def fetch_edit_form(page: Page, product_id: str, logger=None) -> Optional[Dict[str, object]]:
+    """Caminho leve: GET do HTML com os cookies do contexto, sem renderizar."""
+    logger = logger or _logger
+    url = edit_form_url(product_id)
+    try:
+        resp = page.request.get(
+            url,
+            headers={"Accept": "text/html,application/xhtml+xml,*/*;q=0.8"},
+            timeout=20000,
+        )
+        if resp.status != 200:
+            logger.debug("fetch_edit_form %s: status %s", product_id, resp.status)
+            return None
+        form = parse_edit_form(resp.text())
+    except Exception as exc:
+        logger.debug("fetch_edit_form %s: %s", product_id, exc)
+        return None
+
+    if form["login"] or "login" in (resp.url or "").lower() or not form["has_form"]:
+        logger.debug("fetch_edit_form %s: HTML sem formulário (login/layout)", product_id)
+        return None
+    if not form["has_state"]:
+        # selected_items/option_info montados por JS: vazio aqui não quer dizer "nada marcado"
+        logger.debug("fetch_edit_form %s: HTML sem selected_items/option_info — renderizando", product_id)
+        return None
+    form["source"] = "http"
+    return form
+
+
+def render_edit_form(page: Page, product_id: str, logger=None, short_delay=None) -> Optional[Dict[str, object]]:
+    """Fallback: renderiza a tela de edição e lê o mesmo contexto do DOM."""
+    logger = logger or _logger
+    try:
+        response = page.goto(edit_form_url(product_id), wait_until="domcontentloaded", timeout=45000)
+        if not response or response.status != 200:
+            logger.error(
+                "Falha ao carregar página de edição: status %s",
+                response.status if response else "sem response",
+            )
+            return None
+        try:
+            page.wait_for_selector('input[name^="selected_items"], form', state="attached", timeout=10000)
+        except Exception:
+            if short_delay:
+                short_delay()  # formulário não apareceu a tempo — espera JS carregar
+        state = page.evaluate(_JS_EDIT_FORM_STATE)
+    except Exception as exc:
+        logger.warning("Erro renderizando página de edição %s: %s", product_id, exc)
+        return None
+    if not isinstance(state, dict):
+        return None
+    return {
+        "csrf_token": state.get("csrf") or None,
+        "ids": [str(v) for v in state.get("ids") or [] if v],
+        "options": [str(v) for v in state.get("options") or [] if v],
+        "has_form": bool(state.get("hasForm")),
+        "has_state": bool(state.get("hasState")),
+        "login": bool(state.get("login")),
+        "source": "render",
+    }
+
+
+def get_edit_form(page: Page, product_id: str, logger=None, short_delay=None) -> Optional[Dict[str, object]]:
+    """HTTP primeiro; renderiza só se o HTML não trouxer o formulário."""
+    form = fetch_edit_form(page, product_id, logger)
+    if form is not None:
+        return form
+    (logger or _logger).info("Contexto do formulário via HTTP indisponível — renderizando página de edição")
+    return render_edit_form(page, product_id, logger, short_delay)
+
+
+def post_form(page: Page, url: str, body: str) -> Dict[str, object]:
+    """
+    POST urlencoded com a sessão do browser. Usa fetch dentro da página só se
+    ela estiver na mesma origem (cookies + sem CORS); senão page.request.post.
+    """
+    origin = DESTINO_BASE.rstrip("/")
+    if _same_origin(page, url):
+        result = page.evaluate(_JS_POST_FORM, [url, body, origin])
+        if isinstance(result, dict) and not result.get("error"):
+            return result
+
+    try:
+        resp = page.request.post(
+            url,
+            data=body,
+            headers={
+                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+                "X-Requested-With": "XMLHttpRequest",
+                "Referer": url,
+                "Origin": origin,
+            },
+        )
+        try:
+            snippet = resp.text()[:400]
+        except Exception:
+            snippet = ""
+        return {
+            "ok": resp.ok,
+            "status": resp.status,
+            "redirected": (resp.url or url) != url,
+            "finalUrl": resp.url,
+            "snippet": snippet,
+        }
+    except Exception as exc:
+        return {"error": str(exc)}
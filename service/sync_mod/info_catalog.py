@@ -0,0 +1,174 @@
+# ========================== info_catalog.py ==========================
+# Catálogo de Additional Infos do DESTINO com escopo de execução.
+#
+# Carregado uma única vez (páginas grandes, em paralelo) e mantido em memória
+# durante o sync inteiro. Criações de campo/opção atualizam o catálogo
+# localmente; quando um id ainda é desconhecido, só o campo afetado é relido
+# (/admin/api/additional-info/{id}) em vez da listagem completa.
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from patchright.sync_api import Page
+
+from . import destino_api
+from .domain import api_headers, normalize
+
+_logger = logging.getLogger("sync")
+
+TAIL_PAGE_SIZE = 25
+
+
+def _copy(entry: Optional[dict]) -> Optional[dict]:
+    if not entry:
+        return None
+    return {**entry, "option_map": dict(entry.get("option_map") or {})}
+
+
+class AdditionalInfoCatalog:
+    def __init__(self, logger=None):
+        self.logger = logger or _logger
+        self._entries: Dict[str, dict] = {}  # normalize(nome) → {id, name, option_map}
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._name_locks: Dict[str, threading.Lock] = {}  # normalize(nome) → lock de check-e-cria
+        self._pending_fields: Set[str] = set()  # campos criados cujo id ainda não foi lido
+        self._pending_options: Dict[str, Set[str]] = {}  # field_id → opções criadas sem id lido
+        self.stats = {"loads": 0, "field_refreshes": 0, "tail_refreshes": 0}
+
+    # ------------------------------------------------------------------ leitura
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self, name: str) -> Optional[dict]:
+        with self._lock:
+            return _copy(self._entries.get(normalize(name)))
+
+    def get_by_id(self, field_id: str) -> Optional[dict]:
+        field_id = str(field_id)
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["id"] == field_id:
+                    return _copy(entry)
+        return None
+
+    def as_dict(self) -> Dict[str, dict]:
+        with self._lock:
+            return {k: _copy(v) for k, v in self._entries.items()}
+
+    def name_map(self) -> Dict[str, str]:
+        """normalize(nome) → id (formato de fetch_all_additional_infos)."""
+        with self._lock:
+            return {k: v["id"] for k, v in self._entries.items()}
+
+    # ------------------------------------------------------------------ carga
+    def ensure_loaded(self, page: Page, token: str) -> bool:
+        with self._lock:
+            if not self._loaded:
+                self.reload(page, token)
+            return bool(self._entries)
+
+    def reload(self, page: Page, token: str) -> None:
+        with self._lock:
+            entries: Dict[str, dict] = {}
+            for item in destino_api.list_additional_info_items(page, token, self.logger):
+                entry = destino_api.additional_info_entry(item)
+                if entry:
+                    entries[normalize(entry["name"])] = entry
+            self._entries = entries
+            self._loaded = True
+            self.stats["loads"] += 1
+            self.logger.info("📋 Catálogo de infos adicionais DESTINO: %d entradas (carga #%d)", len(entries), self.stats["loads"])
+
+    # ------------------------------------------------------------------ mutação local
+    def put(self, entry: Optional[dict]) -> Optional[dict]:
+        if not entry or not entry.get("id") or not entry.get("name"):
+            return None
+        with self._lock:
+            key = normalize(entry["name"])
+            # mesmo id com nome novo → remove a chave antiga
+            for old_key, old in list(self._entries.items()):
+                if old["id"] == str(entry["id"]) and old_key != key:
+                    del self._entries[old_key]
+            self._entries[key] = _copy(entry)
+            self._pending_fields.discard(key)
+            pending = self._pending_options.get(str(entry["id"]))
+            if pending:
+                pending.difference_update(self._entries[key]["option_map"])
+            return _copy(self._entries[key])
+
+    def add_option(self, field_id: str, option_name: str, option_id: str) -> None:
+        field_id = str(field_id)
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["id"] == field_id:
+                    entry["option_map"][normalize(option_name)] = str(option_id)
+                    return
+
+    # ------------------------------------------------------------------ check-e-cria
+    def name_lock(self, name: str) -> threading.Lock:
+        """Lock do campo: quem o segura verifica, cria e atualiza o catálogo sozinho."""
+        with self._lock:
+            return self._name_locks.setdefault(normalize(name), threading.Lock())
+
+    def mark_field_pending(self, name: str) -> None:
+        with self._lock:
+            self._pending_fields.add(normalize(name))
+
+    def is_field_pending(self, name: str) -> bool:
+        with self._lock:
+            return normalize(name) in self._pending_fields
+
+    def mark_options_pending(self, field_id: str, option_names: Iterable[str]) -> None:
+        with self._lock:
+            self._pending_options.setdefault(str(field_id), set()).update(normalize(o) for o in option_names)
+
+    def pending_options(self, field_id: str) -> Set[str]:
+        with self._lock:
+            return set(self._pending_options.get(str(field_id)) or ())
+
+    # ------------------------------------------------------------------ releitura pontual
+    def refresh_field(self, page: Page, token: str, field_id: str) -> Optional[dict]:
+        """Relê um único campo (ex.: para obter ids de opções recém-criadas)."""
+        url = f"{destino_api.ADDITIONAL_INFO_API}/{field_id}"
+        try:
+            resp = page.request.get(url, headers=api_headers(token))
+            if resp.status != 200:
+                self.logger.warning("Falha GET additional-info %s: status %d", field_id, resp.status)
+                return None
+            body = resp.json()
+        except Exception as exc:
+            self.logger.warning("Erro GET additional-info %s: %s", field_id, exc)
+            return None
+
+        item = body.get("data") if isinstance(body, dict) and isinstance(body.get("data"), dict) else body
+        self.stats["field_refreshes"] += 1
+        return self.put(destino_api.additional_info_entry(item if isinstance(item, dict) else {}))
+
+    def find_new_field(self, page: Page, token: str, name: str) -> Optional[dict]:
+        """
+        Localiza um campo recém-criado: lê só os itens mais novos (sort=-id);
+        se não aparecer ali, recarrega a listagem completa uma vez.
+        """
+        key = normalize(name)
+        url = (
+            f"{destino_api.ADDITIONAL_INFO_API}"
+            f"?sort=-id&page[size]={TAIL_PAGE_SIZE}&page[number]=1"
+        )
+        try:
+            resp = page.request.get(url, headers=api_headers(token))
+            if resp.status == 200:
+                self.stats["tail_refreshes"] += 1
+                for item in (resp.json() or {}).get("data") or []:
+                    entry = destino_api.additional_info_entry(item) if isinstance(item, dict) else None
+                    if entry and normalize(entry["name"]) == key:
+                        return self.put(entry)
+        except Exception as exc:
+            self.logger.debug("Leitura dos itens mais novos falhou: %s", exc)
+
+        self.reload(page, token)
+        return self.get(name)
@@ -0,0 +1,122 @@
+# ========================== ledger.py ==========================
+# Ledger persistente de produtos sincronizados (pula produtos sem mudança).
+#
+# Para cada produto da ORIGEM guarda o hash da projeção que o sync usa
+# (payload + infos adicionais + variações), o destino_id e o status do último
+# sync. Na próxima execução, produtos com o mesmo hash cujo último sync foi
+# "sucesso" para o mesmo destino_id são pulados antes de qualquer chamada de rede.
+# Guarda também as URLs de imagem da ORIGEM do último PUT aceito: o DESTINO
+# re-hospeda a imagem com outra URL, então só assim dá para saber se ela mudou.
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from . import domain
+
+logger = logging.getLogger("sync")
+
+STATUS_OK = "sucesso"
+# POST de infos aceito, verificação em lote (ETAPA 4) ainda não concluída
+STATUS_PENDING_VERIFY = "verificacao_pendente"
+
+
+def origem_fingerprint(produto: dict) -> str:
+    """Hash estável da parte da ORIGEM que influencia o sync."""
+    produto = produto or {}
+    projection = {
+        "payload": domain.build_product_payload(produto, {}),
+        "infos": (
+            produto.get("AdditionalInfos")
+            or produto.get("additional_infos")
+            or produto.get("informacoes_adicionais")
+            or []
+        ),
+        "variacoes": produto.get("variacoes") or produto.get("Variant") or [],
+    }
+    raw = json.dumps(projection, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SyncLedger:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (json.JSONDecodeError, OSError) as exc:
+            logger.warning("Ledger ilegível (%s): %s — começando vazio", self.path, exc)
+            return {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, origem_key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(origem_key)
+            return dict(entry) if entry else None
+
+    def is_unchanged(self, origem_key: str, fingerprint: str, destino_id: str) -> bool:
+        entry = self.get(origem_key)
+        return bool(
+            entry
+            and entry.get("hash") == fingerprint
+            and entry.get("status") == STATUS_OK
+            and str(entry.get("destino_id")) == str(destino_id)
+        )
+
+    def sent_images(self, origem_key: str, destino_id: str) -> list:
+        """URLs da ORIGEM enviadas no último PUT aceito para este destino_id."""
+        entry = self.get(origem_key)
+        if not entry or str(entry.get("destino_id")) != str(destino_id):
+            return []
+        return list(entry.get("images") or [])
+
+    def record(self, origem_key: str, fingerprint: str, destino_id: str, status: str,
+               images: Optional[list] = None) -> None:
+        """`images` = URLs enviadas num PUT aceito; None mantém as anteriores."""
+        with self._lock:
+            previous = self._entries.get(origem_key) or {}
+            if images is None and str(previous.get("destino_id")) == str(destino_id):
+                images = previous.get("images")
+            entry = {
+                "hash": fingerprint,
+                "destino_id": str(destino_id),
+                "status": status,
+                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            if images:
+                entry["images"] = list(images)
+            self._entries[origem_key] = entry
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        try:
+            dirpath = os.path.dirname(self.path) or "."
+            os.makedirs(dirpath, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix="tmp_ledger_", dir=dirpath)
+            os.close(fd)
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, indent=2, ensure_ascii=False)
+                shutil.move(tmp, self.path)
+            finally:
+                if os.path.exists(tmp):
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+        except Exception as exc:
+            logger.warning("Erro ao salvar ledger: %s", exc)
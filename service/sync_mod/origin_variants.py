@@ -0,0 +1,330 @@
+# ========================== origin_variants.py ==========================
+# Cliente de variações da ORIGEM com cache por produto.
+#
+# - Headers e o header Cookie são montados uma vez por cliente (não por página).
+# - A 1ª página de /admin/api/products/{id}/variants define o total; as demais
+#   vêm em paralelo (page_fetch).
+# - Detalhes por variação só para as que vieram sem SKU/PropertyValue, em lote:
+#   primeiro /products/{id}/variants/{vid}, e só os 404 tentam /variants/{vid}.
+# - Cache (memória + disco) chaveado por product_id + fingerprint: se o
+#   produto da ORIGEM não mudou, nenhuma requisição é feita. Como o fingerprint
+#   não enxerga SKU/preço alterados só na variação, a entrada vale no máximo
+#   ORIGEM_VARIANTS_CACHE_TTL_S.
+# - Com header Cookie as requisições vão por page.request (o fetch da página
+#   descarta Cookie/User-Agent em silêncio e usaria o cookie jar do contexto);
+#   só com Authorization elas podem rodar em paralelo dentro da página.
+import copy
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from patchright.sync_api import Page
+
+from service.page_fetch import _same_origin, fetch_json_many, fetch_many
+
+from . import config
+from .domain import _extract_sku_items_from_variant
+
+_logger = logging.getLogger("sync")
+
+PAGE_SIZE = 50
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/145.0.0.0 Safari/537.36"
+)
+
+_CLIENTS: Dict[str, "OriginVariantClient"] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def build_cookie_header(cookies_origem) -> str:
+    """Lista de dicts Playwright, lista de "name=value" ou string única → header Cookie."""
+    if not cookies_origem:
+        return ""
+    if isinstance(cookies_origem, str):
+        return cookies_origem
+
+    parts = []
+    for c in cookies_origem:
+        if isinstance(c, dict):
+            name  = c.get("name") or ""
+            value = c.get("value") or ""
+            if name:
+                parts.append(f"{name}={value}")
+        elif isinstance(c, str):
+            parts.append(c)
+
+    return "; ".join(parts)
+
+
+def variants_fingerprint(origem_product: dict) -> str:
+    """Hash das variações embutidas no produto da ORIGEM (muda quando o produto muda)."""
+    produto = origem_product or {}
+    projection = {
+        "variacoes": produto.get("variacoes") or produto.get("Variant") or [],
+        "modified": produto.get("modified") or produto.get("updated_at") or "",
+    }
+    raw = json.dumps(projection, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _has_sku(variant: dict) -> bool:
+    return bool(_extract_sku_items_from_variant(variant))
+
+
+class OriginVariantClient:
+    def __init__(self, origin_base: str, cookies_origem=None, token: str = "", cache_path: Optional[str] = None):
+        self.origin_base = origin_base.rstrip("/")
+        self.cache_path = cache_path or config.ORIGEM_VARIANTS_CACHE_FILE
+        self.stats = {"hits": 0, "misses": 0, "pages": 0, "details": 0}
+        self._cache: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.cookie_header = ""
+        self.token = ""
+        self.set_auth(cookies_origem, token)
+        self._load()
+
+    # ------------------------------------------------------------------ auth
+    def set_auth(self, cookies_origem=None, token: str = "") -> None:
+        """Header Cookie montado uma única vez; só atualiza o que foi informado."""
+        if cookies_origem:
+            self.cookie_header = build_cookie_header(cookies_origem)
+        if token:
+            self.token = token
+
+    def _headers(self, product_id: str, use_cookie: bool = True) -> dict:
+        headers = {
+            "Accept": "application/json",
+            "X-Requested-With": "XMLHttpRequest",
+            "Referer": f"{self.origin_base}/admin/products/product/{product_id}",
+            "User-Agent": _USER_AGENT,
+        }
+        if use_cookie and self.cookie_header:
+            headers["Cookie"] = self.cookie_header
+        elif self.token:
+            headers["Authorization"] = self.token
+        return headers
+
+    # ------------------------------------------------------------------ cache
+    def _load(self) -> None:
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as exc:
+            _logger.warning("Cache de variações ilegível (%s): %s", self.cache_path, exc)
+            return
+        if isinstance(data, dict) and data.get("origin_base") == self.origin_base:
+            self._cache = {
+                pid: entry for pid, entry in (data.get("products") or {}).items()
+                if isinstance(entry, dict) and self._fresh(entry)
+            }
+
+    @staticmethod
+    def _fresh(entry: dict) -> bool:
+        try:
+            stored_at = float(entry.get("stored_at") or 0)
+        except (TypeError, ValueError):
+            return False
+        return time.time() - stored_at <= config.ORIGEM_VARIANTS_CACHE_TTL_S
+
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        with self._lock:
+            snapshot = {"origin_base": self.origin_base, "products": dict(self._cache)}
+        try:
+            dirpath = os.path.dirname(self.cache_path) or "."
+            os.makedirs(dirpath, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix="tmp_variants_", dir=dirpath)
+            os.close(fd)
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                shutil.move(tmp, self.cache_path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        except Exception as exc:
+            _logger.warning("Erro ao salvar cache de variações: %s", exc)
+
+    def _cached(self, product_id: str, fingerprint: str) -> Optional[List[dict]]:
+        if not fingerprint:
+            return None
+        with self._lock:
+            entry = self._cache.get(str(product_id))
+        if entry and entry.get("fingerprint") == fingerprint and self._fresh(entry):
+            # cópia: quem chama pode mutar a lista sem estragar o cache
+            return copy.deepcopy(entry.get("variants") or [])
+        return None
+
+    def _store(self, product_id: str, fingerprint: str, variants: List[dict]) -> None:
+        if not fingerprint:
+            return
+        with self._lock:
+            self._cache[str(product_id)] = {
+                "fingerprint": fingerprint,
+                "variants": copy.deepcopy(variants),
+                "stored_at": time.time(),
+            }
+        self.save()
+
+    # ------------------------------------------------------------------ rede
+    def _page_url(self, product_id: str, number: int) -> str:
+        return (
+            f"{self.origin_base}/admin/api/products/{product_id}/variants"
+            f"?sort=order&page[size]={PAGE_SIZE}&page[number]={number}"
+        )
+
+    def _first_page(self, page: Page, product_id: str, logger) -> Tuple[Optional[dict], dict]:
+        """
+        1ª página com Cookie; se negado (401/403/login), repete uma vez com a
+        outra credencial. Com a página já na ORIGEM e token disponível, começa pelo
+        token (sem Cookie as páginas seguintes rodam em paralelo na página).
+        """
+        headers = self._headers(product_id, use_cookie=not (self.token and _same_origin(page, self.origin_base)))
+        res = fetch_json_many(page, [self._page_url(product_id, 1)], headers=headers, concurrency=1)[0]
+        denied = res["status"] in (401, 403) or (res["status"] == 200 and not isinstance(res["json"], dict))
+        used_cookie = "Cookie" in headers
+        if denied and (self.token if used_cookie else self.cookie_header):
+            # recusado ou HTML de login → tenta uma vez com a outra credencial
+            headers = self._headers(product_id, use_cookie=not used_cookie)
+            res = fetch_json_many(page, [self._page_url(product_id, 1)], headers=headers, concurrency=1)[0]
+
+        if res["status"] in (401, 403):
+            logger.warning("⚠️ %d ao ler variações da ORIGEM (produto %s)", res["status"], product_id)
+            return None, headers
+        if res["status"] != 200:
+            logger.warning("⚠️ Variações ORIGEM produto %s pág 1: status %d", product_id, res["status"])
+            return None, headers
+        if not isinstance(res["json"], dict):
+            logger.warning(
+                "⚠️ Resposta não-JSON (content-type: %s) — possível redirect para login (produto %s)",
+                res["content_type"], product_id,
+            )
+            return None, headers
+        return res["json"], headers
+
+    def fetch_variants(self, page: Page, product_id: str, logger=None) -> List[dict]:
+        """Todas as páginas de variações (sem cache)."""
+        logger = logger or _logger
+        body, headers = self._first_page(page, product_id, logger)
+        if body is None:
+            return []
+        self.stats["pages"] += 1
+        variants = list(body.get("data") or [])
+        total = int((body.get("paging") or {}).get("total") or len(variants))
+        pages = max(1, -(-total // PAGE_SIZE))
+        if pages > 1:
+            urls = [self._page_url(product_id, n) for n in range(2, pages + 1)]
+            results = fetch_json_many(
+                page, urls, headers=headers, concurrency=config.ORIGEM_VARIANTS_CONCURRENCY,
+            )
+            for number, res in zip(range(2, pages + 1), results):
+                if res["status"] != 200 or not isinstance(res["json"], dict):
+                    logger.warning("⚠️ Variações ORIGEM produto %s pág %d: status %d", product_id, number, res["status"])
+                    continue
+                self.stats["pages"] += 1
+                variants.extend(res["json"].get("data") or [])
+        return variants
+
+    def fetch_details(self, page: Page, product_id: str, variant_ids: List[str], logger=None) -> Dict[str, dict]:
+        """
+        Detalhes de várias variações em lote. Retorna {variant_id: {"sku": [...]} |
+        {"PropertyValue": [...]} | dados crus}; ids sem resposta ficam de fora.
+        """
+        logger = logger or _logger
+        ids = [str(v) for v in variant_ids if str(v)]
+        if not ids:
+            return {}
+        headers = self._headers(product_id)
+        if self.token:
+            headers["Authorization"] = self.token
+
+        out: Dict[str, dict] = {}
+        pending = ids
+        for template in (
+            "{base}/admin/api/products/{pid}/variants/{vid}",
+            "{base}/admin/api/variants/{vid}",
+        ):
+            if not pending:
+                break
+            specs = [
+                {"url": template.format(base=self.origin_base, pid=product_id, vid=vid), "headers": headers}
+                for vid in pending
+            ]
+            results = fetch_many(page, specs, concurrency=config.ORIGEM_VARIANTS_CONCURRENCY)
+            self.stats["details"] += len(specs)
+            retry = []
+            for vid, res in zip(pending, results):
+                if res["status"] == 404:
+                    retry.append(vid)  # só os 404 tentam o endpoint alternativo
+                    continue
+                if res["status"] != 200 or not isinstance(res["json"], dict):
+                    logger.warning("GET variant %s falhou: %d", vid, res["status"])
+                    continue
+                data = res["json"].get("data") or res["json"]
+                sku = data.get("Sku") or data.get("sku") or []
+                pv = data.get("PropertyValue") or data.get("PropertyValues") or []
+                if sku:
+                    out[vid] = {"sku": sku}
+                elif pv:
+                    out[vid] = {"PropertyValue": pv}
+                else:
+                    out[vid] = data
+            pending = retry
+        return out
+
+    def enrich_missing_sku(self, page: Page, product_id: str, variants: List[dict], logger=None) -> List[dict]:
+        """Completa, em lote, só as variações que vieram sem SKU/PropertyValue."""
+        missing = {
+            str(v.get("id")): v for v in variants
+            if isinstance(v, dict) and v.get("id") and not _has_sku(v)
+        }
+        if not missing:
+            return variants
+        details = self.fetch_details(page, product_id, list(missing), logger)
+        for vid, detail in details.items():
+            missing[vid].update({k: v for k, v in detail.items() if k in ("sku", "PropertyValue", "Sku")})
+        return variants
+
+    # ------------------------------------------------------------------ API principal
+    def get_variants(self, page: Page, product_id: str, fingerprint: str = "", logger=None) -> List[dict]:
+        """Variações completas (com SKU) do produto; rede só se o fingerprint mudou."""
+        logger = logger or _logger
+        cached = self._cached(product_id, fingerprint)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+        self.stats["misses"] += 1
+
+        variants = self.fetch_variants(page, product_id, logger)
+        variants = self.enrich_missing_sku(page, product_id, variants, logger)
+        if variants:
+            with_sku = sum(1 for v in variants if _has_sku(v))
+            logger.info(
+                "📦 Origem produto %s: %d variações (%d com SKU) | cache %d hits / %d misses",
+                product_id, len(variants), with_sku, self.stats["hits"], self.stats["misses"],
+            )
+            self._store(product_id, fingerprint, variants)
+        return variants
+
+
+def get_origin_variant_client(origin_base: str, cookies_origem=None, token: str = "") -> OriginVariantClient:
+    """Cliente compartilhado pela execução (um por loja de ORIGEM); atualiza a autenticação."""
+    key = origin_base.rstrip("/")
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = OriginVariantClient(key, cookies_origem, token)
+        else:
+            client.set_auth(cookies_origem, token)
+        return client
@@ -0,0 +1,201 @@
+# ========================== property_index.py ==========================
+# Índice persistente PropertyValue id → (propriedade, valor) da ORIGEM.
+#
+# Resolver os ids de variação exigia listar /admin/api/properties e fazer um
+# GET por propriedade a CADA chamada (N+1 por produto). O índice é montado
+# uma vez (GETs concorrentes e limitados), salvo em disco e reaproveitado
+# entre execuções até expirar o TTL; resolver vira consulta em dicionário.
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from patchright.sync_api import Page
+
+from service.page_fetch import fetch_json_many
+from service.token_manager import get_token_manager
+
+from . import config
+from .domain import normalize
+
+_logger = logging.getLogger("sync")
+
+_INDEXES: Dict[str, "PropertyValueIndex"] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+class PropertyValueIndex:
+    def __init__(self, origin_base: str, path: Optional[str] = None, ttl_s: Optional[float] = None):
+        self.origin_base = origin_base.rstrip("/")
+        self.path = path or config.ORIGEM_PROPERTY_INDEX_FILE
+        self.ttl_s = config.ORIGEM_PROPERTY_INDEX_TTL_S if ttl_s is None else ttl_s
+        self._values: Dict[str, Tuple[str, str]] = {}
+        self._built_at = 0.0
+        self._build_attempted = False
+        self._lock = threading.Lock()
+        self._load()
+
+    # ------------------------------------------------------------------ disco
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as exc:
+            _logger.warning("Índice de propriedades ilegível (%s): %s", self.path, exc)
+            return
+        if not isinstance(data, dict) or data.get("origin_base") != self.origin_base:
+            return
+        values = data.get("values") or {}
+        self._values = {str(k): (v[0], v[1]) for k, v in values.items() if isinstance(v, list) and len(v) == 2}
+        self._built_at = float(data.get("built_at") or 0.0)
+
+    def _save(self) -> None:
+        try:
+            dirpath = os.path.dirname(self.path) or "."
+            os.makedirs(dirpath, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix="tmp_props_", dir=dirpath)
+            os.close(fd)
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "origin_base": self.origin_base,
+                            "built_at": self._built_at,
+                            "values": {k: list(v) for k, v in self._values.items()},
+                        },
+                        f, ensure_ascii=False,
+                    )
+                shutil.move(tmp, self.path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        except Exception as exc:
+            _logger.warning("Erro ao salvar índice de propriedades: %s", exc)
+
+    # ------------------------------------------------------------------ estado
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def stale(self) -> bool:
+        return not self._values or (time.time() - self._built_at) > self.ttl_s
+
+    # ------------------------------------------------------------------ montagem
+    def build(self, page: Page, logger=None) -> bool:
+        """Lista as propriedades e busca os valores de cada uma em paralelo."""
+        # import tardio: destino_api importa este módulo
+        from .destino_api import _extract_origin_token
+
+        logger = logger or _logger
+        self._build_attempted = True
+
+        def _refresh(p: Page) -> str:
+            # sem token em cache/storage_state: lê o localStorage da ORIGEM
+            try:
+                p.goto(f"{self.origin_base}/admin/products/list", wait_until="domcontentloaded", timeout=15000)
+            except Exception:
+                pass
+            return _extract_origin_token(p)
+
+        tokens = get_token_manager(self.origin_base)
+        token = tokens.get(page, refresh=_refresh)
+        headers = {"Accept": "application/json", "X-Requested-With": "XMLHttpRequest"}
+        if token:
+            headers["Authorization"] = token
+
+        props_url = f"{self.origin_base}/admin/api/properties?sort=name&page[size]=9999"
+        listing = fetch_json_many(page, [props_url], headers=headers, concurrency=1, timeout_ms=45000)[0]
+        if listing["status"] in (401, 403):
+            tokens.invalidate(token)
+        if listing["status"] != 200 or not isinstance(listing["json"], dict):
+            logger.warning("Falha GET origin properties: status %d", listing["status"])
+            return False
+
+        props = [
+            (str(p.get("id")), p.get("name") or "")
+            for p in listing["json"].get("data") or []
+            if isinstance(p, dict) and p.get("id")
+        ]
+        results = fetch_json_many(
+            page,
+            [f"{self.origin_base}/admin/api/properties/{pid}" for pid, _ in props],
+            headers=headers,
+            concurrency=config.ORIGEM_PROPERTY_FETCH_CONCURRENCY,
+            timeout_ms=30000,
+        )
+
+        values: Dict[str, Tuple[str, str]] = {}
+        failed = 0
+        for (prop_id, prop_name), res in zip(props, results):
+            body = res["json"] if isinstance(res["json"], dict) else None
+            if res["status"] != 200 or body is None:
+                failed += 1
+                continue
+            for pv in (body.get("data") or {}).get("PropertyValues") or []:
+                vid = str(pv.get("id") or "")
+                if vid:
+                    values[vid] = (prop_name, pv.get("name") or "")
+
+        if not values:
+            logger.warning("Índice de propriedades vazio (%d propriedades, %d falhas)", len(props), failed)
+            return False
+
+        self._values = values
+        self._built_at = time.time()
+        self._save()
+        logger.info(
+            "🗂️ Índice PropertyValue montado: %d valores de %d propriedades (%d falhas)",
+            len(values), len(props), failed,
+        )
+        return True
+
+    def ensure(self, page: Page, logger=None) -> None:
+        with self._lock:
+            if self.stale:
+                self.build(page, logger)
+
+    # ------------------------------------------------------------------ consulta
+    def lookup(self, value_id) -> Optional[Tuple[str, str]]:
+        return self._values.get(str(value_id))
+
+    def resolve(self, page: Page, value_ids: Iterable, logger=None) -> Dict[str, List[str]]:
+        """
+        { normalize(propriedade): [valor, ...] } para os ids informados.
+        Ids desconhecidos num índice vindo do disco forçam uma remontagem
+        (no máximo uma por execução).
+        """
+        ids = [str(i) for i in value_ids or [] if str(i)]
+        if not ids:
+            return {}
+        self.ensure(page, logger)
+        with self._lock:
+            if not self._build_attempted and any(i not in self._values for i in ids):
+                (logger or _logger).info("🗂️ Ids fora do índice salvo — remontando")
+                self.build(page, logger)
+
+        mapping: Dict[str, List[str]] = {}
+        for vid in ids:
+            hit = self._values.get(vid)
+            if not hit:
+                continue
+            prop_name, value_name = hit
+            names = mapping.setdefault(normalize(prop_name), [])
+            if value_name and value_name not in names:
+                names.append(value_name)
+        return mapping
+
+
+def get_property_index(origin_base: str) -> PropertyValueIndex:
+    """Índice compartilhado pela execução (um por loja de ORIGEM)."""
+    key = origin_base.rstrip("/")
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = PropertyValueIndex(key)
+        return index
@@ -0,0 +1,215 @@
+# ========================== reconcile.py ==========================
+# Reconciliação completa ORIGEM × DESTINO (auditoria de catálogo inteiro).
+#
+# Mesmas regras do matching (normalize_name / names_match), mas sem rede e
+# distribuída em vários processos: o catálogo DESTINO é indexado por token
+# (blocking) uma vez por worker e os produtos da ORIGEM são divididos em
+# blocos entre os processos do ProcessPoolExecutor. O índice só escolhe quem
+# é comparado; quem decide o match é sempre names_match. Produto sem nenhum
+# match nos blocos dos seus tokens é comparado com o catálogo inteiro (os
+# limites baratos do difflib descartam quase tudo antes do ratio completo).
+#
+# O resultado é determinístico independente do número de workers: cada linha
+# depende só do próprio produto da ORIGEM, empates são desfeitos pelo id do
+# DESTINO e a tabela final é ordenada pela chave da ORIGEM.
+import csv
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from service.text_canon import canonical_name as normalize_name
+
+from .destino_page import NAME_CONTAINS_MIN_LEN, NAME_FUZZY_THRESHOLD, _origem_product_key, names_match
+
+logger = logging.getLogger("sync")
+
+BLOCK_TOKEN_MIN_LEN = 3
+DEFAULT_CHUNK_SIZE = 250
+
+# Índice do DESTINO carregado uma vez por processo (initializer)
+_WORKER_INDEX: Dict[str, object] = {}
+
+
+def _destino_rows(destino_items: List[dict]) -> List[Tuple[str, str, str, str]]:
+    """(id, nome, nome_normalizado, referencia) — aceita formato da API e do ProdutosDestino.json."""
+    rows = []
+    for item in destino_items or []:
+        if not isinstance(item, dict):
+            continue
+        item_id = str(item.get("id") or item.get("produto_id") or "").strip()
+        name = str(item.get("name") or item.get("nome") or "").strip()
+        if not item_id or not name:
+            continue
+        ref = str(item.get("reference") or item.get("referencia") or "").strip().lower()
+        rows.append((item_id, name, normalize_name(name), ref))
+    rows.sort(key=lambda r: _id_sort_key(r[0]))
+    return rows
+
+
+def _origem_rows(origem_products: List[dict]) -> List[Tuple[str, str, str]]:
+    """(chave_origem, nome, referencia)"""
+    rows = []
+    for produto in origem_products or []:
+        if not isinstance(produto, dict):
+            continue
+        nome = str(produto.get("nome") or produto.get("name") or "").strip()
+        ref = str(produto.get("reference") or produto.get("referencia") or produto.get("sku") or "").strip().lower()
+        rows.append((_origem_product_key(produto), nome, ref))
+    rows.sort(key=lambda r: r[0])
+    return rows
+
+
+def _id_sort_key(item_id: str):
+    return (0, int(item_id)) if item_id.isdigit() else (1, item_id)
+
+
+def _block_tokens(norm: str) -> List[str]:
+    return [t for t in norm.split() if len(t) >= BLOCK_TOKEN_MIN_LEN]
+
+
+def _init_worker(destino_rows: List[Tuple[str, str, str, str]]) -> None:
+    by_norm: Dict[str, List[int]] = {}
+    by_ref: Dict[str, int] = {}
+    by_token: Dict[str, List[int]] = {}
+    for idx, (_id, _name, norm, ref) in enumerate(destino_rows):
+        by_norm.setdefault(norm, []).append(idx)
+        if ref and ref not in by_ref:
+            by_ref[ref] = idx
+        for tok in set(_block_tokens(norm)):
+            by_token.setdefault(tok, []).append(idx)
+    _WORKER_INDEX.clear()
+    _WORKER_INDEX.update({
+        "rows": destino_rows,
+        "by_norm": by_norm,
+        "by_ref": by_ref,
+        "by_token": by_token,
+    })
+
+
+def _score_one(nome: str, ref: str) -> Tuple[Optional[int], float, str]:
+    """Retorna (índice DESTINO, score, regra) para um produto da ORIGEM."""
+    rows = _WORKER_INDEX["rows"]
+    if ref and ref in _WORKER_INDEX["by_ref"]:
+        return _WORKER_INDEX["by_ref"][ref], 1.0, "ref"
+
+    norm = normalize_name(nome)
+    if not norm:
+        return None, 0.0, "none"
+
+    exact = _WORKER_INDEX["by_norm"].get(norm)
+    if exact:
+        return exact[0], 1.0, "exact"
+
+    candidates = set()
+    for tok in set(_block_tokens(norm)):
+        candidates.update(_WORKER_INDEX["by_token"].get(tok, ()))
+
+    best = _best_candidate(nome, norm, sorted(candidates))
+    if best[0] is None:
+        # sem token em comum (ou nenhum casou): varre o catálogo inteiro
+        best = _best_candidate(nome, norm, range(len(rows)))
+    return best
+
+
+def _best_candidate(nome: str, norm: str, indices) -> Tuple[Optional[int], float, str]:
+    """Melhor índice entre `indices` que names_match aceita (empate → menor id)."""
+    rows = _WORKER_INDEX["rows"]
+    best: Tuple[Optional[int], float, str] = (None, 0.0, "none")
+    matcher = SequenceMatcher(None)
+    matcher.set_seq2(norm)  # seq2 é o lado caro (cacheado pelo difflib)
+    for idx in indices:
+        cand_norm = rows[idx][2]
+        if len(norm) > NAME_CONTAINS_MIN_LEN and (norm in cand_norm or cand_norm in norm):
+            score = min(len(norm), len(cand_norm)) / max(len(norm), len(cand_norm))
+            rule = "contains"
+        else:
+            matcher.set_seq1(cand_norm)
+            # limites superiores baratos antes do ratio() completo
+            if matcher.real_quick_ratio() <= max(NAME_FUZZY_THRESHOLD, best[1]):
+                continue
+            if matcher.quick_ratio() <= max(NAME_FUZZY_THRESHOLD, best[1]):
+                continue
+            score = matcher.ratio()
+            rule = "fuzzy"
+        # a decisão é a mesma do matching online
+        if score <= best[1] or not names_match(nome, rows[idx][1]):
+            continue
+        # candidatos em ordem de id → empate fica com o menor id (determinístico)
+        best = (idx, score, rule)
+    return best
+
+
+def _reconcile_chunk(chunk: List[Tuple[str, str, str]]) -> List[dict]:
+    rows = _WORKER_INDEX["rows"]
+    out = []
+    for origem_key, nome, ref in chunk:
+        idx, score, rule = _score_one(nome, ref)
+        destino_id, destino_name = ("", "") if idx is None else (rows[idx][0], rows[idx][1])
+        out.append({
+            "origem_key": origem_key,
+            "origem_nome": nome,
+            "destino_id": destino_id,
+            "destino_name": destino_name,
+            "score": round(score, 4),
+            "rule": rule,
+        })
+    return out
+
+
+def reconcile_catalog(
+    origem_products: List[dict],
+    destino_items: List[dict],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> List[dict]:
+    """
+    Cruza o catálogo inteiro e devolve a tabela de matches:
+      [{origem_key, origem_nome, destino_id, destino_name, score, rule}, ...]
+    rule ∈ {"ref", "exact", "contains", "fuzzy", "none"}.
+    workers=1 roda no processo atual (mesmo resultado).
+    """
+    destino_rows = _destino_rows(destino_items)
+    origem_rows = _origem_rows(origem_products)
+    chunks = [origem_rows[i:i + chunk_size] for i in range(0, len(origem_rows), max(1, chunk_size))]
+    workers = workers or os.cpu_count() or 1
+
+    logger.info(
+        "🧮 Reconciliação: %d ORIGEM × %d DESTINO em %d blocos (%d workers)",
+        len(origem_rows), len(destino_rows), len(chunks), workers,
+    )
+
+    table: List[dict] = []
+    if workers <= 1 or len(chunks) <= 1:
+        _init_worker(destino_rows)
+        for chunk in chunks:
+            table.extend(_reconcile_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(destino_rows,)
+        ) as pool:
+            # map preserva a ordem dos blocos
+            for part in pool.map(_reconcile_chunk, chunks):
+                table.extend(part)
+
+    table.sort(key=lambda r: r["origem_key"])
+    matched = sum(1 for r in table if r["destino_id"])
+    logger.info("✅ Reconciliação: %d/%d produtos da ORIGEM com match", matched, len(table))
+    return table
+
+
+def save_match_table(table: List[dict], path: str) -> str:
+    """Salva a tabela em .json ou .csv (decidido pela extensão)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.lower().endswith(".csv"):
+        fields = ["origem_key", "origem_nome", "destino_id", "destino_name", "score", "rule"]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(table)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(table, f, indent=2, ensure_ascii=False)
+    return path
@@ -2,18 +2,29 @@
 import json
 import logging
 import os
+import queue
 import random
+import tempfile
+import threading
 import time
 import requests
 from typing import Any, List, Dict, Optional
+from urllib.parse import urlparse
+
+from patchright.sync_api import sync_playwright
 from service.auth import authenticate
 from service.auth import load_storage_state, _resolve_state_path
 from service.sync_mod import config
 from service.sync_mod import destino_api
 from service.sync_mod import destino_page
+from service.sync_mod.destino_page import _origem_product_key
 from service.sync_mod import domain
+from service.sync_mod import ledger as sync_ledger
+from service.sync_mod.info_catalog import AdditionalInfoCatalog
 from service.sync_mod.services.additional_info_sync import sync_additional_infos
+from service.sync_mod.services.infos_verification import InfosVerifier
 from service.sync_mod.services.variant_sync import sync_variants
+from service.sync_mod.stages import ProductStages, close_stage_page
 
 logger = logging.getLogger("sync")
 
@@ -56,7 +67,13 @@ def _log_section(title: str):
     logger.info(" %s", title)
     logger.info("─" * 70)
 
+_LOG_LOCK = threading.Lock()
+
 def _save_log(log_entry: dict):
+    with _LOG_LOCK:
+        _save_log_locked(log_entry)
+
+def _save_log_locked(log_entry: dict):
     try:
         os.makedirs(os.path.dirname(config.LOG_FILE), exist_ok=True)
         existing = []
@@ -76,22 +93,6 @@ def _save_log(log_entry: dict):
     except Exception as exc:
         logger.warning("Erro ao salvar log: %s", exc)
 
-def _origem_product_key(produto: dict) -> str:
-    if not isinstance(produto, dict) or not produto:
-        return "invalid:none"
-    produto_id = str(produto.get("produto_id") or produto.get("id") or "").strip()
-    if produto_id and produto_id.isdigit() and produto_id != "0":
-        return f"id:{produto_id}"
-    referencia = str(produto.get("reference") or produto.get("referencia") or produto.get("sku") or "").strip()
-    if referencia:
-        return f"ref:{referencia.lower()}"
-    nome = str(produto.get("nome") or "").strip()
-    if nome:
-        nome_lower = nome.lower()[:80]
-        nome_hash = str(abs(hash(nome_lower)))[:10]
-        return f"nome:{nome_lower}|{nome_hash}"
-    return f"hash:{id(produto)}"
-
 # ====================== CACHE ======================
 DESTINO_CACHE: Dict[str, Any] = {}
 
@@ -104,7 +105,7 @@ def _preload_destino_cache(page: Any) -> bool:
     total_pages = 1
     loaded_count = 0
     logger.info("🚀 Pré-carregando cache DESTINO...")
-    token = destino_page._extract_destino_token(page)
+    token = destino_page.get_destino_token(page)
     headers = {"Accept": "application/json", "X-Requested-With": "XMLHttpRequest"}
     if token:
         headers["Authorization"] = token
@@ -228,6 +229,452 @@ def _force_additional_infos_for_rings(destino_json: dict, origem_prod: dict) ->
         
     return False
 
+def _process_match(
+    page: Any,
+    match: dict,
+    origem_key: str,
+    fingerprint: str,
+    ledger: sync_ledger.SyncLedger,
+    origin_base: str,
+    has_origin_access: bool,
+    cookies_origem,
+    info_catalog: AdditionalInfoCatalog,
+    verifier: Optional[InfosVerifier],
+    short_delay,
+    medium_delay,
+):
+    """Pipeline de UM produto: GET detalhe → (PUT ∥ infos adicionais) → variações.
+
+    Retorna (status, log_entry) com status "processed" ou "failed".
+    """
+    pid = match["destino_id"]
+    nome = match["destino_name"]
+    origem_prod = match["origem_product"]
+
+    destino_json, token = destino_page.fetch_product_fast(page, pid, logger)
+    log_entry = {"destino_id": pid, "destino_name": nome, "origem_nome": (origem_prod.get("nome") or "")}
+    
+    if not destino_json or not token:
+        logger.error(f"❌ Falha JSON/token produto {pid}")
+        log_entry["status"] = "erro_json_token"
+        ledger.record(origem_key, fingerprint, pid, log_entry["status"])
+        destino_page._append_live_result(destino_page.ENCONTRADOS_PATH, origem_prod.get("nome") or nome)
+        _save_log(log_entry)
+        return "failed", log_entry
+    
+    stages = None
+    sent_images = None  # URLs de imagem de um PUT aceito (vão para o ledger)
+    try:
+        payload = domain.build_product_payload(origem_prod, destino_json)
+        if getattr(config, "PUT_ONLY_CHANGED_FIELDS", False):
+            payload = domain.diff_product_payload(
+                payload, destino_json, sent_images=ledger.sent_images(origem_key, pid),
+            )
+
+        # PUT em voo na aba auxiliar enquanto ORIGEM/infos usam a aba principal
+        stages = ProductStages(page, pid, token, logger)
+        if not payload:
+            logger.info("⏭️ Produto %s sem alterações de campos — PUT pulado", pid)
+            log_entry["put_status"] = "unchanged"
+        else:
+            stages.start_put(payload)
+        
+        infos_origem = _get_origem_infos(origem_prod)
+        variacoes_origem = _get_origem_variacoes(origem_prod)
+        logger.info(
+            "📦 Produto ORIGEM: %d infos adicionais, %d variações",
+            len(infos_origem), len(variacoes_origem),
+        )
+        
+        if variacoes_origem:
+            for i, v in enumerate(variacoes_origem[:3]):
+                sku_items = domain._extract_sku_items_from_variant(v)
+                logger.info(" var[%d]: %s", i, sku_items)
+        
+        destino_is_infos_model = (
+            _is_additional_infos_model(destino_json, origem_prod) or
+            _force_additional_infos_for_rings(destino_json, origem_prod)
+        )
+        infos_from_variacoes_mode = bool(destino_is_infos_model and variacoes_origem)
+        if infos_from_variacoes_mode:
+            # a limpeza das variações só precisa da listagem → já dispara
+            stages.start_variants_listing()
+        
+        if infos_from_variacoes_mode:
+            infos_to_sync = domain.build_infos_for_additional_model(origem_prod)
+            source_context = "origem_infos+variacoes"
+            logger.info(
+                "🔁 Modo infos_from_variacoes: %d variações + %d infos → %d infos merged",
+                len(variacoes_origem), len(infos_origem), len(infos_to_sync),
+            )
+        else:
+            infos_to_sync = infos_origem
+            source_context = "origem_infos"
+        
+        should_create_fields = bool(infos_to_sync)
+        
+        # ==================== NOVA LÓGICA DE OPÇÕES CHECKED ====================
+        origin_checked_options = None
+        origem_product_id = str(
+            origem_prod.get("produto_id") or origem_prod.get("id") or ""
+        ).strip()
+
+        if has_origin_access and origem_product_id:
+            logger.info("📖 Coletando opções checked da ORIGEM (produto %s)...", origem_product_id)
+
+            # PRIORIDADE MÁXIMA: Variações da origem (o que você precisa!)
+            if destino_is_infos_model and variacoes_origem:
+                origin_checked_options = domain.extract_checked_options_from_variants(
+                    origem_prod,
+                    page=page,
+                    origin_base=origin_base,
+                    cookies_origem=cookies_origem,
+                    logger=logger,
+                )
+                if origin_checked_options:
+                    logger.info("✅ Usando VARIAÇÕES enriquecidas da origem como fonte de checkboxes")
+                else:
+                    logger.warning("⚠️ Enriquecimento de variações retornou vazio")
+
+            # Fallback (caso tenha AdditionalInfos diretas na origem)
+            if not origin_checked_options:
+                try:
+                    origin_checked_options = destino_api.read_origin_checked_options_playwright(
+                        page=page, origin_base=origin_base,
+                        product_id=origem_product_id,
+                        cookies_origem=cookies_origem, logger=logger,
+                    )
+                    if not origin_checked_options:
+                        origin_checked_options = destino_api.read_origin_checked_options(
+                            page=page, origin_base=origin_base,
+                            product_id=origem_product_id,
+                            cookies_origem=cookies_origem, logger=logger,
+                        )
+                except Exception as exc:
+                    logger.warning("⚠️ Erro lendo ORIGEM: %s", exc)
+        # =====================================================================
+        
+        logger.info(
+            "📋 Infos: %d | create=%s | source=%s | options=%s",
+            len(infos_to_sync), should_create_fields, source_context,
+            "ORIGEM_HTML" if origin_checked_options else "JSON_FALLBACK",
+        )
+        
+        sync_additional_infos(
+            page, pid, infos_to_sync, token, log_entry,
+            short_delay=short_delay, medium_delay=medium_delay,
+            create_missing_fields=should_create_fields,
+            source_context=source_context,
+            origin_checked_options=origin_checked_options,
+            catalog=info_catalog,
+            verifier=verifier,
+        )
+
+        # variações escrevem no mesmo produto → dependem do PUT
+        put_result = stages.wait_put()
+        if put_result is not None:
+            ok, status, body = put_result
+            if not ok:
+                logger.error("❌ PUT falhou (ID %s, status %d): %s", pid, status, (body or "")[:200])
+                log_entry["status"] = "erro_put"
+                log_entry["put_http_status"] = status
+                ledger.record(origem_key, fingerprint, pid, log_entry["status"])
+                destino_page._append_live_result(destino_page.ENCONTRADOS_PATH, origem_prod.get("nome") or nome)
+                _save_log(log_entry)
+                return "failed", log_entry
+
+            log_entry["put_status"] = "sucesso"
+            log_entry["put_http_status"] = status
+            log_entry["put_fields"] = sorted(payload.keys())
+            if "ProductImage" in payload:
+                sent_images = domain._image_urls(payload["ProductImage"])
+        
+        sync_variants(
+            page, pid, origem_prod, token, log_entry,
+            short_delay=short_delay, medium_delay=medium_delay,
+            infos_already_synced=infos_from_variacoes_mode,
+            origin_base=origin_base,
+            cookies_origem=cookies_origem,
+            destino_variants=stages.wait_variants_listing() if infos_from_variacoes_mode else None,
+        )
+
+        # Se coletamos campos/opções via DOM na etapa de variantes, atualizar ORIGEM
+        try:
+            dom_opts = log_entry.get("variants_options_collected") or {}
+            origem_prod_id = str(origem_prod.get("produto_id") or origem_prod.get("id") or "").strip()
+            if dom_opts and origem_prod_id and origin_base and cookies_origem:
+                infos_for_origin = []
+                for prop, opts in dom_opts.items():
+                    op_list = []
+                    for o in opts:
+                        if not o or not str(o).strip():
+                            continue
+                        op_list.append({"nome": str(o).strip(), "valor": "0.00"})
+                    if op_list:
+                        infos_for_origin.append({"nome": prop, "opcoes": op_list})
+
+                if infos_for_origin:
+                    logger.info("🔁 Atualizando AdditionalInfos NA ORIGEM (produto %s) com %d campos", origem_prod_id, len(infos_for_origin))
+                    ok, status, body = destino_api.put_origin_additional_infos(
+                        page, origin_base, origem_prod_id, infos_for_origin, cookies_origem, logger
+                    )
+                    if ok:
+                        logger.info("✅ ORIGEM AdditionalInfos atualizadas (status %s)", status)
+                        log_entry["origin_additional_infos_update"] = {"status": "ok", "http_status": status}
+                    else:
+                        logger.warning("⚠️ Falha atualizar ORIGEM AdditionalInfos: status=%s body=%s", status, (body or "")[:300])
+                        log_entry["origin_additional_infos_update"] = {"status": "error", "http_status": status, "detail": (body or "")[:400]}
+        except Exception as exc:
+            logger.warning("Erro atualizando ORIGEM AdditionalInfos: %s", exc)
+            log_entry["origin_additional_infos_update"] = {"status": "error", "http_status": 0, "detail": str(exc)[:400]}
+        
+        destino_page.append_encontrado_sincronizado(origem_prod.get("nome") or nome)
+        log_entry["status"] = "sucesso"
+        infos_status = (log_entry.get("infos_adicionais") or {}).get("status")
+        origem_status = (log_entry.get("origin_additional_infos_update") or {}).get("status")
+        if infos_status == "falha_post":
+            ledger_status = "parcial_infos"
+        elif origem_status == "error":
+            # ORIGEM não recebeu as infos: o produto volta na próxima execução
+            ledger_status = "parcial_origem"
+        elif verifier is not None and verifier.is_pending(pid):
+            # só vira sucesso depois da ETAPA 4; se ela não rodar, o produto volta na próxima execução
+            ledger_status = sync_ledger.STATUS_PENDING_VERIFY
+        else:
+            ledger_status = sync_ledger.STATUS_OK
+        ledger.record(origem_key, fingerprint, pid, ledger_status, images=sent_images)
+        _save_log(log_entry)
+        return "processed", log_entry
+    
+    except Exception as exc:
+        logger.error("❌ Erro produto %s: %s", pid, exc, exc_info=True)
+        log_entry["status"] = "erro_execucao"
+        log_entry["erro"] = str(exc)
+        _record_inflight_put(stages, log_entry, pid)
+        ledger.record(origem_key, fingerprint, pid, log_entry["status"])
+        destino_page._append_live_result(destino_page.ENCONTRADOS_PATH, origem_prod.get("nome") or nome)
+        _save_log(log_entry)
+        return "failed", log_entry
+
+
+def _record_inflight_put(stages: Optional[ProductStages], log_entry: dict, pid: str) -> None:
+    """Erro entre start_put e wait_put: coleta o PUT em voo e registra se ele foi aplicado."""
+    if stages is None or "put_http_status" in log_entry:
+        return
+    try:
+        put_result = stages.wait_put()
+    except Exception as exc:
+        log_entry["put_status"] = "desconhecido"
+        log_entry["put_erro"] = str(exc)
+        return
+    if put_result is None:
+        return
+    ok, status, body = put_result
+    log_entry["put_status"] = "sucesso" if ok else "erro_put"
+    log_entry["put_http_status"] = status
+    if ok:
+        logger.info("ℹ️ PUT do produto %s foi aplicado (status %d) antes do erro", pid, status)
+    else:
+        logger.warning("⚠️ PUT do produto %s falhou (status %d): %s", pid, status, (body or "")[:200])
+
+
+def _run_deferred_verification(page: Any, verifier: InfosVerifier, job_keys: dict, ledger: sync_ledger.SyncLedger) -> int:
+    """
+    Confere em lote os POSTs de infos adicionais. Conferidos/corrigidos passam
+    de verificação pendente a sucesso no ledger (parciais ficam como estão),
+    divergentes a "verificacao_falhou"; indeterminados (vínculos ilegíveis) e,
+    se a etapa falhar, todos seguem como verificação pendente.
+    """
+    try:
+        results = verifier.run(page, destino_page.get_destino_token(page), short_delay=_short_delay)
+    except Exception as exc:
+        logger.error("❌ Erro na verificação em lote: %s", exc)
+        return 0
+
+    divergentes = 0
+    for pid, result in results.items():
+        divergente = result["status"] == "divergente"
+        divergentes += divergente
+        origem_key, fingerprint = job_keys.get(str(pid), (None, None))
+        if not origem_key:
+            continue
+        if divergente:
+            ledger.record(origem_key, fingerprint, pid, "verificacao_falhou")
+        elif result["status"] == "indeterminado":
+            continue  # segue pendente: volta na próxima execução
+        elif (ledger.get(origem_key) or {}).get("status", sync_ledger.STATUS_PENDING_VERIFY) == sync_ledger.STATUS_PENDING_VERIFY:
+            # só promove quem esperava a verificação (parcial_* continua parcial)
+            ledger.record(origem_key, fingerprint, pid, sync_ledger.STATUS_OK)
+
+    _save_log({
+        "tipo": "verificacao_infos",
+        "total": len(results),
+        "resultados": results,
+    })
+    return divergentes
+
+
+def _log_product_done(log_entry: dict, nome: str, done: int, target_count: int) -> None:
+    # Adicionar informações de opções DOM coletadas, se houver
+    extra_lines = []
+    try:
+        dom_opts = log_entry.get("variants_options_collected") or {}
+        # dom_opts: { field_name: [opt1, opt2, ...], ... }
+        for field, opts in dom_opts.items():
+            if not opts:
+                continue
+            clicks = []
+            for o in opts[:10]:
+                txt = str(o).replace('"', '\\"')
+                clicks.append(f'page.get_by_text("{txt}", exact=True).click()')
+            extra_lines.append(f"{field}: " + " ".join(clicks))
+    except Exception:
+        extra_lines = []
+
+    if extra_lines:
+        logger.info("✅ %s/%s | %s\n%s", done, target_count, nome, "\n".join(extra_lines))
+    else:
+        logger.info(f"✅ {done}/{target_count} | {nome}")
+
+
+# ====================== WORKERS CONCORRENTES ======================
+class _HostPacer:
+    """Espaçamento mínimo entre passos de rede no mesmo host, compartilhado entre workers."""
+
+    def __init__(self, min_interval_s: float):
+        self.min_interval_s = max(0.0, float(min_interval_s or 0.0))
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str, slots: int = 1) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval_s * max(1, slots)
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _sync_worker(worker_id: int, state_path: str, job_queue: "queue.Queue", shared: dict, common: dict) -> None:
+    """Thread com seu próprio Playwright/browser (a API sync não é thread-safe),
+    autenticado com o storage_state do contexto principal."""
+    pacer: _HostPacer = shared["pacer"]
+    host = urlparse(config.DESTINO_BASE).netloc
+    short_delay = lambda: pacer.wait(host)
+    medium_delay = lambda: pacer.wait(host, slots=2)
+    tag = f"[w{worker_id}]"
+
+    try:
+        with sync_playwright() as pw:
+            browser = pw.chromium.launch(
+                headless=getattr(config, "SYNC_WORKER_HEADLESS", True),
+                channel="chrome",
+                args=["--no-sandbox"],
+            )
+            try:
+                ctx = browser.new_context(
+                    storage_state=state_path,
+                    viewport={"width": 1920, "height": 1080},
+                    locale="pt-BR",
+                    timezone_id="America/Sao_Paulo",
+                )
+                page = ctx.new_page()
+                page.goto(f"{config.DESTINO_BASE}/admin/products/list", wait_until="domcontentloaded", timeout=30000)
+
+                while True:
+                    try:
+                        job = job_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    match, origem_key, fingerprint = job
+                    nome = match["destino_name"]
+                    logger.info("%s → %s", tag, nome[:70])
+                    short_delay()
+                    try:
+                        status, log_entry = _process_match(
+                            page, match, origem_key, fingerprint,
+                            short_delay=short_delay, medium_delay=medium_delay, **common,
+                        )
+                    except Exception as exc:
+                        logger.error("%s ❌ Erro inesperado em %s: %s", tag, nome[:70], exc)
+                        status, log_entry = "failed", {}
+                    finally:
+                        job_queue.task_done()
+
+                    with shared["lock"]:
+                        if status == "processed":
+                            shared["processed"] += 1
+                            done = shared["processed"]
+                        else:
+                            shared["failed"] += 1
+                            done = None
+                    if done is not None:
+                        _log_product_done(log_entry, f"{tag} {nome}", done, shared["target"])
+            finally:
+                try:
+                    close_stage_page(ctx)
+                except Exception:
+                    pass
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+    except Exception as exc:
+        logger.error("%s ❌ Worker encerrado: %s", tag, exc)
+
+
+def _run_worker_pool(context: Any, jobs: list, target_count: int, workers: int, common: dict):
+    """Distribui os matches entre K workers (fila compartilhada).
+
+    Retorna (processados, falhas, jobs_restantes) — restantes só existem se
+    algum worker não conseguiu subir; o chamador processa na página principal.
+    """
+    fd, state_path = tempfile.mkstemp(prefix="tmp_sync_state_", suffix=".json")
+    os.close(fd)
+    job_queue: "queue.Queue" = queue.Queue()
+    for job in jobs:
+        job_queue.put(job)
+
+    shared = {
+        "lock": threading.Lock(),
+        "processed": 0,
+        "failed": 0,
+        "target": target_count,
+        "pacer": _HostPacer(getattr(config, "SYNC_HOST_MIN_INTERVAL_S", 1.0)),
+    }
+    try:
+        context.storage_state(path=state_path)
+        logger.info("🧵 %d workers | intervalo mínimo por host: %.1fs", workers, shared["pacer"].min_interval_s)
+        threads = [
+            threading.Thread(
+                target=_sync_worker,
+                args=(i + 1, state_path, job_queue, shared, common),
+                name=f"sync-worker-{i + 1}",
+                daemon=True,
+            )
+            for i in range(workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    except Exception as exc:
+        logger.error("❌ Falha no pool de workers: %s", exc)
+    finally:
+        try:
+            os.remove(state_path)
+        except OSError:
+            pass
+
+    remaining = []
+    while True:
+        try:
+            remaining.append(job_queue.get_nowait())
+        except queue.Empty:
+            break
+    return shared["processed"], shared["failed"], remaining
+
+
 def run_sync(
     context: Any,
     storage_origem=None,
@@ -236,6 +683,7 @@ def run_sync(
     source_user: str = "",
     source_pass: str = "",
     cookies_origem: list = None,
+    force: bool = False,
 ):
     print("\n" + "═" * 80)
     print("🔄 SYNC v9 — FIX VARIAÇÕES→ADDITIONAL INFOS + ANÉIS FORÇADOS")
@@ -297,7 +745,12 @@ def run_sync(
     processed_destino_ids = set()
     origem_por_destino_id = {}
     completed_origem_keys = set()
-    
+    skipped_unchanged_count = 0
+    force = bool(force or getattr(config, "SYNC_FORCE", False))
+    ledger = sync_ledger.SyncLedger(getattr(config, "SYNC_LEDGER_FILE", "produtos/sync_ledger.json"))
+    logger.info("📒 Ledger: %d produtos registrados | force=%s", len(ledger), force)
+
+    jobs = []
     for match in all_matches:
         pid = match["destino_id"]
         nome = match["destino_name"]
@@ -313,202 +766,70 @@ def run_sync(
         processed_destino_ids.add(str(pid))
         origem_por_destino_id[str(pid)] = (origem_prod.get("nome") or "")
         completed_origem_keys.add(origem_key)
-        
-        logger.info(f"[{processed_count+1}/{target_count}] → {nome[:70]}")
-        _short_delay()
-        
-        destino_json, token = destino_page.fetch_product_and_token(page, pid, logger)
-        log_entry = {"destino_id": pid, "destino_name": nome, "origem_nome": (origem_prod.get("nome") or "")}
-        
-        if not destino_json or not token:
-            logger.error(f"❌ Falha JSON/token produto {pid}")
-            log_entry["status"] = "erro_json_token"
-            failed_count += 1
-            destino_page._append_live_result(destino_page.ENCONTRADOS_PATH, origem_prod.get("nome") or nome)
-            _save_log(log_entry)
+
+        fingerprint = sync_ledger.origem_fingerprint(origem_prod)
+        if not force and ledger.is_unchanged(origem_key, fingerprint, pid):
+            skipped_unchanged_count += 1
+            logger.info("⏭️ Sem mudanças na ORIGEM desde o último sync — pulando %s", nome[:70])
             continue
-        
-        try:
-            payload = domain.build_product_payload(origem_prod, destino_json)
-            ok, status, body = destino_api.put_product(page, pid, payload, token)
-            if not ok:
-                logger.error("❌ PUT falhou (ID %s, status %d): %s", pid, status, (body or "")[:200])
-                log_entry["status"] = "erro_put"
-                log_entry["put_http_status"] = status
-                failed_count += 1
-                destino_page._append_live_result(destino_page.ENCONTRADOS_PATH, origem_prod.get("nome") or nome)
-                _save_log(log_entry)
-                continue
-            
-            log_entry["put_status"] = "sucesso"
-            log_entry["put_http_status"] = status
-            
-            infos_origem = _get_origem_infos(origem_prod)
-            variacoes_origem = _get_origem_variacoes(origem_prod)
-            logger.info(
-                "📦 Produto ORIGEM: %d infos adicionais, %d variações",
-                len(infos_origem), len(variacoes_origem),
-            )
-            
-            if variacoes_origem:
-                for i, v in enumerate(variacoes_origem[:3]):
-                    sku_items = domain._extract_sku_items_from_variant(v)
-                    logger.info(" var[%d]: %s", i, sku_items)
-            
-            destino_is_infos_model = (
-                _is_additional_infos_model(destino_json, origem_prod) or
-                _force_additional_infos_for_rings(destino_json, origem_prod)
-            )
-            infos_from_variacoes_mode = bool(destino_is_infos_model and variacoes_origem)
-            
-            if infos_from_variacoes_mode:
-                infos_to_sync = domain.build_infos_for_additional_model(origem_prod)
-                source_context = "origem_infos+variacoes"
-                logger.info(
-                    "🔁 Modo infos_from_variacoes: %d variações + %d infos → %d infos merged",
-                    len(variacoes_origem), len(infos_origem), len(infos_to_sync),
-                )
-            else:
-                infos_to_sync = infos_origem
-                source_context = "origem_infos"
-            
-            should_create_fields = bool(infos_to_sync)
-            
-            # ==================== NOVA LÓGICA DE OPÇÕES CHECKED ====================
-            origin_checked_options = None
-            origem_product_id = str(
-                origem_prod.get("produto_id") or origem_prod.get("id") or ""
-            ).strip()
-
-            if has_origin_access and origem_product_id:
-                logger.info("📖 Coletando opções checked da ORIGEM (produto %s)...", origem_product_id)
-
-                # PRIORIDADE MÁXIMA: Variações da origem (o que você precisa!)
-                if destino_is_infos_model and variacoes_origem:
-                    origin_checked_options = domain.extract_checked_options_from_variants(
-                        origem_prod,
-                        page=page,
-                        origin_base=origin_base,
-                        cookies_origem=cookies_origem,
-                        logger=logger,
-                    )
-                    if origin_checked_options:
-                        logger.info("✅ Usando VARIAÇÕES enriquecidas da origem como fonte de checkboxes")
-                    else:
-                        logger.warning("⚠️ Enriquecimento de variações retornou vazio")
 
-                # Fallback (caso tenha AdditionalInfos diretas na origem)
-                if not origin_checked_options:
-                    try:
-                        origin_checked_options = destino_api.read_origin_checked_options_playwright(
-                            page=page, origin_base=origin_base,
-                            product_id=origem_product_id,
-                            cookies_origem=cookies_origem, logger=logger,
-                        )
-                        if not origin_checked_options:
-                            origin_checked_options = destino_api.read_origin_checked_options(
-                                page=page, origin_base=origin_base,
-                                product_id=origem_product_id,
-                                cookies_origem=cookies_origem, logger=logger,
-                            )
-                    except Exception as exc:
-                        logger.warning("⚠️ Erro lendo ORIGEM: %s", exc)
-            # =====================================================================
-            
-            logger.info(
-                "📋 Infos: %d | create=%s | source=%s | options=%s",
-                len(infos_to_sync), should_create_fields, source_context,
-                "ORIGEM_HTML" if origin_checked_options else "JSON_FALLBACK",
-            )
-            
-            sync_additional_infos(
-                page, pid, infos_to_sync, token, log_entry,
-                short_delay=_short_delay, medium_delay=_medium_delay,
-                create_missing_fields=should_create_fields,
-                source_context=source_context,
-                origin_checked_options=origin_checked_options,
-            )
-            
-            sync_variants(
-                page, pid, origem_prod, token, log_entry,
-                short_delay=_short_delay, medium_delay=_medium_delay,
-                infos_already_synced=infos_from_variacoes_mode,
-                origin_base=origin_base,
-                cookies_origem=cookies_origem,
-            )
+        jobs.append((match, origem_key, fingerprint))
 
-            # Se coletamos campos/opções via DOM na etapa de variantes, atualizar ORIGEM
-            try:
-                dom_opts = log_entry.get("variants_options_collected") or {}
-                origem_prod_id = str(origem_prod.get("produto_id") or origem_prod.get("id") or "").strip()
-                if dom_opts and origem_prod_id and origin_base and cookies_origem:
-                    infos_for_origin = []
-                    for prop, opts in dom_opts.items():
-                        op_list = []
-                        for o in opts:
-                            if not o or not str(o).strip():
-                                continue
-                            op_list.append({"nome": str(o).strip(), "valor": "0.00"})
-                        if op_list:
-                            infos_for_origin.append({"nome": prop, "opcoes": op_list})
-
-                    if infos_for_origin:
-                        logger.info("🔁 Atualizando AdditionalInfos NA ORIGEM (produto %s) com %d campos", origem_prod_id, len(infos_for_origin))
-                        ok, status, body = destino_api.put_origin_additional_infos(
-                            page, origin_base, origem_prod_id, infos_for_origin, cookies_origem, logger
-                        )
-                        if ok:
-                            logger.info("✅ ORIGEM AdditionalInfos atualizadas (status %s)", status)
-                            log_entry["origin_additional_infos_update"] = {"status": "ok", "http_status": status}
-                        else:
-                            logger.warning("⚠️ Falha atualizar ORIGEM AdditionalInfos: status=%s body=%s", status, (body or "")[:300])
-                            log_entry["origin_additional_infos_update"] = {"status": "error", "http_status": status, "detail": (body or "")[:400]}
-            except Exception as exc:
-                logger.warning("Erro atualizando ORIGEM AdditionalInfos: %s", exc)
-            
-            destino_page.append_encontrado_sincronizado(origem_prod.get("nome") or nome)
-            log_entry["status"] = "sucesso"
-            _save_log(log_entry)
-        
-        except Exception as exc:
-            logger.error("❌ Erro produto %s: %s", pid, exc, exc_info=True)
-            log_entry["status"] = "erro_execucao"
-            log_entry["erro"] = str(exc)
+    common = {
+        "ledger": ledger,
+        "origin_base": origin_base,
+        "has_origin_access": has_origin_access,
+        "cookies_origem": cookies_origem,
+        # catálogo de Additional Infos compartilhado por todos os produtos/workers
+        "info_catalog": AdditionalInfoCatalog(logger=logger),
+        # conferência das infos adicionais em lote, depois da passada principal
+        "verifier": InfosVerifier() if getattr(config, "DEFER_INFOS_VERIFICATION", False) else None,
+    }
+    job_keys = {str(m["destino_id"]): (k, fp) for m, k, fp in jobs}
+    workers = max(1, int(getattr(config, "SYNC_WORKERS", 1) or 1))
+
+    if workers > 1 and len(jobs) > 1:
+        processed_count, failed_count, jobs = _run_worker_pool(
+            context, jobs, target_count, min(workers, len(jobs)), common
+        )
+        if jobs:
+            logger.warning("⚠️ %d produtos não processados pelos workers — seguindo na página principal", len(jobs))
+
+    for match, origem_key, fingerprint in jobs:
+        nome = match["destino_name"]
+        logger.info(f"[{processed_count+1}/{target_count}] → {nome[:70]}")
+        _short_delay()
+
+        status, log_entry = _process_match(
+            page, match, origem_key, fingerprint,
+            short_delay=_short_delay, medium_delay=_medium_delay, **common,
+        )
+        if status != "processed":
             failed_count += 1
-            destino_page._append_live_result(destino_page.ENCONTRADOS_PATH, origem_prod.get("nome") or nome)
-            _save_log(log_entry)
             continue
-        
+
         processed_count += 1
-        # Adicionar informações de opções DOM coletadas, se houver
-        extra_lines = []
-        try:
-            dom_opts = log_entry.get("variants_options_collected") or {}
-            # dom_opts: { field_name: [opt1, opt2, ...], ... }
-            for field, opts in dom_opts.items():
-                if not opts:
-                    continue
-                clicks = []
-                for o in opts[:10]:
-                    txt = str(o).replace('"', '\\"')
-                    clicks.append(f'page.get_by_text("{txt}", exact=True).click()')
-                extra_lines.append(f"{field}: " + " ".join(clicks))
-        except Exception:
-            extra_lines = []
-
-        if extra_lines:
-            logger.info("✅ %s/%s | %s\n%s", processed_count, target_count, nome, "\n".join(extra_lines))
-        else:
-            logger.info(f"✅ {processed_count}/{target_count} | {nome}")
+        _log_product_done(log_entry, nome, processed_count, target_count)
         if processed_count % 5 == 0:
             _medium_delay()
         else:
             _short_delay()
     
+    close_stage_page(page.context)
+
+    divergentes = 0
+    if common["verifier"] is not None and len(common["verifier"]):
+        _log_section("ETAPA 4: VERIFICAÇÃO DAS INFOS ADICIONAIS")
+        divergentes = _run_deferred_verification(page, common["verifier"], job_keys, ledger)
+
     print(f"\n{'═' * 80}")
     print(f"✅ SYNC CONCLUÍDO — {processed_count}/{target_count}")
     if failed_count:
         print(f"❌ Falhas: {failed_count}")
     if skipped_blocked_count:
         print(f"⛔ Bloqueados: {skipped_blocked_count}")
-    print("═" * 80)
\ No newline at end of file
+    if skipped_unchanged_count:
+        print(f"⏭️ Sem mudanças (ledger): {skipped_unchanged_count}")
+    if divergentes:
+        print(f"⚠️ Infos adicionais divergentes após verificação: {divergentes}")
+    print("═" * 80)
@@ -1,4 +1,5 @@
 from .additional_info_sync import sync_additional_infos
+from .infos_verification import InfosVerifier
 from .variant_sync import sync_variants
 
-__all__ = ["sync_additional_infos", "sync_variants"]
+__all__ = ["InfosVerifier", "sync_additional_infos", "sync_variants"]
@@ -1,11 +1,12 @@
 import logging
-import time
 from typing import Dict, List, Optional
 
 from patchright.sync_api import Page
 
 from service.sync_mod import destino_api
 from service.sync_mod import domain
+from service.sync_mod.info_catalog import AdditionalInfoCatalog
+from service.sync_mod.services.infos_verification import InfosVerifier
 
 logger = logging.getLogger("sync")
 
@@ -28,6 +29,8 @@ def sync_additional_infos(
     create_missing_fields: bool = False,
     source_context: str = "origem_infos",
     origin_checked_options: Optional[Dict[str, List[str]]] = None,
+    catalog: Optional[AdditionalInfoCatalog] = None,
+    verifier: Optional[InfosVerifier] = None,
 ):
     _log_section("SYNC INFORMAÇÕES ADICIONAIS")
 
@@ -38,8 +41,11 @@ def sync_additional_infos(
 
     origem_infos = domain.fix_opcao_banho_list(origem_infos)
 
-    info_catalog = destino_api.fetch_all_additional_infos_catalog(page, token, logger=logger)
-    if not info_catalog:
+    # catálogo da execução (carregado uma vez); sem ele, carga avulsa
+    if catalog is None:
+        catalog = AdditionalInfoCatalog(logger=logger)
+    catalog.ensure_loaded(page, token)
+    if not len(catalog):
         logger.warning("Catálogo de Additional Infos vazio no destino")
         if not create_missing_fields:
             log_entry["infos_adicionais"] = {"status": "catalogo_vazio"}
@@ -58,7 +64,7 @@ def sync_additional_infos(
             continue
 
         norm_nome = domain.normalize(nome)
-        destino_info = info_catalog.get(norm_nome)
+        destino_info = catalog.get(nome)
         destino_id = destino_info.get("id") if destino_info else None
 
         # opções da origem: lista de nomes
@@ -80,12 +86,12 @@ def sync_additional_infos(
         if create_missing_fields and (not destino_id or (opcoes_nomes and destino_info)):
             logger.info("Criando/garantindo campo '%s' tipo=%s com %d opções", nome, field_type, len(opcoes_nomes))
             ensured = destino_api.ensure_additional_info_with_options(
-                page, token, nome, opcoes_nomes, logger=logger, field_type=field_type
+                page, token, nome, opcoes_nomes, logger=logger, field_type=field_type,
+                catalog=catalog,
             )
             if ensured:
                 destino_info = ensured
                 destino_id = ensured.get("id")
-                info_catalog[norm_nome] = ensured
 
         if not destino_id:
             nao_encontrados.append(nome)
@@ -145,13 +151,20 @@ def sync_additional_infos(
         short_delay=short_delay,
         sort_entries=sort_entries,
         option_info_entries=option_info_entries,
+        verify=verifier is None,
     )
 
     if ok:
         logger.info("POST AdditionalInfos OK → %s", detail)
-        # Validação pós-envio
-        time.sleep(2)
-        atuais = destino_api.get_product_current_infos(page, product_id, logger=logger)
+        if verifier is not None:
+            # conferência fica para a etapa em lote, fora do caminho crítico
+            verifier.add(product_id, ids_desejados, sort_entries, option_info_entries, log_entry)
+            atuais = []
+        # post_additional_infos já confirmou por polling; só relê se não validou
+        elif "VALIDADO_OK" in (detail or ""):
+            atuais = list(ids_desejados)
+        else:
+            atuais = destino_api.get_product_current_infos(page, product_id, logger=logger)
         log_entry["infos_adicionais"] = {
             "status": "sucesso",
             "ids_enviados": ids_desejados,
@@ -161,6 +174,7 @@ def sync_additional_infos(
             "stats": opcoes_stats,
             "nao_encontrados": nao_encontrados,
             "opcoes_nao_mapeadas": opcoes_nao_encontradas,
+            "verificacao": "pendente" if verifier is not None else "inline",
         }
     else:
         logger.error("Falha no POST AdditionalInfos: %s", detail)
@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from patchright.sync_api import Page
+
+from service.page_fetch import fetch_json_many
+from service.sync_mod import config
+from service.sync_mod import destino_api
+from service.sync_mod.domain import api_headers
+from service.sync_mod.edit_form import get_edit_form
+
+logger = logging.getLogger("sync")
+
+
+class InfosVerifier:
+    """
+    Verificação em lote das infos adicionais, fora do caminho crítico.
+
+    Durante a passada principal o POST é enviado com verify=False e o produto
+    entra na fila (add). Depois, run() relê os vínculos de todos de uma vez
+    (GETs concorrentes na página), repete a leitura só dos divergentes com
+    backoff e reenvia o POST (com verificação inline) apenas para quem ainda
+    não bate. Produto cujos vínculos não deu para ler (nem pela API nem pelo
+    formulário) fica "indeterminado" — não conta como divergente nem é reenviado.
+    """
+
+    def __init__(self, max_retries: Optional[int] = None):
+        self.max_retries = (
+            config.INFOS_VERIFY_RETRIES if max_retries is None else max_retries
+        )
+        self._pending: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def is_pending(self, product_id: str) -> bool:
+        with self._lock:
+            return str(product_id) in self._pending
+
+    def add(
+        self,
+        product_id: str,
+        ids_enviados: List[str],
+        sort_entries: List[str],
+        option_info_entries: List[str],
+        log_entry: Optional[dict] = None,
+    ) -> None:
+        with self._lock:
+            self._pending[str(product_id)] = {
+                "product_id": str(product_id),
+                "ids_enviados": [str(x) for x in ids_enviados],
+                "sort_entries": list(sort_entries),
+                "option_info_entries": list(option_info_entries),
+                "log_entry": log_entry,
+            }
+
+    # ------------------------------------------------------------------ leitura em lote
+    def _read_linked(self, page: Page, token: str, product_ids: List[str], short_delay=None) -> Dict[str, Optional[List[str]]]:
+        """{product_id: ids vinculados}; None = não deu para ler (≠ lista vazia)."""
+        urls = [f"{config.DESTINO_BASE}/admin/api/products/{pid}" for pid in product_ids]
+        results = fetch_json_many(
+            page, urls, headers=api_headers(token),
+            concurrency=config.INFOS_VERIFY_CONCURRENCY,
+        )
+        linked: Dict[str, Optional[List[str]]] = {}
+        for pid, res in zip(product_ids, results):
+            ids = destino_api.linked_info_ids(res["json"]) if res["status"] == 200 else []
+            if not ids:
+                # API sem os vínculos → formulário (HTTP; renderiza se o HTML não trouxer o estado)
+                form = get_edit_form(page, pid, logger, short_delay)
+                ids = list(form["ids"]) if form else None
+            linked[pid] = ids
+        return linked
+
+    def _mismatches(self, page: Page, token: str, pending: Dict[str, dict], short_delay=None):
+        """
+        Relê com backoff até todos baterem ou estourar o teto. Devolve
+        (divergentes {pid: ids lidos}, indeterminados [pid]).
+        """
+        deadline = time.monotonic() + config.INFOS_VERIFY_TIMEOUT_S
+        interval = config.INFOS_VERIFY_INITIAL_S
+        remaining = list(pending)
+        observed: Dict[str, Optional[List[str]]] = {}
+        while remaining:
+            linked = self._read_linked(page, token, remaining, short_delay)
+            observed.update(linked)
+            remaining = [
+                pid for pid in remaining
+                if linked.get(pid) is None or set(linked[pid]) != set(pending[pid]["ids_enviados"])
+            ]
+            left = deadline - time.monotonic()
+            if not remaining or left <= 0:
+                break
+            time.sleep(min(interval, left))
+            interval = min(interval * 2, config.INFOS_VERIFY_MAX_INTERVAL_S)
+        unknown = [pid for pid in remaining if observed.get(pid) is None]
+        return {pid: observed[pid] for pid in remaining if observed.get(pid) is not None}, unknown
+
+    # ------------------------------------------------------------------ execução
+    def run(self, page: Page, token: str, short_delay) -> Dict[str, dict]:
+        """
+        Verifica todos os pendentes. Retorna {product_id: resultado}, com
+        resultado["status"] ∈ {"ok", "corrigido", "divergente", "indeterminado"}.
+        """
+        with self._lock:
+            pending = dict(self._pending)
+            self._pending.clear()
+        if not pending:
+            return {}
+
+        logger.info("🔎 Verificando infos adicionais de %d produtos em lote...", len(pending))
+        mismatches, unknown = self._mismatches(page, token, pending, short_delay)
+
+        results: Dict[str, dict] = {}
+        for pid in unknown:
+            logger.warning("⚠️ Produto %s: vínculos ilegíveis (API e formulário) — verificação indeterminada", pid)
+            results[pid] = {"status": "indeterminado", "ids_atuais_pos": None}
+        for pid, item in pending.items():
+            if pid not in mismatches and pid not in results:
+                results[pid] = {"status": "ok", "ids_atuais_pos": item["ids_enviados"]}
+
+        for pid, atuais in mismatches.items():
+            item = pending[pid]
+            logger.warning(
+                "⚠️ Produto %s divergente: enviados=%s atuais=%s — reenviando",
+                pid, sorted(item["ids_enviados"]), sorted(atuais),
+            )
+            result = {"status": "divergente", "ids_atuais_pos": atuais, "tentativas": 0}
+            for _ in range(self.max_retries):
+                result["tentativas"] += 1
+                ok, detail = destino_api.post_additional_infos(
+                    page, pid, item["ids_enviados"],
+                    short_delay=short_delay,
+                    sort_entries=item["sort_entries"],
+                    option_info_entries=item["option_info_entries"],
+                    verify=True,
+                )
+                result["detail"] = detail
+                if ok:
+                    result.update({"status": "corrigido", "ids_atuais_pos": item["ids_enviados"]})
+                    break
+            results[pid] = result
+
+        # o log_entry do produto já foi gravado: o resultado vai identificado
+        # para o registro da verificação (gravado por quem chamou)
+        for pid, result in results.items():
+            entry = pending[pid].get("log_entry") or {}
+            result["destino_name"] = entry.get("destino_name")
+            result["origem_nome"] = entry.get("origem_nome")
+
+        counts: Dict[str, int] = {}
+        for result in results.values():
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        logger.info("🔎 Verificação em lote concluída: %s", counts)
+        return results
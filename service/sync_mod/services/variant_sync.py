@@ -28,21 +28,25 @@ def sync_variants(
     infos_already_synced: bool = False,
     origin_base: str = "",
     cookies_origem=None,
+    destino_variants=None,
 ):
     _log_section("SYNC VARIAÇÕES")
 
     if infos_already_synced:
         logger.warning("🧹 MODO INFOS ATIVADO — limpando todas as variações existentes...")
-        variants_existentes, _ = destino_api.get_destino_variants(page, product_id, token, logger=logger)
-        deleted_count = 0
-        for v in variants_existentes:
-            dv_id = str(v.get("id") or v.get("variant_id") or "")
-            if dv_id:
-                if destino_api.delete_variant(page, dv_id, token, logger=logger):
-                    deleted_count += 1
-                short_delay()
-        logger.info("✅ %d variações deletadas (agora só usa Additional Infos)", deleted_count)
-        log_entry["variants_deleted"] = deleted_count
+        # destino_variants: listagem já disparada em paralelo pelo ProductStages
+        variants_existentes = destino_variants
+        if variants_existentes is None:
+            variants_existentes, _ = destino_api.get_destino_variants(page, product_id, token, logger=logger)
+        ids = [str(v.get("id") or v.get("variant_id") or "") for v in variants_existentes]
+        result = destino_api.delete_variants(page, ids, token, logger=logger, product_id=product_id)
+        logger.info(
+            "✅ %d variações deletadas, %d já ausentes (agora só usa Additional Infos)",
+            result["deleted"], result["already_gone"],
+        )
+        log_entry["variants_deleted"] = result["deleted"]
+        log_entry["variants_already_gone"] = result["already_gone"]
+        log_entry["variants_delete_result"] = result
         log_entry["variants_action"] = "deleted_all_due_to_infos_mode"
         return
 
@@ -191,14 +195,13 @@ def sync_variants(
                 else:
                     logger.info("    ✅ Valor '%s' já existe em '%s'", prop_value, prop_type)
 
-    deleted = 0
-    for key in so_destino:
-        dv = destino_by_key[key]
-        dv_id = str(dv.get("id") or dv.get("variant_id", ""))
-        if dv_id:
-            short_delay()
-            if destino_api.delete_variant(page, dv_id, token, logger=logger):
-                deleted += 1
+    delete_result = destino_api.delete_variants(
+        page,
+        [str(destino_by_key[key].get("id") or destino_by_key[key].get("variant_id", "")) for key in so_destino],
+        token,
+        logger=logger,
+        product_id=product_id,
+    )
 
     variants_payload = []
     for key in keys_origem:
@@ -256,7 +259,10 @@ def sync_variants(
         "destino_antes": len(keys_destino),
         "match": len(em_ambos),
         "criadas": len(so_origem),
-        "deletadas": deleted,  
+        "deletadas": delete_result["deleted"],
+        "ja_ausentes": delete_result["already_gone"],
+        "exclusao_falhas": len(delete_result["failed"]),
+        "exclusao_confirmada": delete_result["confirmed"],
         "put_enviado": len(variants_payload),
         "metodo_envio": "POST" if use_post_for_variants else "PUT",
     }
\ No newline at end of file
@@ -0,0 +1,121 @@
+# ========================== stages.py ==========================
+# Grafo de etapas de UM produto, com as independentes em paralelo.
+#
+#   PUT produto ──────────────────────────────┐
+#   opções ORIGEM → POST infos adicionais ────┼─→ variações → infos na ORIGEM
+#   listagem variações DESTINO (modo infos) ──┘
+#
+# O PUT só mexe em campos do produto e o POST de infos vai para o formulário
+# PHP; não dependem um do outro. Variações escrevem no mesmo produto, então
+# esperam o PUT. Como a API sync do Patchright não é thread-safe, o paralelismo
+# é de requisição: o PUT (e a listagem de variações) são disparados como fetch
+# pendente numa aba auxiliar do mesmo contexto, que nunca navega — a aba
+# principal segue livre para ir à ORIGEM / renderizar formulários.
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from patchright.sync_api import Page
+
+from service.page_fetch import PendingFetch, start_fetch
+
+from .config import DESTINO_BASE, DESTINO_VARIANTS_PAGE_SIZE
+from .domain import api_headers
+
+_logger = logging.getLogger("sync")
+
+# aba auxiliar por contexto (cada worker tem o seu)
+_STAGE_PAGES: Dict[int, Page] = {}
+_STAGE_LOCK = threading.Lock()
+
+PUT_TIMEOUT_MS = 45000
+
+
+def stage_page(page: Page) -> Optional[Page]:
+    """Aba auxiliar na origem do DESTINO (mesmos cookies), criada uma vez por contexto."""
+    context = page.context
+    key = id(context)
+    with _STAGE_LOCK:
+        side = _STAGE_PAGES.get(key)
+        if side is not None and not side.is_closed() and side.context is context:
+            return side
+        try:
+            side = context.new_page()
+            # qualquer documento da mesma origem basta para o fetch levar os cookies
+            side.goto(f"{DESTINO_BASE}/robots.txt", wait_until="domcontentloaded", timeout=20000)
+        except Exception as exc:
+            _logger.warning("Aba auxiliar indisponível (%s) — etapas em sequência", exc)
+            return None
+        _STAGE_PAGES[key] = side
+        return side
+
+
+def close_stage_page(context) -> None:
+    with _STAGE_LOCK:
+        side = _STAGE_PAGES.pop(id(context), None)
+    if side is not None:
+        try:
+            side.close()
+        except Exception:
+            pass
+
+
+class ProductStages:
+    """Etapas em voo de um produto; cada wait_* bloqueia só quando o resultado é necessário."""
+
+    def __init__(self, page: Page, product_id: str, token: str, logger=None):
+        self.page = page
+        self.product_id = str(product_id)
+        self.token = token
+        self.logger = logger or _logger
+        self.side = stage_page(page)
+        self._put: Optional[PendingFetch] = None
+        self._variants: Optional[PendingFetch] = None
+
+    def _start(self, spec: dict, timeout_ms: int = PUT_TIMEOUT_MS) -> PendingFetch:
+        if self.side is not None:
+            return start_fetch(self.side, spec, timeout_ms)
+        # sem aba auxiliar: na principal o fetch pendente morreria na navegação
+        # para a ORIGEM e result() reenviaria o PUT → via_request executa já, uma vez
+        return start_fetch(self.page, {**spec, "via_request": True}, timeout_ms)
+
+    # ------------------------------------------------------------------ PUT
+    def start_put(self, payload: dict) -> None:
+        self._put = self._start({
+            "url": f"{DESTINO_BASE}/admin/api/products/{self.product_id}",
+            "method": "PUT",
+            "headers": api_headers(self.token),
+            "body": json.dumps({"data": payload}),
+        })
+
+    def wait_put(self) -> Optional[Tuple[bool, int, str]]:
+        """(ok, status, corpo) do PUT, ou None se nenhum foi disparado."""
+        if self._put is None:
+            return None
+        res = self._put.result()
+        body = res["text"][:500] if res["text"] else res["error"]
+        return res["ok"], res["status"], body
+
+    # ------------------------------------------------------------------ variações
+    def start_variants_listing(self) -> None:
+        self._variants = self._start({
+            "url": (
+                f"{DESTINO_BASE}/admin/api/products/{self.product_id}/variants"
+                f"?sort=order&page[size]={DESTINO_VARIANTS_PAGE_SIZE}&page[number]=1"
+            ),
+            "method": "GET",
+            "headers": api_headers(self.token),
+        })
+
+    def wait_variants_listing(self) -> Optional[List[dict]]:
+        """Variações já listadas, ou None se for preciso listar de novo (falha / mais de uma página)."""
+        if self._variants is None:
+            return None
+        res = self._variants.result()
+        body = res["json"] if isinstance(res["json"], dict) else None
+        if res["status"] != 200 or body is None:
+            return None
+        data = list(body.get("data") or [])
+        total = int((body.get("paging") or {}).get("total") or len(data))
+        return data if total <= len(data) else None
@@ -0,0 +1,127 @@
+# service/text_canon.py
+# Canonicalização de texto compartilhada (matching de produtos, domain, infos adicionais).
+#
+# Antes existiam normalizadores espalhados (destino_page.normalize_name,
+# domain.normalize, additional_info.utils._fix_mojibake/_normalize_option_key),
+# cada um recompilando regex e refazendo NFKD a cada chamada — inclusive dentro
+# de loops aninhados. Aqui as regras ficam pré-compiladas em tabelas e os
+# resultados em um memo LRU limitado. Os nomes antigos continuam existindo e
+# delegam para cá, com exatamente a mesma saída.
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+MEMO_SIZE = 16384
+
+# ---------------------------------------------------------------------------
+# Tabelas de regras (pré-compiladas, aplicadas em ordem)
+# ---------------------------------------------------------------------------
+_WS = re.compile(r"\s+")
+
+# Sufixos/ruídos removidos do nome de produto (ordem importa)
+PRODUCT_NAME_RULES = (
+    (re.compile(r"\s+f\s+\d+\.?\d*"), ""),
+    (re.compile(r"\s+colar com nome.*$"), ""),
+    (re.compile(r"\s+banho de ouro$"), ""),
+    (re.compile(r"\s+banho de rhodium$"), ""),
+)
+
+# Sequências típicas de UTF-8 lido como latin-1/cp1252
+MOJIBAKE_MARKERS = (
+    "Ã§", "Ã£", "Ã¡", "Ã©", "Ã­", "Ã³", "Ãº",
+    "Ã¢", "Ãª", "Ã´", "Ã¼", "Ã", "Ã",
+)
+
+
+def _strip_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    nfkd = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in nfkd if not unicodedata.combining(c))
+
+
+# ---------------------------------------------------------------------------
+# API unitária (memoizada)
+# ---------------------------------------------------------------------------
+@lru_cache(maxsize=MEMO_SIZE)
+def canonical_name(name: str) -> str:
+    """Nome de produto para matching (regras de destino_page.normalize_name)."""
+    if not name:
+        return ""
+    text = _WS.sub(" ", _strip_accents(name).lower().strip())
+    for pattern, repl in PRODUCT_NAME_RULES:
+        text = pattern.sub(repl, text)
+    return text.strip()
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _fold_str(text: str) -> str:
+    return _strip_accents(" ".join(text.strip().split()).lower())
+
+
+def fold(name) -> str:
+    """Chave sem acento/caixa/espaços extras (regras de domain.normalize)."""
+    if not name:
+        return ""
+    return _fold_str(str(name))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def fix_mojibake(text: str) -> str:
+    """Desfaz UTF-8 decodificado como latin-1/cp1252 (ex.: 'OpÃ§Ã£o' → 'Opção')."""
+    if not text:
+        return text
+    if not any(p in text for p in MOJIBAKE_MARKERS):
+        return text
+    try:
+        return text.encode("latin-1").decode("utf-8")
+    except (UnicodeDecodeError, UnicodeEncodeError):
+        try:
+            return text.encode("cp1252").decode("utf-8")
+        except (UnicodeDecodeError, UnicodeEncodeError):
+            return text
+
+
+def option_key(value) -> str:
+    """Chave de comparação de opção (regras de _normalize_option_key)."""
+    return fix_mojibake(str(value or "")).strip().lower()
+
+
+# ---------------------------------------------------------------------------
+# API em lote — normaliza cada valor distinto uma única vez
+# ---------------------------------------------------------------------------
+def _batch(func, values: Iterable[str]) -> List[str]:
+    values = list(values)
+    memo: Dict[str, str] = {}
+    for v in values:
+        if v not in memo:
+            memo[v] = func(v)
+    return [memo[v] for v in values]
+
+
+def canonical_names(names: Iterable[str]) -> List[str]:
+    return _batch(canonical_name, names)
+
+
+def fold_many(names: Iterable[str]) -> List[str]:
+    return _batch(fold, names)
+
+
+def option_keys(values: Iterable[str]) -> List[str]:
+    return _batch(option_key, values)
+
+
+def cache_info() -> Dict[str, object]:
+    return {
+        "canonical_name": canonical_name.cache_info(),
+        "fold": _fold_str.cache_info(),
+        "fix_mojibake": fix_mojibake.cache_info(),
+    }
+
+
+def cache_clear() -> None:
+    canonical_name.cache_clear()
+    _fold_str.cache_clear()
+    fix_mojibake.cache_clear()
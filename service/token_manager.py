@@ -0,0 +1,300 @@
+# service/token_manager.py
+# Token Bearer do admin por loja, compartilhado por todos os módulos.
+#
+# A validade vem do próprio JWT (claim "exp"). O token fica em memória e num
+# arquivo ao lado do storage_state da loja, e só é renovado quando falta pouco
+# para expirar ou depois de um 401/403 (invalidate). A renovação tenta, nesta
+# ordem, fontes que não navegam:
+#   1. localStorage da loja no storage_state do contexto (context.storage_state)
+#   2. localStorage da loja no storage_state salvo em disco
+#   3. localStorage da página, se ela já estiver na loja
+# e só então o callback `refresh(page)` do chamador (interceptação/navegação).
+# O refresh roda FORA do lock e uma vez só por vez (single-flight): as outras
+# threads esperam o resultado em vez de ficarem presas atrás da navegação.
+
+import base64
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger("token_manager")
+
+TOKEN_REFRESH_MARGIN_S = 120  # renova quando faltar menos que isso para o "exp"
+TOKEN_DEFAULT_TTL_S = 1800  # token sem "exp" legível vale por este tempo
+
+_LOCALSTORAGE_KEYS = ("token", "access_token", "auth_token", "authorization", "jwt", "bearer", "api_token", "user_token")
+
+_JS_LOCALSTORAGE_TOKEN = """() => {
+    const keys = %s;
+    for (const k of keys) { const v = localStorage.getItem(k); if (v && v.length > 10) return v; }
+    for (let i = 0; i < localStorage.length; i++) {
+        const v = localStorage.getItem(localStorage.key(i));
+        if (v && typeof v === 'string' && v.startsWith('eyJ')) return v;
+    }
+    return null;
+}""" % json.dumps(list(_LOCALSTORAGE_KEYS))
+
+
+def ensure_bearer(token: Optional[str]) -> str:
+    token = (token or "").strip().strip('"')
+    if token and not token.lower().startswith("bearer "):
+        token = f"Bearer {token}"
+    return token
+
+
+def jwt_expiry(token: Optional[str]) -> Optional[float]:
+    """Claim "exp" (epoch) do JWT, ou None se o token não for um JWT legível."""
+    raw = (token or "").split()[-1] if token else ""
+    parts = raw.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+    except ValueError:
+        return None
+    exp = payload.get("exp") if isinstance(payload, dict) else None
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+def store_key(url: str) -> str:
+    """URL qualquer da loja → "https://host"."""
+    parsed = urlparse(url or "")
+    if parsed.scheme and parsed.netloc:
+        return f"{parsed.scheme}://{parsed.netloc}"
+    return (url or "").rstrip("/")
+
+
+def token_file_for(state_path: str) -> str:
+    """cookies_destino.state.json → cookies_destino.state.tokens.json"""
+    return str(Path(state_path).with_suffix(".tokens.json"))
+
+
+def _token_from_local_storage(entries) -> str:
+    values = {e.get("name"): e.get("value") for e in entries or [] if isinstance(e, dict)}
+    for key in _LOCALSTORAGE_KEYS:
+        value = values.get(key)
+        if isinstance(value, str) and len(value) > 10:
+            return value
+    for value in values.values():
+        if isinstance(value, str) and value.startswith("eyJ"):
+            return value
+    return ""
+
+
+def _token_from_state(state: Optional[dict], store: str) -> str:
+    for origin in (state or {}).get("origins") or []:
+        if isinstance(origin, dict) and store_key(origin.get("origin") or "") == store:
+            return _token_from_local_storage(origin.get("localStorage"))
+    return ""
+
+
+class TokenManager:
+    """Token de UMA loja: memória → arquivo → storage_state/página → refresh do chamador."""
+
+    def __init__(self, store: str, state_path: Optional[str] = None):
+        self.store = store_key(store)
+        self.state_path = None
+        self.token_path = None
+        self.stats = {"hits": 0, "refreshes": 0, "invalidations": 0}
+        self._token = ""
+        self._expires_at = 0.0
+        self._rejected: set = set()
+        self._lock = threading.RLock()
+        self._refreshed = threading.Condition(self._lock)
+        self._refreshing = False
+        if state_path:
+            self.bind_state(state_path)
+
+    # ------------------------------------------------------------------ estado
+    def bind_state(self, state_path: str) -> None:
+        """Associa o storage_state da loja (e o arquivo de tokens ao lado dele)."""
+        with self._lock:
+            if state_path == self.state_path:
+                return
+            self.state_path = state_path
+            self.token_path = token_file_for(state_path)
+            if not self.valid:
+                self._load()
+
+    def _fresh(self, expires_at: float) -> bool:
+        return expires_at - time.time() > TOKEN_REFRESH_MARGIN_S
+
+    @property
+    def valid(self) -> bool:
+        return bool(self._token) and self._fresh(self._expires_at)
+
+    @property
+    def expires_in(self) -> float:
+        return max(0.0, self._expires_at - time.time()) if self._token else 0.0
+
+    def remember(self, token: Optional[str]) -> str:
+        """Guarda um token obtido por fora (ex.: interceptado numa resposta)."""
+        token = ensure_bearer(token)
+        if not token:
+            return ""
+        expires_at = jwt_expiry(token) or (time.time() + TOKEN_DEFAULT_TTL_S)
+        with self._lock:
+            changed = token != self._token
+            self._token, self._expires_at = token, expires_at
+            self._rejected.discard(token)
+        if changed:
+            self._save()
+        return token
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """Token recusado (401/403). Com `token`, só descarta se ainda for o atual."""
+        with self._lock:
+            if token and ensure_bearer(token) != self._token:
+                return
+            if self._token:
+                self._rejected.add(self._token)
+                self.stats["invalidations"] += 1
+            self._token, self._expires_at = "", 0.0
+
+    # ------------------------------------------------------------------ obtenção
+    def get(self, page=None, refresh: Optional[Callable] = None) -> str:
+        """Token válido da loja; "" se nenhuma fonte tiver um."""
+        waited = False
+        with self._lock:
+            while True:
+                if self.valid:
+                    self.stats["hits"] += 1
+                    return self._token
+                for source, read in (
+                    ("storage_state do contexto", lambda: self._from_context(page)),
+                    ("storage_state em disco", self._from_state_file),
+                    ("localStorage da página", lambda: self._from_page(page)),
+                ):
+                    token = self._accept(read())
+                    if token:
+                        logger.debug("[%s] token via %s", self.store, source)
+                        return self._renewed(token)
+                if refresh is None or page is None or waited and not self._refreshing:
+                    # sem callback, ou o refresh que esperamos também não trouxe token
+                    logger.warning("[%s] nenhum token válido disponível", self.store)
+                    return ""
+                if not self._refreshing:
+                    self._refreshing = True
+                    break
+                # outra thread já está navegando: espera ela e reconfere
+                self._refreshed.wait()
+                waited = True
+
+        raw = None
+        try:
+            raw = refresh(page)
+        finally:
+            with self._lock:
+                self._refreshing = False
+                token = self._accept(raw)
+                result = self._renewed(token) if token else ""
+                self._refreshed.notify_all()
+        if not result:
+            logger.warning("[%s] nenhum token válido disponível", self.store)
+        return result
+
+    def _accept(self, token: Optional[str]) -> str:
+        token = ensure_bearer(token)
+        if not token or token in self._rejected:
+            return ""
+        expires_at = jwt_expiry(token)
+        if expires_at is not None and not self._fresh(expires_at):
+            return ""
+        return token
+
+    def _renewed(self, token: str) -> str:
+        self.stats["refreshes"] += 1
+        logger.info("🔑 [%s] token renovado (expira em %ds)", self.store, int(
+            (jwt_expiry(token) or time.time() + TOKEN_DEFAULT_TTL_S) - time.time()))
+        return self.remember(token)
+
+    def _from_context(self, page) -> str:
+        if page is None:
+            return ""
+        try:
+            return _token_from_state(page.context.storage_state(), self.store)
+        except Exception as exc:
+            logger.debug("[%s] storage_state do contexto indisponível: %s", self.store, exc)
+            return ""
+
+    def _from_state_file(self) -> str:
+        if not self.state_path or not os.path.isfile(self.state_path):
+            return ""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return _token_from_state(json.load(f), self.store)
+        except (json.JSONDecodeError, OSError):
+            return ""
+
+    def _from_page(self, page) -> str:
+        if page is None:
+            return ""
+        try:
+            if store_key(page.url) != self.store:
+                return ""
+            return page.evaluate(_JS_LOCALSTORAGE_TOKEN) or ""
+        except Exception:
+            return ""
+
+    # ------------------------------------------------------------------ disco
+    def _load(self) -> None:
+        if not self.token_path or not os.path.isfile(self.token_path):
+            return
+        try:
+            with open(self.token_path, "r", encoding="utf-8") as f:
+                entry = (json.load(f).get("stores") or {}).get(self.store) or {}
+        except (json.JSONDecodeError, OSError, AttributeError) as exc:
+            logger.warning("Arquivo de tokens ilegível (%s): %s", self.token_path, exc)
+            return
+        token = ensure_bearer(entry.get("token"))
+        expires_at = float(entry.get("expires_at") or 0)
+        if token and self._fresh(expires_at):
+            self._token, self._expires_at = token, expires_at
+            logger.debug("[%s] token carregado de %s", self.store, self.token_path)
+
+    def _save(self) -> None:
+        if not self.token_path:
+            return
+        with self._lock:
+            entry = {"token": self._token, "expires_at": self._expires_at}
+        try:
+            data = {}
+            if os.path.isfile(self.token_path):
+                with open(self.token_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            data.setdefault("stores", {})[self.store] = entry
+            dirpath = os.path.dirname(self.token_path) or "."
+            fd, tmp = tempfile.mkstemp(prefix="tmp_tokens_", dir=dirpath)
+            os.close(fd)
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                shutil.move(tmp, self.token_path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        except Exception as exc:
+            logger.warning("Erro ao salvar token de %s: %s", self.store, exc)
+
+
+_MANAGERS: Dict[str, TokenManager] = {}
+_MANAGERS_LOCK = threading.Lock()
+
+
+def get_token_manager(url: str, state_path: Optional[str] = None) -> TokenManager:
+    """Gerenciador compartilhado pela execução (um por loja); `state_path` associa o disco."""
+    key = store_key(url)
+    with _MANAGERS_LOCK:
+        manager = _MANAGERS.get(key)
+        if manager is None:
+            manager = _MANAGERS[key] = TokenManager(key)
+    if state_path:
+        manager.bind_state(state_path)
+    return manager